@@ -0,0 +1,128 @@
+"""
+Umwandlung zwischen Google-Calendar-Events und Aufgaben.
+
+Einzige Kopie für calendar_agent und task-planner-ai-flow. Die Funktionen
+arbeiten nur auf Dicts und Standardtypen; jeder Dienst baut daraus seine
+eigene Darstellung (Dict im Agenten, Task-Modell im Planner).
+"""
+import base64
+from datetime import date, datetime, time, timedelta
+
+# Completion flag stored in the event's private extended properties
+COMPLETED_PROPERTY = "completed"
+# Request body for events().patch that marks an event as completed
+COMPLETED_PATCH = {"extendedProperties": {"private": {COMPLETED_PROPERTY: "true"}}}
+# Legacy marker prepended to the description of completed tasks
+COMPLETED_MARKER = "[COMPLETED]"
+# Set on events listed from a calendar other than the one new tasks go to
+SOURCE_CALENDAR_KEY = "sourceCalendarId"
+# Joins event ID and encoded calendar ID in the task IDs of those events.
+# Event IDs only use base32hex characters (plus "_" for instances).
+TASK_ID_SEPARATOR = "~"
+
+
+def parse_event_start(start):
+    """
+    Parse an event start into (date, "HH:MM:SS" or None) in a single pass.
+    Google returns RFC 3339 timestamps (YYYY-MM-DDTHH:MM:SS[.fff](Z|+HH:MM)),
+    so the wall-clock date and time are read straight from fixed offsets.
+    """
+    value = start.get("dateTime")
+    if value:
+        return date.fromisoformat(value[:10]), value[11:19]
+    value = start.get("date")
+    if value:
+        return date.fromisoformat(value[:10]), None
+    return None
+
+
+def is_flagged_completed(event):
+    """Check the completion flag in the event's private extended properties"""
+    private = event.get("extendedProperties", {}).get("private", {})
+    return private.get(COMPLETED_PROPERTY) == "true"
+
+
+def from_calendar(event, calendar_id, default_calendar_id):
+    """The event, tagged with the calendar it was read from unless that is the default one"""
+    if calendar_id == default_calendar_id:
+        return event
+    return dict(event, **{SOURCE_CALENDAR_KEY: calendar_id})
+
+
+def task_id(event):
+    """
+    Task ID of an event: the event ID, followed by the URL-safe base64 of
+    its calendar ID for events outside the default calendar, so writes can
+    be sent to the calendar the task was read from
+    """
+    calendar_id = event.get(SOURCE_CALENDAR_KEY)
+    if not calendar_id:
+        return event["id"]
+    encoded = base64.urlsafe_b64encode(calendar_id.encode()).decode().rstrip("=")
+    return f"{event['id']}{TASK_ID_SEPARATOR}{encoded}"
+
+
+def split_task_id(value, default_calendar_id):
+    """
+    (calendar ID, event ID) a task ID refers to.
+    Raises ValueError for a malformed calendar part.
+    """
+    event_id, separator, encoded = value.partition(TASK_ID_SEPARATOR)
+    if not separator:
+        return default_calendar_id, value
+    calendar_id = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+    if not event_id or not calendar_id:
+        raise ValueError(f"Invalid task ID: {value}")
+    return calendar_id, event_id
+
+
+def event_fields(event):
+    """
+    (task ID, title, date, "HH:MM:SS" or None, description or None, is_completed)
+    of an event, or None for events without title or start
+    """
+    title = event.get("summary")
+    if not title:
+        return None
+
+    start = parse_event_start(event.get("start", {}))
+    if start is None:
+        return None
+
+    description = event.get("description", "")
+    # Tasks completed before the extended-property flag carry the legacy marker
+    has_marker = COMPLETED_MARKER in description
+    if has_marker:
+        description = description.replace(COMPLETED_MARKER, "")
+    description = description.strip()
+    is_completed = has_marker or is_flagged_completed(event)
+
+    return task_id(event), title, start[0], start[1], description or None, is_completed
+
+
+def parse_time(value):
+    """datetime.time from a time or an "HH:MM[:SS]" string"""
+    if not isinstance(value, str):
+        return value
+    parts = value.split(":")
+    return time(int(parts[0]), int(parts[1]), int(parts[2]) if len(parts) > 2 else 0)
+
+
+def event_body(title, task_date, task_time=None, description=None):
+    """Google Calendar event body for a task: one hour at task_time, or all day"""
+    event = {
+        "summary": title,
+        "description": description or "",
+    }
+
+    if task_time:
+        start_datetime = datetime.combine(task_date, parse_time(task_time))
+        end_datetime = start_datetime + timedelta(hours=1)
+        event["start"] = {"dateTime": start_datetime.isoformat(), "timeZone": "UTC"}
+        event["end"] = {"dateTime": end_datetime.isoformat(), "timeZone": "UTC"}
+    else:
+        # The end date of an all-day event is exclusive
+        event["start"] = {"date": task_date.isoformat()}
+        event["end"] = {"date": (task_date + timedelta(days=1)).isoformat()}
+
+    return event
@@ -0,0 +1,149 @@
+"""
+Lokale Darstellung einfacher Tool-Ergebnisse statt eines zweiten Modellaufrufs.
+
+Einzige Kopie für calendar_agent und task-planner-ai-flow. Welche Funktionen
+lokal dargestellt werden und welche Nachrichten das Modell brauchen, gibt jeder
+Dienst als FastPathRules mit, der Agent z.B. über rules_from_env().
+"""
+import os
+import re
+
+# Messages matching this pattern need the model to reason over the results
+DEFAULT_SKIP_PATTERN = (
+    r"\b(free|frei|busy|conflict\w*|konflikt\w*|overlap\w*|summar\w*|zusammenfass\w*|recommend\w*|empfehl\w*|why|warum|should|sollte)\b"
+)
+# Messages asking for a change: a read-only step only prepares the write, so the model continues
+DEFAULT_ACTION_PATTERN = (
+    r"\b(mark\w*|markier\w*|done|erledigt|add|hinzufüg\w*|create|erstell\w*|anleg\w*|trag\w*|"
+    r"delete|lösch\w*|remove|entfern\w*|cancel\w*|absag\w*|move|verschieb\w*|reschedule|update|änder\w*|"
+    r"rename|umbenenn\w*|plan\w*|schedule)\b"
+)
+
+GERMAN_WORDS = {
+    "ich", "habe", "hab", "heute", "morgen", "übermorgen", "termine", "termin", "aufgabe",
+    "aufgaben", "zeige", "zeig", "welche", "nächste", "nächsten", "woche", "und", "bitte",
+    "erstelle", "für", "mir", "meine", "ist", "sind", "erledigt", "lösche", "markiere", "um", "uhr"
+}
+
+TEMPLATES = {
+    "en": {
+        "today": "You have {count} task(s) today:",
+        "today_empty": "You have no tasks today.",
+        "range": "{count} task(s) found:",
+        "range_empty": "No tasks found in this period.",
+        "all_day": "all day",
+        "created": "Task '{title}' created for {date}{at_time}.",
+        "at_time": " at {time}",
+        "done": "Task '{title}' marked as done.",
+        "done_untitled": "Task marked as done.",
+        "batch": "{succeeded} operation(s) succeeded, {failed} failed.",
+    },
+    "de": {
+        "today": "Du hast heute {count} Aufgabe(n):",
+        "today_empty": "Du hast heute keine Aufgaben.",
+        "range": "{count} Aufgabe(n) gefunden:",
+        "range_empty": "Keine Aufgaben in diesem Zeitraum gefunden.",
+        "all_day": "ganztägig",
+        "created": "Aufgabe '{title}' für {date}{at_time} erstellt.",
+        "at_time": " um {time}",
+        "done": "Aufgabe '{title}' als erledigt markiert.",
+        "done_untitled": "Aufgabe als erledigt markiert.",
+        "batch": "{succeeded} Vorgang/Vorgänge erfolgreich, {failed} fehlgeschlagen.",
+    },
+}
+
+
+class FastPathRules:
+    """
+    Rules deciding whether the local templates are good enough:
+    every tool is whitelisted, nothing failed, the task list is short
+    and the message does not ask for reasoning over the data.
+    The step must also be the last one: either it wrote to the calendar, or
+    the message asks for no change a preceding lookup would be preparing.
+    """
+
+    def __init__(self, enabled, functions, write_functions, max_tasks,
+                 skip_pattern=DEFAULT_SKIP_PATTERN, action_pattern=DEFAULT_ACTION_PATTERN):
+        self.enabled = enabled
+        self.functions = set(functions)
+        self.write_functions = set(write_functions)
+        self.max_tasks = max_tasks
+        self.skip_pattern = re.compile(skip_pattern, re.IGNORECASE) if skip_pattern else None
+        self.action_pattern = re.compile(action_pattern, re.IGNORECASE) if action_pattern else None
+
+    def allows(self, message, results):
+        if not self.enabled or not results:
+            return False
+        if self.skip_pattern is not None and self.skip_pattern.search(message):
+            return False
+        wrote = any(name in self.write_functions for name, _, _ in results)
+        if not wrote and self.action_pattern is not None and self.action_pattern.search(message):
+            return False
+        task_count = 0
+        for name, _, result in results:
+            if name not in self.functions or "error" in result:
+                return False
+            if result.get("failed"):
+                return False
+            task_count += len(result.get("tasks", []))
+        return task_count <= self.max_tasks
+
+
+def rules_from_env(default_functions, write_functions):
+    """FastPathRules from the FAST_PATH_* variables"""
+    return FastPathRules(
+        enabled=os.getenv("FAST_PATH_ENABLED", "True").lower() in ("true", "1", "t"),
+        functions=[
+            name.strip()
+            for name in os.getenv("FAST_PATH_FUNCTIONS", ",".join(default_functions)).split(",")
+            if name.strip()
+        ],
+        write_functions=write_functions,
+        max_tasks=int(os.getenv("FAST_PATH_MAX_TASKS", "25")),
+        skip_pattern=os.getenv("FAST_PATH_SKIP_PATTERN", DEFAULT_SKIP_PATTERN),
+        action_pattern=os.getenv("FAST_PATH_ACTION_PATTERN", DEFAULT_ACTION_PATTERN),
+    )
+
+
+def detect_language(message):
+    """Pick "de" or "en" for the answer based on the user's message"""
+    lowered = message.lower()
+    if any(char in lowered for char in "äöüß"):
+        return "de"
+    words = set(re.findall(r"\w+", lowered))
+    return "de" if words & GERMAN_WORDS else "en"
+
+
+def format_task_line(task, texts):
+    time_text = task["time"][:5] if task.get("time") else texts["all_day"]
+    date_text = f"{task['date']} " if task.get("date") else ""
+    return f"- {date_text}{time_text}: {task['title']}"
+
+
+def render_result(name, args, result, texts):
+    if name in ("get_today_tasks", "get_tasks_range"):
+        tasks = result.get("tasks", [])
+        key = "today" if name == "get_today_tasks" else "range"
+        if not tasks:
+            return texts[f"{key}_empty"]
+        lines = [texts[key].format(count=len(tasks))]
+        lines.extend(format_task_line(task, texts) for task in tasks)
+        return "\n".join(lines)
+    if name == "create_task":
+        at_time = texts["at_time"].format(time=args["time"][:5]) if args.get("time") else ""
+        return texts["created"].format(title=result.get("title", args.get("title", "")), date=args.get("date", ""), at_time=at_time)
+    if name == "mark_task_done":
+        title = result.get("title")
+        return texts["done"].format(title=title) if title else texts["done_untitled"]
+    return texts["batch"].format(succeeded=result.get("succeeded", 0), failed=result.get("failed", 0))
+
+
+def render_tool_results(message, results, rules):
+    """
+    Render (function name, arguments, result) triples as a final answer,
+    or return None when the model should present them instead
+    """
+    if not rules.allows(message, results):
+        return None
+    texts = TEMPLATES[detect_language(message)]
+    return "\n\n".join(render_result(name, args, result, texts) for name, args, result in results)
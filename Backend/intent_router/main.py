@@ -0,0 +1,83 @@
+"""
+Einstieg des Intent-Routers.
+
+Aufruf:
+    python main.py "Welche Termine habe ich morgen?"   # einmal routen, JSON auf stdout
+    python main.py --serve                             # dauerhaft: JSON-Zeilen über stdin/stdout (server.js)
+    python main.py --evaluate                          # Kreuzvalidierung auf examples.jsonl
+
+Im Modus --serve liest der Prozess je Zeile {"id": ..., "message": ..., "history": ...}
+und antwortet mit {"id": ..., **route(message, history=history)}; history ist die
+Zahl früherer Nutzernachrichten im Gespräch. server.js startet ihn einmal;
+Modell laden und Interpreterstart fallen so nicht bei jeder Anfrage an.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from router import NaiveBayes, AGENTEN, ROUTER_MIN_CONFIDENCE, classifier, load_examples, route
+
+
+def serve():
+    classifier()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            reply = {
+                "id": request.get("id"),
+                **route(request.get("message", ""), history=int(request.get("history") or 0)),
+            }
+        except (ValueError, TypeError, AttributeError) as error:
+            reply = {"id": None, "error": str(error)}
+        sys.stdout.write(json.dumps(reply, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+def evaluate(folds=5, seed=0):
+    """
+    k-fache Kreuzvalidierung: Anteil der Agent-Anfragen, die lokal entschieden
+    werden (Abdeckung), Trefferquote aller lokalen Entscheidungen (auch
+    fälschlich gerouteter Smalltalk) und die mittlere Dauer pro Nachricht
+    """
+    examples = load_examples()
+    random.Random(seed).shuffle(examples)
+    decided = correct = covered = 0
+    elapsed = 0.0
+    for fold in range(folds):
+        test = examples[fold::folds]
+        model = NaiveBayes().fit([example for index, example in enumerate(examples) if index % folds != fold])
+        for text, label in test:
+            started = time.perf_counter()
+            result = route(text, model)
+            elapsed += time.perf_counter() - started
+            if not result["fallback"]:
+                decided += 1
+                correct += result["agent"] == label
+                covered += label in AGENTEN
+    agent_examples = sum(1 for _, label in examples if label in AGENTEN)
+    return {
+        "beispiele": len(examples),
+        "schwelle": ROUTER_MIN_CONFIDENCE,
+        "abdeckung": round(covered / agent_examples, 3) if agent_examples else None,
+        "trefferquote": round(correct / decided, 3) if decided else None,
+        "mittlere_dauer_ms": round(elapsed / len(examples) * 1000, 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nachrichten lokal einem Agenten zuordnen")
+    parser.add_argument("message", nargs="?", help="zu routende Nachricht")
+    parser.add_argument("--serve", action="store_true", help="JSON-Zeilen über stdin/stdout verarbeiten")
+    parser.add_argument("--evaluate", action="store_true", help="Kreuzvalidierung auf den Beispielen")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+    elif args.evaluate:
+        print(json.dumps(evaluate(), ensure_ascii=False))
+    else:
+        print(json.dumps(route(args.message or ""), ensure_ascii=False))
@@ -0,0 +1,182 @@
+"""
+Lokaler Intent-Router für das Orchestrator-Frontend.
+
+Entscheidet ohne Modellaufruf, welcher Agent eine Nachricht bearbeitet
+(getCalendar, getMail oder webSearch), in zwei Stufen:
+1. Eindeutige Schlüsselwörter (Regex): passt genau ein Agent, ist die
+   Entscheidung klar.
+2. Naive-Bayes-Klassifikator über Wörter, Wortpaare und Zeichen-4-Gramme,
+   trainiert auf den gelabelten Beispielen in examples.jsonl.
+Ist der Klassifikator unsicher (ROUTER_MIN_CONFIDENCE), widersprechen sich
+die Stufen oder ist die Nachricht Smalltalk, entscheidet weiterhin das LLM.
+
+Lokal entschieden wird nur, was für sich allein steht:
+- Handlungsaufträge (antworte, archiviere, lösche, verschiebe ...) gehen immer
+  an das LLM; die Agenten würden sie sonst ohne Rückfrage ausführen.
+- Gibt es frühere Nachrichten im Gespräch, zählt nur ein Schlüsselwort;
+  Rückfragen wie "und am Freitag?" braucht den Kontext, den nur das LLM hat.
+- Allgemeine Wissensfragen ohne Such-Schlüsselwort beantwortet das LLM
+  selbst, der Klassifikator schickt sie nicht an webSearch.
+"""
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+
+# Gemeinsames Telemetrie-Modul liegt in Backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import inc
+
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.8"))
+ROUTER_EXAMPLES_PATH = os.getenv("ROUTER_EXAMPLES_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "examples.jsonl"
+)
+# Lange Nachrichten enthalten oft mehrere Anliegen: die entscheidet das LLM
+ROUTER_MAX_WORDS = int(os.getenv("ROUTER_MAX_WORDS", "30"))
+
+AGENTEN = ("getCalendar", "getMail", "webSearch")
+# Label für Smalltalk und allgemeine Fragen: beantwortet das LLM selbst
+SMALLTALK = "chat"
+
+SCHLUESSELWOERTER = {
+    "getCalendar": re.compile(
+        r"\b(termin\w*|kalender\w*|meetings?|besprechung\w*|zeitplan\w*|verabredung\w*|"
+        r"calendar|appointments?|agenda|schedule)\b",
+        re.IGNORECASE
+    ),
+    "getMail": re.compile(
+        r"\b(e-?mails?|mails?|posteingang|postfach|inbox|gmail|newsletter|unbeantwortet\w*|emails?)\b",
+        re.IGNORECASE
+    ),
+    "webSearch": re.compile(
+        r"\b(wetter\w*|weather|tutorial\w*|öffnungszeiten|opening hours|wikipedia|google\w*|"
+        r"websuche|im (internet|netz|web)|search the web|aktienkurs\w*|stock price)\b",
+        re.IGNORECASE
+    ),
+}
+
+# Handlungsaufträge: nie lokal routen
+AKTIONEN = re.compile(
+    r"\b(antwort\w*|beantworte\w*|archivier\w*|lösch\w*|loesch\w*|verschieb\w*|weiterleit\w*|leite|"
+    r"sende\w*|schick\w*|schreib\w*|markier\w*|erstell\w*|absag\w*|sag\w* \w+ ab|trag\w* \w+ ein|"
+    r"reply|respond|answer|archive|delete|remove|move|forward|send|mark|create|cancel|reschedule)\b",
+    re.IGNORECASE
+)
+
+WORT = re.compile(r"\w+")
+# Skaliert die Summe der Log-Wahrscheinlichkeiten: Wörter, Wortpaare und n-Gramme
+# sind stark abhängig, ungedämpft wäre Naive Bayes fast immer "sicher"
+MERKMAL_GEWICHT = 0.25
+
+
+def features(text):
+    """Wörter, Wortpaare und Zeichen-4-Gramme (fängt Komposita wie 'Zahnarzttermin')"""
+    words = WORT.findall(text.lower())
+    result = list(words)
+    result.extend(f"{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        result.extend(padded[i:i + 4] for i in range(len(padded) - 3))
+    return result
+
+
+class NaiveBayes:
+    """Multinomialer Naive-Bayes-Klassifikator mit Laplace-Glättung"""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.log_prior = {}
+        self.log_likelihood = {}
+        self.log_unknown = {}
+        self.vocabulary = set()
+
+    def fit(self, examples):
+        """examples: Liste von (text, label)"""
+        counts = {}
+        documents = Counter()
+        for text, label in examples:
+            counts.setdefault(label, Counter()).update(features(text))
+            documents[label] += 1
+        self.vocabulary = set().union(*counts.values()) if counts else set()
+        size = len(self.vocabulary)
+        for label, label_counts in counts.items():
+            total = sum(label_counts.values()) + self.alpha * size
+            self.log_prior[label] = math.log(documents[label] / len(examples))
+            self.log_likelihood[label] = {
+                feature: math.log((count + self.alpha) / total) for feature, count in label_counts.items()
+            }
+            self.log_unknown[label] = math.log(self.alpha / total)
+        return self
+
+    def predict(self, text):
+        """(label, Wahrscheinlichkeit) oder (None, 0.0), wenn kein Merkmal bekannt ist"""
+        known = [feature for feature in features(text) if feature in self.vocabulary]
+        if not known:
+            return None, 0.0
+        scores = {
+            label: prior + MERKMAL_GEWICHT * sum(
+                self.log_likelihood[label].get(feature, self.log_unknown[label]) for feature in known
+            )
+            for label, prior in self.log_prior.items()
+        }
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+
+def load_examples(path=None):
+    examples = []
+    with open(path or ROUTER_EXAMPLES_PATH, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                examples.append((item["text"], item["label"]))
+    return examples
+
+
+@lru_cache(maxsize=None)
+def classifier():
+    """Auf den Beispielen trainierter Klassifikator, beim ersten Aufruf gebaut"""
+    return NaiveBayes().fit(load_examples())
+
+
+def _result(agent, text, confidence, source):
+    inc("intent_router_total", agent=agent or "llm", source=source)
+    return {
+        "agent": agent,
+        "arguments": {"text": text} if agent else None,
+        "confidence": round(confidence, 3),
+        "source": source,
+        "fallback": agent is None,
+    }
+
+
+def route(message, model=None, history=0):
+    """
+    Agent und Argumente für eine Nachricht. "fallback": true bedeutet, dass
+    das LLM entscheiden soll; "agent" ist dann None. history ist die Zahl
+    früherer Nutzernachrichten im selben Gespräch.
+    """
+    text = " ".join((message or "").split())
+    if not text or len(text.split()) > ROUTER_MAX_WORDS or AKTIONEN.search(text):
+        return _result(None, text, 0.0, "llm")
+
+    treffer = [agent for agent, muster in SCHLUESSELWOERTER.items() if muster.search(text)]
+    if len(treffer) == 1:
+        return _result(treffer[0], text, 1.0, "regex")
+
+    # Ohne Schlüsselwort ist eine Folgenachricht nur mit dem Gesprächskontext zu verstehen
+    if history and not treffer:
+        return _result(None, text, 0.0, "llm")
+
+    label, confidence = (model or classifier()).predict(text)
+    # Mehrere Schlüsselwörter: der Klassifikator darf nur zwischen ihnen wählen.
+    # webSearch nur über Schlüsselwörter, Wissensfragen beantwortet das LLM selbst
+    if label == "webSearch" and "webSearch" not in treffer:
+        return _result(None, text, confidence, "llm")
+    if label in AGENTEN and confidence >= ROUTER_MIN_CONFIDENCE and (not treffer or label in treffer):
+        return _result(label, text, confidence, "classifier")
+    return _result(None, text, confidence, "llm")
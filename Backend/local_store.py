@@ -0,0 +1,152 @@
+"""
+Lokaler Datenspeicher (SQLite) für vorab synchronisierte Gmail- und
+Kalenderdaten.
+
+Ein Sync-Dienst (z.B. mail_agent/sync.py) schreibt regelmäßig hinein, die
+Agenten lesen zuerst von hier. Ist der Speicher nicht vorhanden oder zu alt,
+gehen die Agenten wie bisher direkt an die API.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+LOCAL_STORE_ENABLED = os.getenv("LOCAL_STORE_ENABLED", "True").lower() in ("true", "1", "t")
+# Daten älter als diese Anzahl Sekunden werden nicht mehr ausgeliefert
+LOCAL_STORE_MAX_AGE = float(os.getenv("LOCAL_STORE_MAX_AGE", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER,
+    start_ts REAL,
+    end_ts REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS items_range ON items (kind, start_ts, end_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    window_start REAL,
+    window_end REAL
+);
+"""
+
+
+class LocalStore:
+    """
+    Einträge je Art (kind, z.B. "inbox" oder "events") mit Reihenfolge oder
+    Zeitfenster, plus Zeitpunkt und Fenster der letzten Synchronisierung.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return LOCAL_STORE_ENABLED and os.path.exists(self.path)
+
+    def connect(self):
+        created = not os.path.exists(self.path)
+        connection = sqlite3.connect(self.path, timeout=5)
+        if created:
+            # Enthält Mail- bzw. Kalenderinhalte: nur für den aktuellen Nutzer lesbar
+            os.chmod(self.path, 0o600)
+        # WAL: Leser werden vom schreibenden Sync-Dienst nicht blockiert
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """Verbindung für einen Block: Commit bei Erfolg, danach immer schließen"""
+        connection = self.connect()
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def replace(self, kind, items, window=None):
+        """
+        Alle Einträge einer Art in einer Transaktion ersetzen.
+        items: Dicts mit id, data und optional position, start_ts, end_ts.
+        """
+        window_start, window_end = window or (None, None)
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM items WHERE kind = ?", (kind,))
+            connection.executemany(
+                "INSERT INTO items (kind, id, position, start_ts, end_ts, data) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (kind, item["id"], item.get("position"), item.get("start_ts"), item.get("end_ts"),
+                     json.dumps(item["data"], ensure_ascii=False, default=str))
+                    for item in items
+                ]
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state (kind, synced_at, window_start, window_end) VALUES (?, ?, ?, ?)",
+                (kind, time.time(), window_start, window_end)
+            )
+
+    def upsert(self, kind, item_id, data, start_ts=None, end_ts=None):
+        """Einzelnen Eintrag nach einer Änderung durch den Agenten nachziehen"""
+        if not self.exists():
+            return
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO items (kind, id, position, start_ts, end_ts, data) "
+                "VALUES (?, ?, (SELECT position FROM items WHERE kind = ? AND id = ?), ?, ?, ?)",
+                (kind, item_id, kind, item_id, start_ts, end_ts, json.dumps(data, ensure_ascii=False, default=str))
+            )
+
+    def delete(self, kind, item_id):
+        if not self.exists():
+            return
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM items WHERE kind = ? AND id = ?", (kind, item_id))
+
+    def ids(self, kind):
+        if not self.exists():
+            return set()
+        with self.transaction() as connection:
+            return {row[0] for row in connection.execute("SELECT id FROM items WHERE kind = ?", (kind,))}
+
+    def load(self, kind, start_ts=None, end_ts=None, max_age=LOCAL_STORE_MAX_AGE):
+        """
+        Einträge einer Art als Liste von data-Dicts, oder None, wenn der Speicher
+        fehlt, zu alt ist oder das Zeitfenster nicht abdeckt.
+        Mit start_ts/end_ts: alle Einträge, die das Fenster überlappen, nach Beginn sortiert.
+        """
+        if not self.exists():
+            return None
+        with self.transaction() as connection:
+            state = connection.execute(
+                "SELECT synced_at, window_start, window_end FROM sync_state WHERE kind = ?", (kind,)
+            ).fetchone()
+            if state is None or time.time() - state[0] > max_age:
+                return None
+            if start_ts is None:
+                rows = connection.execute(
+                    "SELECT data FROM items WHERE kind = ? ORDER BY position IS NULL, position", (kind,)
+                )
+            else:
+                synced_at, window_start, window_end = state
+                if window_start is None or start_ts < window_start or end_ts > window_end:
+                    return None
+                rows = connection.execute(
+                    "SELECT data FROM items WHERE kind = ? AND start_ts < ? AND end_ts > ? ORDER BY start_ts, id",
+                    (kind, end_ts, start_ts)
+                )
+            return [json.loads(row[0]) for row in rows]
+
+    def stats(self):
+        if not self.exists():
+            return {}
+        with self.transaction() as connection:
+            counts = dict(connection.execute("SELECT kind, COUNT(*) FROM items GROUP BY kind"))
+            return {
+                kind: {"items": counts.get(kind, 0), "age_seconds": round(time.time() - synced_at, 1)}
+                for kind, synced_at in connection.execute("SELECT kind, synced_at FROM sync_state")
+            }
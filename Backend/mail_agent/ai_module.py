@@ -1,31 +1,55 @@
 from dotenv import load_dotenv
 import os
-import openai
+import sys
 import json
+from functools import lru_cache
 
-from pydantic import BaseModel
-from typing import List, Optional
+# Gemeinsames Telemetrie-Modul liegt in Backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import span
 
-# Modelle für die E-Mail-Datenstruktur
-class RelevanteEmail(BaseModel):
-    id: str
-    betreff: str
-    absender: str
+# openai und pydantic werden erst beim ersten KI-Aufruf geladen, nicht beim Prozessstart
 
-class EmailRankingResponse(BaseModel):
-    top_email_ids: List[str]
+@lru_cache(maxsize=None)
+def response_models():
+    """Modelle für die E-Mail-Datenstruktur: (EmailRankingResponse, MailAgentResponse)"""
+    from pydantic import BaseModel
+    from typing import List, Optional
 
-class MailAgentResponse(BaseModel):
-    relevante_emails: Optional[List[RelevanteEmail]]
-    archive_id: Optional[str]
-    reply_text: Optional[str]
-    original_id: Optional[str]
-    to: Optional[str]
-    subject: Optional[str]
+    class RelevanteEmail(BaseModel):
+        id: str
+        betreff: str
+        absender: str
+
+    class EmailRankingResponse(BaseModel):
+        top_email_ids: List[str]
+
+    class MailAgentResponse(BaseModel):
+        relevante_emails: Optional[List[RelevanteEmail]]
+        archive_id: Optional[str]
+        reply_text: Optional[str]
+        original_id: Optional[str]
+        to: Optional[str]
+        subject: Optional[str]
+
+    return EmailRankingResponse, MailAgentResponse
 
 # API-Key laden
 load_dotenv()
-client = openai.OpenAI()
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """OpenAI-Client, beim ersten Aufruf erzeugt"""
+    import openai
+    return openai.OpenAI()
+
+
+def __getattr__(name):
+    # Kompatibilität: ai_module.client liefert weiterhin den (jetzt verzögert erzeugten) Client
+    if name == "client":
+        return get_client()
+    raise AttributeError(name)
 
 def rank_emails_with_ai(message, email_list, top_n=10):
     if not email_list:
@@ -35,20 +59,21 @@ def rank_emails_with_ai(message, email_list, top_n=10):
 
 Nutzeranfrage: {message}
 
-E-Mails:
+E-Mails (ein Eintrag pro Gespräch, "id" ist die neueste Nachricht):
 {json.dumps(email_list, ensure_ascii=False, indent=2)}
 
 Sortiere nach Relevanz und gib die Top {top_n} E-Mail-IDs zurück."""
     
     try:
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": "Du bist ein E-Mail-Ranking-Assistent. Bestimme die Relevanz von E-Mails zu Nutzeranfragen."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format=EmailRankingResponse,
-        )
+        with span("openai.chat.completions", purpose="rank", emails=len(email_list)):
+            response = get_client().beta.chat.completions.parse(
+                model="gpt-4o-2024-08-06",
+                messages=[
+                    {"role": "system", "content": "Du bist ein E-Mail-Ranking-Assistent. Bestimme die Relevanz von E-Mails zu Nutzeranfragen."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format=response_models()[0],
+            )
         
         result = response.choices[0].message.parsed
         return result.top_email_ids
@@ -71,17 +96,18 @@ def process_emails(message, email_list, time):
     try:
         prompt = build_prompt(message, email_list, time)
         
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": (
-                    "Du bist ein hilfreicher E-Mail-Filter-Assistent. "
-                    "Extrahiere alle relevanten Informationen zur Nutzeranfrage."
-                )},
-                {"role": "user", "content": prompt}
-            ],
-            response_format=MailAgentResponse,
-        )
+        with span("openai.chat.completions", purpose="process", emails=len(email_list)):
+            completion = get_client().beta.chat.completions.parse(
+                model="gpt-4o-2024-08-06",
+                messages=[
+                    {"role": "system", "content": (
+                        "Du bist ein hilfreicher E-Mail-Filter-Assistent. "
+                        "Extrahiere alle relevanten Informationen zur Nutzeranfrage."
+                    )},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format=response_models()[1],
+            )
         
         result = completion.choices[0].message.parsed.model_dump()
         return result
@@ -112,7 +138,7 @@ def build_prompt(message, email_list, time):
 Nutzeranfrage: {message}
 Zeitstempel: {time}
 
-E-Mails:
+E-Mails (ein Eintrag pro Gespräch, "id" ist die neueste Nachricht):
 {json.dumps(email_list, ensure_ascii=False, indent=2)}
 
 Aufgaben:
@@ -1,11 +1,14 @@
 import os
+import sys
 import email
 import base64
-from email.mime.text import MIMEText
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+
+# Gemeinsames Telemetrie-Modul liegt in Backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import span, inc
+from rate_limit import GoogleRateLimiter, QUOTA_COSTS, retry_settings_from_env
+from token_client import broker_credentials, reusable
+from local_store import LocalStore
 
 # Für Senden und Lesen
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
@@ -14,21 +17,75 @@ SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 BASE_DIR = os.path.dirname(__file__)
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
+# Alternative Google-API-Adresse, z.B. der lokale Stand-in (standin/server.py)
+GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT", "")
+# Gmail: 250 Quota-Einheiten pro Nutzer und Sekunde
+GMAIL_QUOTA_PER_SECOND = float(os.getenv("GMAIL_QUOTA_PER_SECOND", "250"))
+GMAIL_QUOTA_BURST = float(os.getenv("GMAIL_QUOTA_BURST", "250"))
+
+# Wie viele Posteingangs-Nachrichten gelesen bzw. synchronisiert werden
+INBOX_MAX_RESULTS = 50
+# Aufrufe pro HTTP-Batch-Anfrage (Gmail empfiehlt höchstens 50)
+GMAIL_BATCH_SIZE = 50
+# Vom Sync-Dienst (sync.py) befüllter Speicher, wird vor der API gelesen
+store = LocalStore(os.getenv("LOCAL_STORE_PATH") or os.path.join(BASE_DIR, "local_store.sqlite3"))
+
+gmail_limiter = GoogleRateLimiter(
+    "gmail",
+    units_per_second=GMAIL_QUOTA_PER_SECOND,
+    burst=GMAIL_QUOTA_BURST,
+    count=inc,
+    **retry_settings_from_env()
+)
+
+# Gmail-Service, wird beim ersten Aufruf gebaut und danach wiederverwendet
+_service = None
+# Broker-Token des Service: ohne Refresh-Token, daher wird der Service vor
+# dessen Ablauf mit einem neuen Token vom Broker neu gebaut (Sync-Dienst)
+_broker_creds = None
 
 
 def authenticate_gmail():
+    # Die Google-Bibliotheken werden erst hier importiert: jeder Prozessstart
+    # von server.js spart so deren Importzeit, bis Gmail wirklich gebraucht wird
+    global _service, _broker_creds
+    if _service is not None and (_broker_creds is None or reusable(_broker_creds)):
+        return _service
+    from googleapiclient.discovery import build
+
+    if GOOGLE_API_ROOT:
+        from google.auth.credentials import AnonymousCredentials
+        _service = build('gmail', 'v1', credentials=AnonymousCredentials(),
+                         client_options={'api_endpoint': GOOGLE_API_ROOT.rstrip('/') + '/'})
+        return _service
+
+    # Läuft der Token-Broker, kommt das Access-Token von dort: kein Refresh und
+    # kein Schreiben von token.json im Request-Pfad
+    creds = broker_credentials(os.getenv("TOKEN_BROKER_ACCOUNT", "gmail"))
+    _broker_creds = creds
+    if creds is not None:
+        _service = build('gmail', 'v1', credentials=creds)
+        return _service
+
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+        with span("file.token_read"):
+            creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+            with span("google.token_refresh"):
+                creds.refresh(Request())
         else:
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
             creds = flow.run_local_server(port=8085, access_type='offline', prompt='consent')
-        with open(TOKEN_PATH, 'w') as token:
+        with span("file.token_write"), open(TOKEN_PATH, 'w') as token:
             token.write(creds.to_json())
-    return build('gmail', 'v1', credentials=creds)
+    _service = build('gmail', 'v1', credentials=creds)
+    return _service
 
 
 def parse_email(msg):
@@ -80,23 +137,94 @@ def parse_email(msg):
     return data
 
 
+def list_inbox_ids(service):
+    with span("gmail.messages.list"):
+        results = gmail_limiter.execute(service.users().messages().list(
+            userId='me',
+            labelIds=['INBOX'],
+            maxResults=INBOX_MAX_RESULTS
+        ))
+    return [m['id'] for m in results.get('messages', [])]
+
+
+def fetch_email(service, message_id):
+    with span("gmail.messages.get"):
+        msg = gmail_limiter.execute(service.users().messages().get(userId='me', id=message_id, format='full'))
+    return parse_email(msg)
+
+
+def refresh_labels(service, message_ids):
+    """
+    Aktuelle labelIds bereits gespeicherter Nachrichten: format=minimal ohne
+    Inhalt, gebündelt über die Batch-Schnittstelle (ein Roundtrip je GMAIL_BATCH_SIZE).
+    :return: {id: labelIds}; fehlgeschlagene Abrufe fehlen im Ergebnis
+    """
+    from googleapiclient.http import BatchHttpRequest
+
+    labels = {}
+
+    def on_message(request_id, response, exception):
+        if exception is None and response:
+            labels[response["id"]] = response.get("labelIds", [])
+
+    for offset in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+        chunk = message_ids[offset:offset + GMAIL_BATCH_SIZE]
+        if GOOGLE_API_ROOT:
+            # Die Batch-Adresse stammt aus dem Discovery-Dokument, nicht aus api_endpoint
+            batch = BatchHttpRequest(callback=on_message, batch_uri=GOOGLE_API_ROOT.rstrip('/') + '/batch/gmail/v1')
+        else:
+            batch = service.new_batch_http_request(callback=on_message)
+        for message_id in chunk:
+            batch.add(service.users().messages().get(
+                userId='me', id=message_id, format='minimal', fields='id,labelIds'
+            ))
+        with span("gmail.batch", size=len(chunk)):
+            # Jeder Aufruf im Batch zählt einzeln gegen die Quota
+            gmail_limiter.call(batch.execute, "gmail.batch",
+                               cost=QUOTA_COSTS["gmail.users.messages.get"] * len(chunk))
+    return labels
+
+
 def list_gmail_messages():
-    service = authenticate_gmail()
-    results = service.users().messages().list(
-        userId='me',
-        labelIds=['INBOX'],
-        maxResults=50
-    ).execute()
+    # Zuerst der lokale Speicher; nur wenn er fehlt oder veraltet ist, geht es an Gmail
+    with span("local_store.read", kind="inbox"):
+        cached = store.load("inbox")
+    if cached is not None:
+        inc("local_store_hits_total", kind="inbox")
+        return cached
+    inc("local_store_misses_total", kind="inbox")
 
-    messages = results.get('messages', [])
-    emails = []
+    service = authenticate_gmail()
+    return [fetch_email(service, message_id) for message_id in list_inbox_ids(service)]
 
-    for m in messages:
-        msg = service.users().messages().get(userId='me', id=m['id'], format='full').execute()
-        parsed = parse_email(msg)
-        emails.append(parsed)
 
-    return emails
+def sync_inbox():
+    """
+    Posteingang in den lokalen Speicher übernehmen. Bereits gespeicherte
+    Nachrichten werden nicht erneut geladen, nur ihre Labels aufgefrischt
+    (gelesen, markiert ...); archivierte fallen heraus.
+    :return: (Anzahl neu geladener Nachrichten, Anzahl im Posteingang)
+    """
+    service = authenticate_gmail()
+    message_ids = list_inbox_ids(service)
+    known = {mail["id"]: mail for mail in store.load("inbox", max_age=float("inf")) or []}
+    labels = refresh_labels(service, [message_id for message_id in message_ids if message_id in known])
+    emails = []
+    fetched = 0
+    for message_id in message_ids:
+        mail = known.get(message_id)
+        if mail is None:
+            mail = fetch_email(service, message_id)
+            fetched += 1
+        elif message_id in labels:
+            mail["labelIds"] = labels[message_id]
+        emails.append(mail)
+    with span("local_store.write", kind="inbox"):
+        store.replace("inbox", [
+            {"id": mail["id"], "position": position, "data": mail}
+            for position, mail in enumerate(emails)
+        ])
+    return fetched, len(emails)
 
 def send_reply(message_id, to, subject, body):
     """
@@ -107,6 +235,8 @@ def send_reply(message_id, to, subject, body):
     :param body: Text der Antwort
     :return: API-Antwort
     """
+    from email.mime.text import MIMEText
+
     service = authenticate_gmail()
     message = MIMEText(body)
     message['to'] = to
@@ -119,7 +249,8 @@ def send_reply(message_id, to, subject, body):
         'raw': raw,
         'threadId': message_id
     }
-    sent_message = service.users().messages().send(userId="me", body=body).execute()
+    with span("gmail.messages.send"):
+        sent_message = gmail_limiter.execute(service.users().messages().send(userId="me", body=body))
     return sent_message
 
 def archive_email(message_id):
@@ -129,9 +260,11 @@ def archive_email(message_id):
     :return: API-Antwort
     """
     service = authenticate_gmail()
-    result = service.users().messages().modify(
-        userId='me',
-        id=message_id,
-        body={'removeLabelIds': ['INBOX']}
-    ).execute()
+    with span("gmail.messages.modify"):
+        result = gmail_limiter.execute(service.users().messages().modify(
+            userId='me',
+            id=message_id,
+            body={'removeLabelIds': ['INBOX']}
+        ))
+    store.delete("inbox", message_id)
     return result
\ No newline at end of file
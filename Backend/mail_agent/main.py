@@ -2,6 +2,8 @@ import sys
 import json
 from gmail_reader import list_gmail_messages, send_reply, archive_email
 from ai_module import process_emails, rank_emails_with_ai
+from threads import collapse_threads, thread_message_ids
+from triage import answer_from_labels
 from datetime import datetime
 
 def moderate_emails(email_list):
@@ -51,13 +53,19 @@ def format_for_frontend(output):
 def run_mail_assistant(message: str, time: str):
     email_list = list_gmail_messages()
     email_list = moderate_emails(email_list)
+    # Ein Eintrag pro Gespräch statt pro Nachricht
+    threads = collapse_threads(email_list)
     
-    # 1. KI-Ranking
-    top_ids = rank_emails_with_ai(message, email_list, top_n=10)
-    top_emails = [mail for mail in email_list if mail["id"] in top_ids]
+    # 0. Einfache Filteranfragen lokal aus den vorberechneten Triage-Labels
+    output = answer_from_labels(message, threads)
     
-    # 2. KI-Processing
-    output = process_emails(message, top_emails, time)
+    if output is None:
+        # 1. KI-Ranking
+        top_ids = rank_emails_with_ai(message, threads, top_n=10)
+        top_emails = [thread for thread in threads if thread["id"] in top_ids]
+        
+        # 2. KI-Processing
+        output = process_emails(message, top_emails, time)
     
     # 3. Frontend-Formatierung
     formatted_output = format_for_frontend(output)
@@ -71,9 +79,10 @@ def run_mail_assistant(message: str, time: str):
             body=output["reply_text"]
         )
     
-    # Automatisches Archivieren, wenn archive_id vorhanden ist
+    # Automatisches Archivieren, wenn archive_id vorhanden ist (alle Nachrichten des Threads)
     if output.get("archive_id"):
-        archive_email(output["archive_id"])
+        for message_id in thread_message_ids(threads, output["archive_id"]):
+            archive_email(message_id)
     
     return formatted_output
 
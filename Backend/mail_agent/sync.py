@@ -0,0 +1,53 @@
+"""
+Hintergrund-Sync für den Mail-Agenten.
+
+Holt in festen Abständen neue Posteingangs-Nachrichten in den lokalen
+Speicher (local_store.sqlite3), aus dem list_gmail_messages zuerst liest.
+So zahlt die erste Anfrage nach einer Pause nicht die volle Gmail-Latenz.
+Neue Nachrichten werden danach einmalig klassifiziert (triage.py).
+
+Aufruf:
+    python sync.py                  # dauerhaft, alle SYNC_INTERVAL Sekunden
+    python sync.py --once           # einmal synchronisieren, z.B. per cron
+"""
+import argparse
+import os
+import sys
+
+from gmail_reader import sync_inbox, store, gmail_limiter
+from triage import triage_pending, TRIAGE_ENABLED
+from sync_scheduler import SyncScheduler
+
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", "120"))
+# Zufällige Abweichung des Intervalls (Anteil), damit mehrere Dienste nicht gleichzeitig abfragen
+SYNC_JITTER = float(os.getenv("SYNC_JITTER", "0.1"))
+# Obergrenze für das verlängerte Intervall nach fehlgeschlagenen oder gedrosselten Läufen
+SYNC_BACKOFF_MAX = float(os.getenv("SYNC_BACKOFF_MAX", "1800"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Posteingang regelmäßig in den lokalen Speicher synchronisieren")
+    parser.add_argument("--once", action="store_true", help="nur einmal synchronisieren")
+    parser.add_argument("--interval", type=float, default=SYNC_INTERVAL)
+    parser.add_argument("--jitter", type=float, default=SYNC_JITTER)
+    parser.add_argument("--backoff-max", type=float, default=SYNC_BACKOFF_MAX)
+    parser.add_argument("--no-triage", action="store_true", help="neue Nachrichten nicht klassifizieren")
+    args = parser.parse_args(argv)
+
+    def job():
+        fetched, total = sync_inbox()
+        classified = triage_pending() if TRIAGE_ENABLED and not args.no_triage else 0
+        return f"{fetched} neue von {total} Nachrichten, {classified} klassifiziert ({store.path})"
+
+    scheduler = SyncScheduler("inbox", job, args.interval, args.jitter, args.backoff_max, gmail_limiter)
+    if args.once:
+        return 0 if scheduler.run_once() else 1
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
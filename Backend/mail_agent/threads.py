@@ -0,0 +1,65 @@
+"""
+Fasst E-Mails desselben Gesprächs (threadId) zu einem Eintrag zusammen,
+bevor sie an das Modell gehen. Lange Antwortketten landen so nur einmal im
+Prompt; Promptgröße und Ranking-Dauer wachsen mit den Gesprächen statt mit
+den einzelnen Nachrichten.
+"""
+import os
+from email.utils import getaddresses
+
+MAIL_COLLAPSE_THREADS = os.getenv("MAIL_COLLAPSE_THREADS", "True").lower() in ("true", "1", "t")
+
+
+def _participants(mails):
+    seen = {}
+    for mail in mails:
+        for field in ("absender", "empfaenger", "cc"):
+            for name, address in getaddresses([mail.get(field, "")]):
+                if address and address.lower() not in seen:
+                    seen[address.lower()] = f"{name} <{address}>" if name else address
+    return list(seen.values())
+
+
+def collapse_threads(email_list):
+    """
+    Ein Eintrag pro Thread, in der Reihenfolge der jeweils neuesten Nachricht.
+    "id" ist die neueste Nachricht des Threads (Ziel für Antworten),
+    "nachrichten_ids" enthält alle Nachrichten (Ziel fürs Archivieren).
+    Ohne threadId bleibt eine Nachricht ein eigener Eintrag.
+    """
+    if not MAIL_COLLAPSE_THREADS:
+        return email_list
+    groups = {}
+    for index, mail in enumerate(email_list):
+        groups.setdefault(mail.get("threadId") or mail.get("id"), []).append((index, mail))
+
+    threads = []
+    for thread_id, members in groups.items():
+        # Gmail liefert die neueste Nachricht zuerst; bei gleicher Minute entscheidet die Reihenfolge
+        _, latest = max(members, key=lambda item: (item[1].get("datum", ""), item[1].get("uhrzeit", ""), -item[0]))
+        mails = [mail for _, mail in members]
+        threads.append({
+            "id": latest.get("id", ""),
+            "threadId": thread_id,
+            "labelIds": sorted({label for mail in mails for label in mail.get("labelIds", [])}),
+            "uhrzeit": latest.get("uhrzeit", ""),
+            "datum": latest.get("datum", ""),
+            "betreff": latest.get("betreff", ""),
+            "absender": latest.get("absender", ""),
+            "empfaenger": latest.get("empfaenger", ""),
+            "teilnehmer": _participants(mails),
+            "anzahl_nachrichten": len(mails),
+            "anhang_vorhanden": any(mail.get("anhang_vorhanden") for mail in mails),
+            "inhalt": latest.get("inhalt", ""),
+            "nachrichten_ids": [mail.get("id", "") for mail in mails],
+        })
+    threads.sort(key=lambda thread: (thread["datum"], thread["uhrzeit"]), reverse=True)
+    return threads
+
+
+def thread_message_ids(threads, message_id):
+    """Alle Nachrichten-IDs des Threads, zu dem message_id gehört"""
+    for thread in threads:
+        if message_id == thread.get("id") or message_id in thread.get("nachrichten_ids", []):
+            return thread.get("nachrichten_ids") or [message_id]
+    return [message_id]
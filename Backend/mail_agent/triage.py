@@ -0,0 +1,200 @@
+"""
+Vorab-Triage neuer E-Mails.
+
+Der Sync-Dienst (sync.py) klassifiziert jede neue Nachricht genau einmal und
+legt die Labels im lokalen Speicher ab: Kategorie, Priorität, Antwort nötig,
+Kurzfassung und Wichtigkeit des Absenders. Mehrere E-Mails gehen dabei in
+einen Modellaufruf.
+
+Einfache Anfragen ("Welche Mails sind wichtig?", "Was muss ich noch
+beantworten?", "Zeig mir Rechnungen") beantwortet run_mail_assistant dann
+lokal aus den Labels; nur freie Fragen und Aktionen gehen an das Modell.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+from gmail_reader import store
+from ai_module import get_client
+from telemetry import span, inc
+
+TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "True").lower() in ("true", "1", "t")
+# Klassifizieren ist eine einfache Aufgabe: ein kleines Modell genügt
+TRIAGE_MODEL = os.getenv("TRIAGE_MODEL", "gpt-4o-mini")
+TRIAGE_BATCH_SIZE = int(os.getenv("TRIAGE_BATCH_SIZE", "20"))
+# Maximale Länge des Mailinhalts im Triage-Prompt
+TRIAGE_MAX_CHARS = int(os.getenv("TRIAGE_MAX_CHARS", "500"))
+
+KATEGORIEN = ("arbeit", "privat", "rechnung", "termin", "newsletter", "werbung", "benachrichtigung", "sonstiges")
+STUFEN = {"hoch": 0, "mittel": 1, "niedrig": 2}
+
+# Filterbegriffe, die sich lokal aus den Labels beantworten lassen
+PRIORITAET_MUSTER = re.compile(r"\b(wichtig\w*|dringend\w*|priorit\w*|important|urgent)\b", re.IGNORECASE)
+ANTWORT_MUSTER = re.compile(
+    r"\b(unbeantwortet\w*|beantworten|antworten (muss|sollte)|antwort\w* (nötig|offen|fehlt)|needs? (a )?reply|unanswered|to answer)\b",
+    re.IGNORECASE
+)
+KATEGORIE_MUSTER = {
+    "rechnung": re.compile(r"\b(rechnung\w*|zahlung\w*|invoice\w*|payment\w*)\b", re.IGNORECASE),
+    "termin": re.compile(r"\b(termin\w*|meeting\w*|einladung\w*|invitation\w*)\b", re.IGNORECASE),
+    "newsletter": re.compile(r"\bnewsletter\w*\b", re.IGNORECASE),
+    "werbung": re.compile(r"\b(werbung|angebot\w*|promo\w*|advert\w*)\b", re.IGNORECASE),
+    "benachrichtigung": re.compile(r"\b(benachrichtigung\w*|notification\w*)\b", re.IGNORECASE),
+    "arbeit": re.compile(r"\b(arbeit|beruf\w*|work)\b", re.IGNORECASE),
+    "privat": re.compile(r"\b(privat\w*|personal)\b", re.IGNORECASE),
+}
+# Aktionen (antworten, archivieren, ...) und Inhaltsfragen brauchen weiterhin das Modell
+AKTION_MUSTER = re.compile(
+    r"\b((be)?antworte|schreib\w*|archivier\w*|lösch\w*|sende\w*|schick\w*|worum|warum|wer|was (steht|schreibt|will)|"
+    r"reply to|archive|delete|send|write|why|who|what does)\b",
+    re.IGNORECASE
+)
+# Lokale Antworten nur für kurze Filteranfragen
+LOKAL_MAX_WOERTER = 12
+
+
+@lru_cache(maxsize=None)
+def triage_model():
+    """Antwortmodell der Triage, erst beim ersten Aufruf gebaut"""
+    from pydantic import BaseModel
+    from typing import List, Literal
+
+    class EmailLabel(BaseModel):
+        id: str
+        kategorie: Literal[KATEGORIEN]
+        prioritaet: Literal["hoch", "mittel", "niedrig"]
+        antwort_noetig: bool
+        zusammenfassung: str
+        absender_wichtigkeit: Literal["hoch", "mittel", "niedrig"]
+
+    class TriageResponse(BaseModel):
+        labels: List[EmailLabel]
+
+    return TriageResponse
+
+
+def classify_batch(emails):
+    """Labels für mehrere E-Mails in einem Modellaufruf: {id: label}"""
+    compact = [
+        {
+            "id": mail.get("id", ""),
+            "betreff": mail.get("betreff", ""),
+            "absender": mail.get("absender", ""),
+            "empfaenger": mail.get("empfaenger", ""),
+            "anhang_vorhanden": mail.get("anhang_vorhanden", False),
+            "inhalt": mail.get("inhalt", "")[:TRIAGE_MAX_CHARS],
+        }
+        for mail in emails
+    ]
+    prompt = f"""Klassifiziere jede der folgenden E-Mails. Gib für jede ID genau ein Label zurück:
+- kategorie: eine von {", ".join(KATEGORIEN)}
+- prioritaet: hoch, mittel oder niedrig
+- antwort_noetig: ob der Empfänger antworten sollte
+- zusammenfassung: ein Satz
+- absender_wichtigkeit: hoch (Person, die direkt schreibt), mittel oder niedrig (automatisiert, Werbung)
+
+E-Mails:
+{json.dumps(compact, ensure_ascii=False)}"""
+
+    with span("openai.chat.completions", purpose="triage", emails=len(emails)):
+        response = get_client().beta.chat.completions.parse(
+            model=TRIAGE_MODEL,
+            messages=[
+                {"role": "system", "content": "Du bist ein E-Mail-Triage-Assistent. Du klassifizierst E-Mails knapp und einheitlich."},
+                {"role": "user", "content": prompt}
+            ],
+            response_format=triage_model(),
+        )
+    ids = {mail["id"] for mail in compact}
+    return {
+        label.id: label.model_dump(exclude={"id"})
+        for label in response.choices[0].message.parsed.labels
+        if label.id in ids
+    }
+
+
+def load_labels():
+    return {item["id"]: item["label"] for item in store.load("labels", max_age=float("inf")) or []}
+
+
+def save_labels(labels):
+    store.replace("labels", [
+        {"id": message_id, "data": {"id": message_id, "label": label}}
+        for message_id, label in labels.items()
+    ])
+
+
+def triage_pending():
+    """
+    Alle noch nicht klassifizierten Nachrichten des Posteingangs im lokalen
+    Speicher klassifizieren. Labels archivierter Nachrichten fallen heraus.
+    :return: Anzahl neu klassifizierter Nachrichten
+    """
+    inbox = store.load("inbox", max_age=float("inf")) or []
+    inbox_ids = {mail["id"] for mail in inbox}
+    labels = {message_id: label for message_id, label in load_labels().items() if message_id in inbox_ids}
+    pending = [mail for mail in inbox if mail["id"] not in labels]
+
+    classified = 0
+    for start in range(0, len(pending), TRIAGE_BATCH_SIZE):
+        batch = pending[start:start + TRIAGE_BATCH_SIZE]
+        result = classify_batch(batch)
+        labels.update(result)
+        classified += len(result)
+        inc("triage_emails_total", amount=len(result))
+        # Nach jedem Batch speichern: ein späterer Fehler verwirft nicht die bisherige Arbeit
+        save_labels(labels)
+    if not pending:
+        save_labels(labels)
+    return classified
+
+
+def answer_from_labels(message, threads):
+    """
+    Beantwortet kurze Filteranfragen (Priorität, Antwort nötig, Kategorie)
+    lokal aus den Triage-Labels. Gibt None zurück, wenn die Anfrage frei
+    formuliert ist, eine Aktion verlangt oder nicht alle Threads Labels haben.
+    Das Ergebnis hat dasselbe Format wie process_emails.
+    """
+    if not TRIAGE_ENABLED or not threads:
+        return None
+    if len(message.split()) > LOKAL_MAX_WOERTER or AKTION_MUSTER.search(message):
+        return None
+    kategorien = {kategorie for kategorie, muster in KATEGORIE_MUSTER.items() if muster.search(message)}
+    nur_wichtige = bool(PRIORITAET_MUSTER.search(message))
+    nur_antwort = bool(ANTWORT_MUSTER.search(message))
+    if not (kategorien or nur_wichtige or nur_antwort):
+        return None
+
+    labels = load_labels()
+    # Label der neuesten Nachricht beschreibt den aktuellen Stand des Gesprächs
+    if any(thread["id"] not in labels for thread in threads):
+        inc("triage_local_answers_total", result="unlabeled")
+        return None
+
+    treffer = []
+    for thread in threads:
+        label = labels[thread["id"]]
+        if kategorien and label.get("kategorie") not in kategorien:
+            continue
+        if nur_wichtige and label.get("prioritaet") != "hoch":
+            continue
+        if nur_antwort and not label.get("antwort_noetig"):
+            continue
+        treffer.append((thread, label))
+    # Stabile Sortierung: innerhalb gleicher Stufen bleibt die neueste Mail vorn
+    treffer.sort(key=lambda item: (STUFEN.get(item[1].get("prioritaet"), 1),
+                                   STUFEN.get(item[1].get("absender_wichtigkeit"), 1)))
+    inc("triage_local_answers_total", result="answered")
+    return {
+        "relevante_emails": [
+            {"id": thread["id"], "betreff": thread.get("betreff", ""), "absender": thread.get("absender", "")}
+            for thread, _ in treffer[:10]
+        ],
+        "archive_id": None,
+        "reply_text": None,
+        "original_id": None,
+        "to": None,
+        "subject": None
+    }
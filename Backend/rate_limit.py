@@ -0,0 +1,195 @@
+"""
+Ratenbegrenzung und Wiederholungen für Google-API-Aufrufe:
+Token-Bucket nach Quota-Kosten pro Methode, exponentielles Backoff mit Jitter
+und ein AIMD-Limit für gleichzeitige Aufrufe.
+
+Einzige Kopie für alle Python-Dienste (mail_agent, calendar_agent und
+task-planner-ai-flow). Das Modul liest keine Konfiguration: Quota, Wiederholungen
+und die Zählfunktion für Metriken gibt jeder Dienst beim Erzeugen seines
+Limiters mit, die Agenten z.B. über retry_settings_from_env().
+"""
+import json
+import os
+import random
+import threading
+import time
+
+# Quota units per method; methods not listed cost default_cost
+QUOTA_COSTS = {
+    "gmail.users.messages.list": 5,
+    "gmail.users.messages.get": 5,
+    "gmail.users.messages.send": 100,
+    "gmail.users.messages.modify": 5,
+    "gmail.users.messages.batchModify": 50,
+    "gmail.users.threads.list": 10,
+    "gmail.users.threads.get": 10,
+    "gmail.users.history.list": 2,
+    "calendar.freebusy.query": 1,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+# Nicht idempotente Methoden: nach einem 5xx kann der Aufruf trotzdem ausgeführt
+# worden sein (Mail verschickt, Termin angelegt). Wiederholt werden dann nur
+# 429 und Rate-Limit-403, die Google sicher abgelehnt hat.
+NON_IDEMPOTENT_SUFFIXES = (".insert", ".send", ".import", ".quickAdd")
+
+
+def is_idempotent(method):
+    return not (method or "").endswith(NON_IDEMPOTENT_SUFFIXES)
+
+
+def retry_settings_from_env():
+    """Nebenläufigkeit und Backoff aus GOOGLE_*-Variablen, als Argumente für GoogleRateLimiter"""
+    return {
+        "max_concurrency": int(os.getenv("GOOGLE_MAX_CONCURRENCY", "8")),
+        "max_retries": int(os.getenv("GOOGLE_MAX_RETRIES", "5")),
+        "backoff_base": float(os.getenv("GOOGLE_BACKOFF_BASE", "0.5")),
+        "backoff_max": float(os.getenv("GOOGLE_BACKOFF_MAX", "32")),
+    }
+
+
+def error_status(error):
+    resp = getattr(error, "resp", None)
+    status = getattr(resp, "status", None)
+    return int(status) if status is not None else None
+
+
+def error_reasons(error):
+    """Reasons from a Google error body ({"error": {"errors": [{"reason": ...}]}})"""
+    try:
+        data = json.loads(getattr(error, "content", b"") or b"{}")
+        return {item.get("reason", "") for item in data.get("error", {}).get("errors", [])}
+    except (ValueError, AttributeError):
+        return set()
+
+
+def is_rate_limited(error):
+    status = error_status(error)
+    return status == 429 or (status == 403 and bool(error_reasons(error) & RATE_LIMIT_REASONS))
+
+
+class TokenBucket:
+    """Paces calls to `rate` quota units per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost):
+        cost = min(cost, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = (cost - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AIMDLimit:
+    """
+    Concurrency limit that grows by one per window of successful calls and
+    halves when a call is throttled (additive increase, multiplicative decrease)
+    """
+
+    def __init__(self, max_limit, min_limit = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        # Throttled calls so far; callers compare it before and after a run
+        self.throttled = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(self.min_limit, self.limit / 2)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class GoogleRateLimiter:
+    """
+    Wraps Google API calls: waits for quota, limits concurrency and retries
+    429/403-rate-limit responses, and 5xx responses of idempotent calls, with
+    jittered exponential backoff (honouring Retry-After). Thread-safe; one
+    instance per API.
+    count(name, **labels) records google_retries_total and
+    google_throttled_total in the caller's metrics, if given.
+    """
+
+    def __init__(self, api, units_per_second, burst, max_concurrency,
+                 max_retries, backoff_base, backoff_max, default_cost = 1, count = None):
+        self.api = api
+        self.bucket = TokenBucket(units_per_second, burst)
+        self.concurrency = AIMDLimit(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.default_cost = default_cost
+        self.count = count or (lambda name, **labels: None)
+
+    def retry_delay(self, error, attempt, idempotent = True):
+        """Seconds to wait before the next attempt, or None if the error is final"""
+        if attempt >= self.max_retries:
+            return None
+        if not is_rate_limited(error) and not (idempotent and error_status(error) in RETRY_STATUSES):
+            return None
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        # httplib2 responses are dicts of lower-cased headers
+        resp = getattr(error, "resp", None)
+        retry_after = resp.get("retry-after") if isinstance(resp, dict) else None
+        if retry_after and str(retry_after).isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def call(self, func, method_id = None, cost = None, idempotent = None):
+        """
+        Run func() under the limiter; cost defaults to the method's quota units,
+        idempotent to what the method name says (see NON_IDEMPOTENT_SUFFIXES)
+        """
+        method = method_id or "unknown"
+        cost = cost if cost is not None else QUOTA_COSTS.get(method, self.default_cost)
+        idempotent = idempotent if idempotent is not None else is_idempotent(method_id)
+        attempt = 0
+        while True:
+            self.bucket.acquire(cost)
+            self.concurrency.acquire()
+            try:
+                result = func()
+            except Exception as error:
+                throttled = is_rate_limited(error)
+                self.concurrency.release(throttled)
+                if throttled:
+                    self.count("google_throttled_total", api=self.api, method=method)
+                delay = self.retry_delay(error, attempt, idempotent)
+                if delay is None:
+                    raise
+                self.count("google_retries_total", api=self.api, method=method)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.concurrency.release(False)
+            return result
+
+    def execute(self, request, **kwargs):
+        """Execute a googleapiclient HttpRequest under the limiter"""
+        return self.call(lambda: request.execute(**kwargs), getattr(request, "methodId", None))
+
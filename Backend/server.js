@@ -1,6 +1,7 @@
 const express = require("express");
 const cors = require("cors");
-const { exec } = require("child_process");
+const { exec, spawn } = require("child_process");
+const { randomUUID } = require("crypto");
 
 const app = express();
 const PORT = 8000;
@@ -8,6 +9,107 @@ const PORT = 8000;
 app.use(cors());
 app.use(express.json());
 
+// === TRACING ===
+// Jede Anfrage bekommt eine Trace-ID (oder übernimmt X-Trace-Id vom Aufrufer).
+// Die Python-Agenten erhalten sie als TRACE_ID und schreiben sie in ihre JSON-Logs.
+app.use((req, res, next) => {
+  req.traceId = req.get("x-trace-id") || randomUUID().replace(/-/g, "").slice(0, 16);
+  res.set("X-Trace-Id", req.traceId);
+  const started = process.hrtime.bigint();
+  res.on("finish", () => {
+    console.log(JSON.stringify({
+      trace_id: req.traceId,
+      method: req.method,
+      path: req.path,
+      status: res.statusCode,
+      duration_ms: Number(process.hrtime.bigint() - started) / 1e6
+    }));
+  });
+  next();
+});
+
+// Umgebung für einen Agent-Prozess, inklusive Trace-ID
+function agentOptions(req) {
+  return { env: { ...process.env, TRACE_ID: req.traceId } };
+}
+
+// === REQUEST COALESCING ===
+// Gleichzeitige identische Anfragen (Route + normalisierte Nutzdaten) teilen sich
+// einen Agent-Prozess (single flight). Erfolgreiche Ergebnisse werden kurz
+// zwischengespeichert, damit schnelle Wiederholungen (Retries, React-Doppel-Render)
+// keinen neuen Prozess und keine weiteren API-Aufrufe auslösen.
+const AGENT_CACHE_TTL_MS = parseInt(process.env.AGENT_CACHE_TTL_MS || "5000", 10);
+const AGENT_CACHE_MAX_ENTRIES = parseInt(process.env.AGENT_CACHE_MAX_ENTRIES || "200", 10);
+const inFlight = new Map();
+const resultCache = new Map();
+const agentStats = { spawned: 0, coalesced: 0, cached: 0 };
+
+// Der Client schickt seine Uhrzeit auf die Millisekunde genau mit; im Schlüssel zählt
+// nur die Minute, sonst würde keine Anfrage je zusammengelegt oder aus dem Cache bedient.
+// Der Agent bekommt weiterhin die exakte Zeit.
+function minuteOf(value) {
+  const date = new Date(value);
+  if (Number.isNaN(date.getTime())) return value;
+  date.setUTCSeconds(0, 0);
+  return date.toISOString();
+}
+
+function normalizePayload(payload) {
+  return Object.keys(payload)
+    .sort()
+    .map((key) => {
+      const value = key === "time" && payload[key] ? minuteOf(payload[key]) : payload[key];
+      return `${key}=${String(value ?? "").trim().replace(/\s+/g, " ").toLowerCase()}`;
+    })
+    .join("&");
+}
+
+// Nur fehlerfreie JSON-Antworten werden zwischengespeichert
+function isCacheable(result) {
+  if (result.err) return false;
+  try {
+    return !JSON.parse(result.stdout).error;
+  } catch {
+    return false;
+  }
+}
+
+function execAgent(route, payload, cmd, req, callback) {
+  const key = `${route}?${normalizePayload(payload)}`;
+
+  const cached = resultCache.get(key);
+  if (cached && cached.expires > Date.now()) {
+    agentStats.cached++;
+    console.log(JSON.stringify({ trace_id: req.traceId, agent_cache: "hit", route }));
+    return callback(null, cached.stdout, cached.stderr);
+  }
+  resultCache.delete(key);
+
+  let pending = inFlight.get(key);
+  if (pending) {
+    agentStats.coalesced++;
+    console.log(JSON.stringify({ trace_id: req.traceId, agent_cache: "coalesced", route }));
+  } else {
+    agentStats.spawned++;
+    pending = new Promise((resolve) => {
+      exec(cmd, agentOptions(req), (err, stdout, stderr) => resolve({ err, stdout, stderr }));
+    }).then((result) => {
+      inFlight.delete(key);
+      if (AGENT_CACHE_TTL_MS > 0 && isCacheable(result)) {
+        resultCache.set(key, { stdout: result.stdout, stderr: result.stderr, expires: Date.now() + AGENT_CACHE_TTL_MS });
+        // Map behält die Einfügereihenfolge: älteste Einträge zuerst entfernen
+        while (resultCache.size > AGENT_CACHE_MAX_ENTRIES) {
+          resultCache.delete(resultCache.keys().next().value);
+        }
+      }
+      return result;
+    });
+    inFlight.set(key, pending);
+  }
+
+  pending.then(({ err, stdout, stderr }) => callback(err, stdout, stderr));
+}
+
 // === ROOT ROUTE ===
 app.get("/", (req, res) => {
   res.json({
@@ -15,11 +117,17 @@ app.get("/", (req, res) => {
     endpoints: {
       "POST /get_mail": "Mail Agent",
       "POST /get_calendar": "Kalender Agent", 
-      "POST /web_search": "WebSearch Agent"
+      "POST /web_search": "WebSearch Agent",
+      "POST /route": "Lokaler Intent-Router (Agent + Argumente, sonst fallback an das LLM)",
+      "GET /agent_stats": "Prozess-Starts, zusammengelegte und gecachte Anfragen"
     }
   });
 });
 
+app.get("/agent_stats", (req, res) => {
+  res.json({ ...agentStats, in_flight: inFlight.size, cached_results: resultCache.size });
+});
+
 // === MAIL AGENT ===
 app.post("/get_mail", (req, res) => {
   const { message, time } = req.body;
@@ -33,7 +141,7 @@ app.post("/get_mail", (req, res) => {
   
   console.log("🐍 Ausgeführter Befehl:", cmd);
 
-  exec(cmd, (err, stdout, stderr) => {
+  execAgent("/get_mail", { message, time }, cmd, req, (err, stdout, stderr) => {
     if (err) {
       console.error("❌ Fehler beim Mail-Agent:", stderr || stdout);
       return res.status(500).json({ error: stderr || stdout });
@@ -94,7 +202,7 @@ app.post("/get_calendar", (req, res) => {
   // Pfad in Anführungszeichen setzen
   const cmd = `${pythonCmd} "${path.join(__dirname, "calendar_agent", "main.py")}" "${message}" "${time}"`;
 
-  exec(cmd, (err, stdout, stderr) => {
+  execAgent("/get_calendar", { message, time }, cmd, req, (err, stdout, stderr) => {
     if (err) {
       console.error("❌ Fehler beim Kalender-Agent:", stderr || stdout);
       return res.status(500).json({ error: stderr || stdout });
@@ -128,7 +236,7 @@ app.post("/web_search", (req, res) => {
   
   console.log("🐍 Ausgeführter Befehl:", cmd);
 
-  exec(cmd, (err, stdout, stderr) => {
+  execAgent("/web_search", { message }, cmd, req, (err, stdout, stderr) => {
     if (err) {
       console.error("❌ Fehler beim WebSearch-Agent:", stderr || stdout);
       return res.status(500).json({ error: stderr || stdout });
@@ -176,6 +284,83 @@ app.post("/web_search", (req, res) => {
   });
 });
 
+// === INTENT ROUTER ===
+// Der Router (intent_router/main.py --serve) läuft als dauerhafter Python-Prozess und
+// spricht JSON-Zeilen über stdin/stdout: Interpreterstart und Training fallen nur einmal
+// an, danach dauert eine Entscheidung Mikrosekunden. Stürzt er ab, startet ihn die
+// nächste Anfrage neu; bis dahin antwortet /route mit fallback und das LLM entscheidet.
+const ROUTER_TIMEOUT_MS = parseInt(process.env.ROUTER_TIMEOUT_MS || "200", 10);
+const ROUTER_FALLBACK = { agent: null, arguments: null, confidence: 0, source: "llm", fallback: true };
+let routerProcess = null;
+let routerBuffer = "";
+let routerSequence = 0;
+const routerPending = new Map();
+
+function startRouter() {
+  const path = require("path");
+  const os = require("os");
+  const pythonCmd = os.platform() === 'win32' ? 'py' : 'python3';
+  const child = spawn(pythonCmd, [path.join(__dirname, "intent_router", "main.py"), "--serve"], {
+    env: { ...process.env, TRACE_ID: "intent-router" }
+  });
+  child.stdout.setEncoding("utf8");
+  child.stdout.on("data", (chunk) => {
+    routerBuffer += chunk;
+    let newline;
+    while ((newline = routerBuffer.indexOf("\n")) >= 0) {
+      const line = routerBuffer.slice(0, newline);
+      routerBuffer = routerBuffer.slice(newline + 1);
+      try {
+        const reply = JSON.parse(line);
+        const pending = routerPending.get(reply.id);
+        if (pending) pending(reply.error ? ROUTER_FALLBACK : reply);
+      } catch {
+        console.error("❌ Ungültige Antwort vom Intent-Router:", line);
+      }
+    }
+  });
+  child.stderr.on("data", (chunk) => process.stderr.write(chunk));
+  // Schreibfehler nach einem Absturz: die offenen Anfragen beantwortet stop()
+  child.stdin.on("error", () => {});
+  const stop = () => {
+    if (routerProcess === child) routerProcess = null;
+    routerBuffer = "";
+    for (const pending of routerPending.values()) pending(ROUTER_FALLBACK);
+  };
+  child.on("exit", stop);
+  child.on("error", (err) => {
+    console.error("❌ Intent-Router nicht startbar:", err.message);
+    stop();
+  });
+  return child;
+}
+
+function routeMessage(message, history) {
+  if (!routerProcess) routerProcess = startRouter();
+  const id = ++routerSequence;
+  return new Promise((resolve) => {
+    const timer = setTimeout(() => finish(ROUTER_FALLBACK), ROUTER_TIMEOUT_MS);
+    function finish(result) {
+      clearTimeout(timer);
+      routerPending.delete(id);
+      resolve(result);
+    }
+    routerPending.set(id, finish);
+    routerProcess.stdin.write(JSON.stringify({ id, message, history }) + "\n");
+  });
+}
+
+app.post("/route", async (req, res) => {
+  // history: Zahl früherer Nutzernachrichten; Folgefragen entscheidet dann meist das LLM
+  const { message, history = 0 } = req.body;
+  if (typeof message !== "string") {
+    return res.status(400).json({ error: "message fehlt" });
+  }
+  const { id, ...result } = await routeMessage(message, Number(history) || 0);
+  console.log(JSON.stringify({ trace_id: req.traceId, route: result.agent || "llm", source: result.source, confidence: result.confidence }));
+  res.json(result);
+});
+
 // === SERVER START ===
 app.listen(PORT, () => {
   console.log(`✅ Backend läuft auf http://localhost:${PORT}`);
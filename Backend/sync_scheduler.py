@@ -0,0 +1,61 @@
+"""
+Periodische Ausführung der Sync-Dienste (mail_agent/sync.py, calendar_agent/sync.py).
+
+Nach einem fehlgeschlagenen Lauf oder einem Lauf, in dem Google Aufrufe
+gedrosselt hat (429/Rate-Limit-403, auch wenn der Limiter sie erfolgreich
+wiederholt hat), verdoppelt sich die Pause bis backoff_max. Der nächste
+saubere Lauf kehrt sofort zum normalen Intervall zurück.
+"""
+import random
+import sys
+import threading
+
+from telemetry import span, inc
+
+
+class SyncScheduler:
+    """Führt job() periodisch aus; limiter ist der GoogleRateLimiter des Jobs"""
+
+    def __init__(self, name, job, interval, jitter, backoff_max, limiter=None):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff_max = backoff_max
+        self.limiter = limiter
+        self.failures = 0
+        # Ob im letzten Lauf Aufrufe gedrosselt wurden
+        self.throttled = False
+
+    def throttled_calls(self):
+        return self.limiter.concurrency.throttled if self.limiter is not None else 0
+
+    def next_delay(self, ok):
+        if ok and not self.throttled:
+            self.failures = 0
+            delay = self.interval
+        else:
+            self.failures += 1
+            delay = min(self.backoff_max, self.interval * 2 ** self.failures)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_once(self):
+        before = self.throttled_calls()
+        try:
+            with span("sync." + self.name):
+                result = self.job()
+        except Exception as error:
+            inc("sync_errors_total", job=self.name)
+            print(f"{self.name}: Sync fehlgeschlagen: {error}", file=sys.stderr, flush=True)
+            return False
+        finally:
+            self.throttled = self.throttled_calls() > before
+        inc("sync_runs_total", job=self.name)
+        print(f"{self.name}: {result}", flush=True)
+        return True
+
+    def run_forever(self, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            ok = self.run_once()
+            stop.wait(self.next_delay(ok))
@@ -0,0 +1,141 @@
+"""
+Tracing und Metriken für die Python-Agenten (mail_agent, web_search,
+intent_router und calendar_agent, das dieses Modul mitnutzt).
+
+Spans um externe Aufrufe (Gmail, OpenAI, SerpAPI, Datei-I/O) werden als
+JSON-Zeilen nach stderr geschrieben (stdout bleibt für das Ergebnis an
+server.js frei). Beim Beenden folgt eine Zeile mit Zählern und Histogrammen.
+Die Trace-ID kommt von server.js über die Umgebungsvariable TRACE_ID.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "True").lower() in ("true", "1", "t")
+# Optional: Datei statt stderr
+TELEMETRY_LOG_PATH = os.getenv("TELEMETRY_LOG_PATH")
+
+TRACE_ID = os.getenv("TRACE_ID") or uuid.uuid4().hex[:16]
+AGENT = os.path.basename(os.path.dirname(os.path.abspath(sys.argv[0]))) if sys.argv and sys.argv[0] else "python"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_span_id = contextvars.ContextVar("span_id", default=None)
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _write(record):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        if TELEMETRY_LOG_PATH:
+            with open(TELEMETRY_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        else:
+            print(line, file=sys.stderr, flush=True)
+
+
+def _key(name, labels):
+    return name + "".join(f"|{k}={labels[k]}" for k in sorted(labels))
+
+
+def inc(name, amount=1, **labels):
+    """Zähler erhöhen"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    """Wert in ein Histogramm eintragen (Bucket-Zählung, Summe, Anzahl)"""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.setdefault(key, {"buckets": dict.fromkeys(buckets, 0), "inf": 0, "sum": 0.0, "count": 0})
+        for bound in buckets:
+            if value <= bound:
+                hist["buckets"][bound] += 1
+                break
+        else:
+            hist["inf"] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+@contextmanager
+def span(name, **attributes):
+    """Block als Span der aktuellen Trace messen"""
+    if not TELEMETRY_ENABLED:
+        yield
+        return
+    parent_id = _span_id.get()
+    span_id = uuid.uuid4().hex[:16]
+    token = _span_id.set(span_id)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        inc("span_errors_total", span=name)
+        raise
+    finally:
+        _span_id.reset(token)
+        elapsed = time.perf_counter() - started
+        observe("span_duration_seconds", elapsed, span=name)
+        _write({
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "agent": AGENT,
+            "trace_id": TRACE_ID,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "span": name,
+            "duration_ms": round(elapsed * 1000, 2),
+            "status": status,
+            **attributes
+        })
+
+
+def traced(name):
+    """Decorator-Variante von span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def flush_metrics():
+    """Zähler und Histogramme als eine JSON-Zeile ausgeben"""
+    if not TELEMETRY_ENABLED or not (_counters or _histograms):
+        return
+    with _lock:
+        histograms = {
+            key: {
+                "buckets": {str(bound): count for bound, count in hist["buckets"].items()},
+                "+Inf": hist["inf"],
+                "sum": round(hist["sum"], 6),
+                "count": hist["count"]
+            }
+            for key, hist in _histograms.items()
+        }
+        counters = dict(_counters)
+    _write({
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "agent": AGENT,
+        "trace_id": TRACE_ID,
+        "metrics": {"counters": counters, "histograms": histograms}
+    })
+
+
+atexit.register(flush_metrics)
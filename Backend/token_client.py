@@ -0,0 +1,67 @@
+"""
+Client für den lokalen Token-Broker (token_broker/broker.py). Läuft er nicht,
+nutzen die Agenten wie bisher ihre token.json.
+
+Einzige Kopie für alle Python-Dienste; der Planner übergibt Socket und Konto
+aus seiner Konfiguration, die Agenten lesen TOKEN_BROKER_SOCKET beim Aufruf.
+"""
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+DEFAULT_SOCKET = "/tmp/abbesynapse-token-broker.sock"
+
+# Vom Broker erhaltene Tokens werden bis kurz vor Ablauf wiederverwendet
+REUSE_MARGIN = timedelta(seconds=60)
+
+_lock = threading.Lock()
+# Credentials je Konto
+_cached = {}
+
+
+def fetch_token(account, timeout=0.5, socket_path=None):
+    """Access-Token beim Broker anfragen; None, wenn er nicht läuft oder scheitert"""
+    # Erst beim Aufruf lesen, damit auch eine später geladene .env greift
+    path = socket_path if socket_path is not None else os.getenv("TOKEN_BROKER_SOCKET", DEFAULT_SOCKET)
+    if not path or not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(timeout)
+            connection.connect(path)
+            connection.sendall(json.dumps({"account": account}).encode("utf-8") + b"\n")
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = connection.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        reply = json.loads(data)
+    except (OSError, ValueError):
+        return None
+    return reply if reply.get("token") else None
+
+
+def reusable(creds):
+    """Ob ein Broker-Token noch mindestens REUSE_MARGIN gültig ist"""
+    return bool(creds.expiry) and creds.expiry - REUSE_MARGIN > datetime.utcnow()
+
+
+def broker_credentials(account, socket_path=None):
+    """
+    Credentials nur mit Access-Token vom Broker. Ohne Refresh-Token: das
+    Erneuern übernimmt der Broker, nie der Request-Pfad.
+    """
+    with _lock:
+        cached = _cached.get(account)
+        if cached is not None and reusable(cached):
+            return cached
+        reply = fetch_token(account, socket_path=socket_path)
+        if reply is None:
+            return None
+        from google.oauth2.credentials import Credentials
+        expiry = datetime.fromisoformat(reply["expiry"]) if reply.get("expiry") else None
+        _cached[account] = Credentials(token=reply["token"], expiry=expiry, scopes=reply.get("scopes") or None)
+        return _cached[account]
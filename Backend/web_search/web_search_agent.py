@@ -1,17 +1,43 @@
 import os
+import sys
 import json
 from dotenv import load_dotenv
-from openai import OpenAI
-from serpapi import GoogleSearch
 from datetime import datetime
+from functools import lru_cache
+
+# Gemeinsames Telemetrie-Modul liegt in Backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import span
 
 # Lade Umgebungsvariablen
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 serpapi_api_key = os.getenv("SERPAPI_API_KEY")
+# Alternative SerpAPI-Adresse, z.B. der lokale Stand-in (standin/server.py)
+serpapi_endpoint = os.getenv("SERPAPI_ENDPOINT")
+
+
+# openai und serpapi werden erst bei der ersten Suche geladen, nicht beim Prozessstart
+@lru_cache(maxsize=None)
+def get_client():
+    """OpenAI-Client, beim ersten Aufruf erzeugt"""
+    from openai import OpenAI
+    return OpenAI(api_key=openai_api_key)
+
 
-# OpenAI-Client
-client = OpenAI(api_key=openai_api_key)
+@lru_cache(maxsize=None)
+def get_search_class():
+    from serpapi import GoogleSearch
+    if serpapi_endpoint:
+        GoogleSearch.BACKEND = serpapi_endpoint.rstrip("/")
+    return GoogleSearch
+
+
+def __getattr__(name):
+    # Kompatibilität: web_search_agent.client liefert weiterhin den Client
+    if name == "client":
+        return get_client()
+    raise AttributeError(name)
 
 def write_to_log(prompt, summary, results):
     log_entry = {
@@ -20,7 +46,7 @@ def write_to_log(prompt, summary, results):
         "ai_summary": summary,
         "num_results": len(results)
     }
-    log_path = os.path.join(os.path.dirname(__file__), "log.json")
+    log_path = os.getenv("WEB_SEARCH_LOG_PATH") or os.path.join(os.path.dirname(__file__), "log.json")
     if os.path.exists(log_path):
         with open(log_path, "r", encoding="utf-8") as f:
             try:
@@ -41,8 +67,9 @@ def create_web_search_agent(prompt: str):
         "gl": "de",
         "hl": "de"
     }
-    search = GoogleSearch(search_params)
-    results = search.get_dict()
+    search = get_search_class()(search_params)
+    with span("serpapi.search"):
+        results = search.get_dict()
     organic_results = results.get("organic_results", [])
 
     if not organic_results:
@@ -55,13 +82,14 @@ def create_web_search_agent(prompt: str):
     context_for_ai = "\n\n".join(
         [f"Titel: {r.get('title')}\nSnippet: {r.get('snippet')}" for r in organic_results[:10]]
     )
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "Du bist ein Experte für Webinhalte."},
-            {"role": "user", "content": f"Fasse zusammen: {context_for_ai}"}
-        ]
-    )
+    with span("openai.chat.completions", purpose="summary"):
+        response = get_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "Du bist ein Experte für Webinhalte."},
+                {"role": "user", "content": f"Fasse zusammen: {context_for_ai}"}
+            ]
+        )
     ai_summary = response.choices[0].message.content
 
     output_data = {
@@ -79,6 +107,7 @@ def create_web_search_agent(prompt: str):
         ]
     }
 
-    write_to_log(prompt, ai_summary, organic_results)
+    with span("file.log_write"):
+        write_to_log(prompt, ai_summary, organic_results)
 
     return output_data
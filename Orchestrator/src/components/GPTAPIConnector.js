@@ -60,11 +60,121 @@ const useGPTAPIConnector = () => {
     },
   ];
 
+  // Agent im Backend aufrufen (nach lokalem Routing oder Function-Call des LLM)
+  const callAgent = async (name, freeText) => {
+    switch (name) {
+      case "getCalendar":
+        console.log("📅 Funktion 'getCalendar' aufgerufen mit Text:", freeText);
+        try {
+          const res = await fetch("http://localhost:8000/get_calendar", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+              message: freeText,
+              time: new Date().toISOString(),
+            }),
+          });
+          const json = await res.json();
+          return json.response || json.message || "Keine Kalenderantwort erhalten.";
+        } catch (e) {
+          console.error("❌ Fehler beim Kalender-Agent:", e);
+          return "Fehler beim Abrufen der Kalenderdaten.";
+        }
+
+      case "getMail":
+        console.log("📧 Funktion 'getMail' aufgerufen mit Text:", freeText);
+        try {
+          const res = await fetch("http://localhost:8000/get_mail", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+              message: freeText,
+              time: new Date().toISOString(),
+            }),
+          });
+          const json = await res.json();
+          
+          console.log("📧 Mail-Agent Response:", json);
+          
+          // Verwende das neue response-Format vom Backend
+          if (json.response) {
+            return json.response;
+          } else if (json.relevante_emails && json.relevante_emails.length > 0) {
+            // Fallback falls kein response-Field vorhanden
+            const emailList = json.relevante_emails
+              .map((email, index) => 
+                `${index + 1}. **${email.betreff}**\n   Von: ${email.absender}\n   ID: ${email.id}`
+              )
+              .join('\n\n');
+            
+            return `**${json.relevante_emails.length} relevante E-Mails gefunden:**\n\n${emailList}`;
+          } else {
+            return "Keine relevanten E-Mails zu deiner Anfrage gefunden.";
+          }
+        } catch (e) {
+          console.error("❌ Fehler beim Mail-Agent:", e);
+          return "Fehler beim Abrufen der E-Mail-Daten.";
+        }
+
+      case "webSearch":
+        console.log("🔍 Funktion 'webSearch' aufgerufen mit Text:", freeText);
+        try {
+          const res = await fetch("http://localhost:8000/web_search", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ message: freeText }),
+          });
+          const json = await res.json();
+          const summary = json.ai_summary || "Keine Zusammenfassung verfügbar.";
+          const links = (json.search_results || [])
+            .slice(0, 5)
+            .map((r, i) => `${i + 1}. ${r.title} — ${r.link}`)
+            .join("\n\n");
+
+          return `🧠 ${summary}\n\n\n🔗 Relevante Links:\n\n${links}`;
+        } catch (e) {
+          console.error("❌ Fehler beim WebSearch-Agent:", e);
+          return "Fehler bei der Websuche.";
+        }
+
+      default:
+        return "Unbekannte Funktion angefordert.";
+    }
+  };
+
+  // Lokaler Intent-Router im Backend: entscheidet einfache Anfragen ohne LLM-Aufruf.
+  // Bei geringer Sicherheit oder Fehlern kommt fallback zurück, dann entscheidet das LLM.
+  const routeLocally = async (text, history) => {
+    try {
+      const res = await fetch("http://localhost:8000/route", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ message: text, history }),
+      });
+      const json = await res.json();
+      return json.fallback || !json.agent ? null : json;
+    } catch {
+      return null;
+    }
+  };
+
   const fetchAssistantResponse = async (chatHistory) => {
     setLoading(true);
     setError(null);
 
     try {
+      // 0) Eindeutige Anfragen lokal routen und den Agenten direkt aufrufen
+      const lastMessage = chatHistory[chatHistory.length - 1];
+      if (lastMessage?.sender === "user") {
+        // Frühere Nutzernachrichten: ohne Schlüsselwort entscheidet dann das LLM mit Kontext
+        const history = chatHistory.filter((msg) => msg.sender === "user").length - 1;
+        const routed = await routeLocally(lastMessage.text, history);
+        if (routed) {
+          console.log(`🧭 Lokal geroutet (${routed.source}, ${routed.confidence}):`, routed.agent);
+          return await callAgent(routed.agent, routed.arguments?.text || lastMessage.text);
+        }
+      }
+
       // 1) System-Message + komplette History ins OpenAI-Format bringen
       const messagesForApi = [
         {
@@ -101,85 +211,7 @@ const useGPTAPIConnector = () => {
         // Freitext-Argument extrahieren
         const freeText = parsedArgs.text || "";
 
-        // Je nach Funktion Backend aufrufen
-        switch (name) {
-          case "getCalendar":
-            console.log("📅 Funktion 'getCalendar' aufgerufen mit Text:", freeText);
-            try {
-              const res = await fetch("http://localhost:8000/get_calendar", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                  message: freeText,
-                  time: new Date().toISOString(),
-                }),
-              });
-              const json = await res.json();
-              return json.response || json.message || "Keine Kalenderantwort erhalten.";
-            } catch (e) {
-              console.error("❌ Fehler beim Kalender-Agent:", e);
-              return "Fehler beim Abrufen der Kalenderdaten.";
-            }
-
-          case "getMail":
-            console.log("📧 Funktion 'getMail' aufgerufen mit Text:", freeText);
-            try {
-              const res = await fetch("http://localhost:8000/get_mail", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                  message: freeText,
-                  time: new Date().toISOString(),
-                }),
-              });
-              const json = await res.json();
-              
-              console.log("📧 Mail-Agent Response:", json);
-              
-              // Verwende das neue response-Format vom Backend
-              if (json.response) {
-                return json.response;
-              } else if (json.relevante_emails && json.relevante_emails.length > 0) {
-                // Fallback falls kein response-Field vorhanden
-                const emailList = json.relevante_emails
-                  .map((email, index) => 
-                    `${index + 1}. **${email.betreff}**\n   Von: ${email.absender}\n   ID: ${email.id}`
-                  )
-                  .join('\n\n');
-                
-                return `**${json.relevante_emails.length} relevante E-Mails gefunden:**\n\n${emailList}`;
-              } else {
-                return "Keine relevanten E-Mails zu deiner Anfrage gefunden.";
-              }
-            } catch (e) {
-              console.error("❌ Fehler beim Mail-Agent:", e);
-              return "Fehler beim Abrufen der E-Mail-Daten.";
-            }
-
-          case "webSearch":
-            console.log("🔍 Funktion 'webSearch' aufgerufen mit Text:", freeText);
-            try {
-              const res = await fetch("http://localhost:8000/web_search", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ message: freeText }),
-              });
-              const json = await res.json();
-              const summary = json.ai_summary || "Keine Zusammenfassung verfügbar.";
-              const links = (json.search_results || [])
-                .slice(0, 5)
-                .map((r, i) => `${i + 1}. ${r.title} — ${r.link}`)
-                .join("\n\n");
-
-              return `🧠 ${summary}\n\n\n🔗 Relevante Links:\n\n${links}`;
-            } catch (e) {
-              console.error("❌ Fehler beim WebSearch-Agent:", e);
-              return "Fehler bei der Websuche.";
-            }
-
-          default:
-            return "Unbekannte Funktion angefordert.";
-        }
+        return await callAgent(name, freeText);
       } else {
         // 4) Normale Chat-Antwort ohne Function-Call
         const assistantText = message?.content || "Keine Antwort erhalten.";
@@ -0,0 +1,312 @@
+"""
+End-to-end benchmarks for the agent pipelines against the local API stand-in
+
+Drives run_mail_assistant, create_web_search_agent, the calendar agent's
+chat_with_ai and the task planner's /tasks and /chat endpoints. Each scenario
+starts a fresh stand-in (standin/server.py) and runs the pipeline in its own
+process, so peak RSS and module state are per scenario.
+
+Usage (from the repository root):
+    python benchmarks/e2e.py --out bench_results.json
+    python benchmarks/e2e.py --quick --only mail --baseline bench_results.json
+
+Reports p50/p95/p99 latency, throughput, peak RSS and API calls per request.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "standin"))
+
+import server as standin  # noqa: E402
+
+MAIL_QUERIES = [
+    "Welche E-Mails sind heute wichtig?",
+    "Gibt es offene Rechnungen?",
+    "Fasse die Mails zum Projekt zusammen",
+    "Archiviere den Newsletter",
+]
+SEARCH_QUERIES = [
+    "Wetter Berlin morgen",
+    "Python asyncio Tutorial",
+    "Öffnungszeiten Bürgeramt",
+]
+CHAT_QUERIES = [
+    "What do I have today?",
+    "Zeige meine Termine nächste Woche",
+    "Create a task dentist tomorrow at 10:00",
+    "Welche Aufgaben habe ich diese Woche?",
+]
+
+# (name, pipeline, stand-in options, query mix)
+SCENARIOS = [
+    ("mail-50", "mail", {"mailbox_size": 50}, MAIL_QUERIES),
+    ("mail-5k", "mail", {"mailbox_size": 5_000}, MAIL_QUERIES),
+    ("mail-50k", "mail", {"mailbox_size": 50_000}, MAIL_QUERIES),
+    ("web-search-10", "web_search", {"serp_results": 10}, SEARCH_QUERIES),
+    ("web-search-100", "web_search", {"serp_results": 100}, SEARCH_QUERIES),
+    ("calendar-chat-3", "calendar_chat", {"events_per_day": 3}, CHAT_QUERIES),
+    ("calendar-chat-30", "calendar_chat", {"events_per_day": 30}, CHAT_QUERIES),
+    ("api-tasks-3", "api_tasks", {"events_per_day": 3}, None),
+    ("api-tasks-30", "api_tasks", {"events_per_day": 30}, None),
+    ("api-chat-3", "api_chat", {"events_per_day": 3}, CHAT_QUERIES),
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def api_task_paths():
+    """Query mix for /tasks: today plus ranges of growing length"""
+    today = date.today()
+    paths = ["/tasks/today"]
+    for days in (1, 7, 30, 90):
+        paths.append(f"/tasks/range?start_date={today}&end_date={today + timedelta(days=days)}")
+    paths.append(f"/tasks/range?start_date={today}&end_date={today + timedelta(days=30)}&stream=true")
+    return paths
+
+
+# --- Worker side (runs in a child process) -------------------------------------
+
+def load_pipeline(pipeline):
+    """Import a pipeline and return a callable taking one query"""
+    if pipeline == "mail":
+        sys.path.insert(0, str(ROOT / "Backend" / "mail_agent"))
+        from main import run_mail_assistant
+        now = datetime.now().strftime("%H:%M")
+        return lambda query: run_mail_assistant(query, now), None
+
+    if pipeline == "web_search":
+        sys.path.insert(0, str(ROOT / "Backend" / "web_search"))
+        from web_search_agent import create_web_search_agent
+        return create_web_search_agent, None
+
+    if pipeline == "calendar_chat":
+        sys.path.insert(0, str(ROOT / "calendar_agent"))
+        from main import chat_with_ai
+        return chat_with_ai, None
+
+    sys.path.insert(0, str(ROOT / "task-planner-ai-flow"))
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    client.__enter__()
+
+    def call(query):
+        if pipeline == "api_tasks":
+            response = client.get(query)
+        else:
+            response = client.post("/chat", json={"message": query})
+        response.raise_for_status()
+        return response.content
+
+    return call, lambda: client.__exit__(None, None, None)
+
+
+def run_worker(args):
+    call, close = load_pipeline(args.worker)
+    queries = json.loads(args.queries)
+
+    for query in queries[:args.warmup]:
+        call(query)
+
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(index):
+        nonlocal errors
+        query = queries[index % len(queries)]
+        started = time.perf_counter()
+        try:
+            call(query)
+        except Exception:
+            with lock:
+                errors += 1
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(timed, range(args.iterations)))
+    wall = time.perf_counter() - started
+
+    if close:
+        close()
+    print(json.dumps({
+        "latencies_ms": latencies,
+        "errors": errors,
+        "wall_s": wall,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+# --- Driver side ------------------------------------------------------------------
+
+def run_scenario(name, pipeline, options, queries, args):
+    standin_args = standin.parse_args([
+        "--port", "0",
+        "--latency-ms", str(args.latency_ms),
+        "--openai-latency-ms", str(args.openai_latency_ms),
+        "--payload-bytes", str(args.payload_bytes),
+    ])
+    for key, value in options.items():
+        setattr(standin_args, key, value)
+    server = standin.make_server(standin_args)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"{base}/v1",
+        "OPENAI_API_KEY": "standin",
+        "SERPAPI_API_KEY": "standin",
+        "SERPAPI_ENDPOINT": base,
+        "GOOGLE_API_ROOT": f"{base}/",
+        "WEB_SEARCH_LOG_PATH": str(Path(args.workdir) / "web_search_log.json"),
+        "TELEMETRY_ENABLED": os.getenv("TELEMETRY_ENABLED", "False"),
+    }
+    queries = queries or api_task_paths()
+    command = [
+        sys.executable, __file__, "--worker", pipeline,
+        "--queries", json.dumps(queries),
+        "--iterations", str(args.iterations),
+        "--concurrency", str(args.concurrency),
+        "--warmup", str(args.warmup),
+    ]
+    try:
+        handler_state = server.RequestHandlerClass.state
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, cwd=args.workdir)
+        if completed.returncode != 0:
+            error = (completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"])[-1]
+            return {"scenario": name, "pipeline": pipeline, "options": options, "error": error}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        calls = dict(handler_state.calls)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    latencies = sorted(result["latencies_ms"])
+    requests = args.iterations + min(args.warmup, len(queries))
+    return {
+        "scenario": name,
+        "pipeline": pipeline,
+        "options": options,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "errors": result["errors"],
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "throughput_rps": round(args.iterations / result["wall_s"], 2),
+        "peak_rss_mb": round(result["peak_rss_mb"], 1),
+        "api_calls": calls,
+        "api_calls_per_request": round(sum(calls.values()) / requests, 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_comparison(results, baseline_path):
+    """p95 and API calls relative to an earlier results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {item["scenario"]: item for item in json.load(f)["results"]}
+    print(f"\n{'scenario':<20}{'p95 before':>12}{'p95 now':>12}{'change':>10}{'calls/req':>16}")
+    for item in results:
+        before = baseline.get(item["scenario"])
+        if not before or "p95_ms" not in item or "p95_ms" not in before:
+            continue
+        change = (item["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        calls = f"{before['api_calls_per_request']} -> {item['api_calls_per_request']}"
+        print(f"{item['scenario']:<20}{before['p95_ms']:>12}{item['p95_ms']:>12}{change:>+9.1f}%{calls:>16}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end agent benchmarks against the API stand-in")
+    parser.add_argument("--out", default="bench_results.json", help="machine-readable results file")
+    parser.add_argument("--only", action="append", help="run scenarios whose name starts with this prefix")
+    parser.add_argument("--iterations", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--openai-latency-ms", type=float, default=150)
+    parser.add_argument("--payload-bytes", type=int, default=300)
+    parser.add_argument("--quick", action="store_true", help="few iterations, no latency")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--workdir", default=None, help="working directory for the pipelines")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--queries", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    if args.quick:
+        args.iterations, args.warmup, args.latency_ms, args.openai_latency_ms = 8, 1, 0, 0
+    args.workdir = args.workdir or str(ROOT / ".bench")
+    Path(args.workdir).mkdir(exist_ok=True)
+
+    results = []
+    for name, pipeline, options, queries in SCENARIOS:
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        print(f"{name} ...", end=" ", flush=True)
+        result = run_scenario(name, pipeline, options, queries, args)
+        results.append(result)
+        if "error" in result:
+            print(f"failed: {result['error']}")
+        else:
+            print(f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+                  f"{result['throughput_rps']} req/s, {result['peak_rss_mb']} MB, "
+                  f"{result['api_calls_per_request']} calls/req")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "openai_latency_ms": args.openai_latency_ms,
+            "payload_bytes": args.payload_bytes,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Cold-start profile and budget check for the CLI agent entry points
+
+server.js spawns a fresh Python process per request, so import time at
+start-up is paid on every call. This script imports each agent's main module
+in a new interpreter with `-X importtime` and reports:
+- the wall time over a bare interpreter
+- the modules with the largest cumulative import time
+- which heavy dependencies were loaded eagerly
+
+Usage (from the repository root):
+    python benchmarks/startup.py                   # profile
+    python benchmarks/startup.py --check           # exit 1 if a budget is exceeded
+    python benchmarks/startup.py --agent mail_agent --top 25 --out startup.json
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name: (directory, entry module)
+AGENTS = {
+    "mail_agent": (ROOT / "Backend" / "mail_agent", "main"),
+    "web_search": (ROOT / "Backend" / "web_search", "main"),
+    "calendar_agent": (ROOT / "calendar_agent", "main"),
+    "intent_router": (ROOT / "Backend" / "intent_router", "main"),
+}
+
+# Dependencies that must only be imported on first use
+HEAVY_MODULES = ("openai", "googleapiclient", "google_auth_oauthlib", "google.oauth2", "serpapi", "pydantic", "httpx")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_import(directory, module, importtime=False):
+    """Import `module` in a fresh interpreter; return (wall seconds, stderr)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", f"import {module}" if module else "pass"]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=directory, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed")
+    return elapsed, completed.stderr
+
+
+def parse_importtime(stderr):
+    """(module, self ms, cumulative ms, depth) per imported module"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2))
+    return modules
+
+
+def profile_agent(name, runs, top):
+    directory, module = AGENTS[name]
+    baseline = statistics.median(run_import(directory, None)[0] for _ in range(runs))
+    walls = [run_import(directory, module)[0] for _ in range(runs)]
+    _, stderr = run_import(directory, module, importtime=True)
+    modules = parse_importtime(stderr)
+
+    loaded = {module_name for module_name, _, _, _ in modules}
+    heavy = sorted(
+        heavy_name for heavy_name in HEAVY_MODULES
+        if heavy_name in loaded or any(module_name.startswith(heavy_name + ".") for module_name in loaded)
+    )
+    slowest = sorted(modules, key=lambda item: item[2], reverse=True)[:top]
+    return {
+        "agent": name,
+        "startup_ms": round((statistics.median(walls) - baseline) * 1000, 1),
+        "interpreter_ms": round(baseline * 1000, 1),
+        "modules_imported": len(modules),
+        "heavy_modules": heavy,
+        "slowest_imports": [
+            {"module": module_name, "self_ms": round(self_ms, 2), "cumulative_ms": round(cumulative_ms, 2)}
+            for module_name, self_ms, cumulative_ms, _ in slowest
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Start-up import profile of the CLI agents")
+    parser.add_argument("--agent", action="append", choices=sorted(AGENTS), help="profile only these agents")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per agent (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="allowed start-up time above a bare interpreter")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 when an agent exceeds the budget or imports a heavy module eagerly")
+    parser.add_argument("--out", help="write the profile as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    failures = []
+    for name in args.agent or sorted(AGENTS):
+        try:
+            result = profile_agent(name, args.runs, args.top)
+        except RuntimeError as error:
+            print(f"{name}: import failed: {error}")
+            failures.append(name)
+            continue
+        results.append(result)
+
+        print(f"\n{name}: {result['startup_ms']} ms over interpreter start "
+              f"({result['interpreter_ms']} ms), {result['modules_imported']} modules")
+        for item in result["slowest_imports"]:
+            print(f"  {item['cumulative_ms']:>9.2f} ms cumulative {item['self_ms']:>8.2f} ms self  {item['module']}")
+        if result["heavy_modules"]:
+            print(f"  eagerly imported: {', '.join(result['heavy_modules'])}")
+
+        if result["startup_ms"] > args.budget_ms or result["heavy_modules"]:
+            failures.append(name)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"budget_ms": args.budget_ms, "results": results}, f, indent=2)
+
+    if args.check:
+        if failures:
+            print(f"\nStart-up budget exceeded: {', '.join(failures)}")
+            return 1
+        print(f"\nAll agents within {args.budget_ms} ms and without eager heavy imports")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Multi-tenant load test for the task planner API against the local API stand-in
+
+Simulates many signed-in users (one session token each) hitting /tasks on a
+single instance with MULTI_TENANT=True. Access is skewed: a few users are
+active most of the time, the long tail keeps cycling through the client pool,
+so both pool hits and evictions are exercised.
+
+Usage (from the repository root):
+    python benchmarks/tenants.py --users 5000 --requests 20000 --concurrency 16
+    python benchmarks/tenants.py --check --p95-budget-ms 150 --rss-budget-mb 400
+
+Reports p50/p95/p99 latency (all requests and first request per user),
+throughput, peak RSS, memory per user and client pool events. With --check
+it exits with 1 if a budget is exceeded.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from e2e import ROOT, api_task_paths, percentile, standin
+
+POOL_EVENT_LINE = re.compile(r'client_pool_events_total\{pool="calendar",event="(\w+)"\} ([\d.]+)')
+
+
+# --- Worker side (runs in a child process) -------------------------------------
+
+def run_worker(args):
+    sys.path.insert(0, str(ROOT / "task-planner-ai-flow"))
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    client.__enter__()
+    paths = [path for path in api_task_paths() if "stream=true" not in path]
+    rng = random.Random(args.seed)
+    # Skewed access: user 0 is the most active, the tail is rarely seen
+    picks = [min(args.users - 1, int(args.users * rng.random() ** args.skew)) for _ in range(args.requests)]
+
+    client.get(paths[0], headers={"Authorization": "Bearer warmup"}).raise_for_status()
+    baseline_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    latencies = []
+    first_latencies = []
+    errors = 0
+    seen = set()
+    lock = threading.Lock()
+
+    def timed(index):
+        nonlocal errors
+        user = picks[index]
+        with lock:
+            first = user not in seen
+            seen.add(user)
+        started = time.perf_counter()
+        try:
+            response = client.get(
+                paths[index % len(paths)], headers={"Authorization": f"Bearer load-test-user-{user}"}
+            )
+            response.raise_for_status()
+        except Exception:
+            with lock:
+                errors += 1
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if first:
+                first_latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(timed, range(args.requests)))
+    wall = time.perf_counter() - started
+
+    pool_events = {event: int(float(value)) for event, value in POOL_EVENT_LINE.findall(client.get("/metrics").text)}
+    client.__exit__(None, None, None)
+    print(json.dumps({
+        "latencies_ms": latencies,
+        "first_latencies_ms": first_latencies,
+        "errors": errors,
+        "wall_s": wall,
+        "users_seen": len(seen),
+        "pool_events": pool_events,
+        # ru_maxrss is in kilobytes on Linux
+        "baseline_rss_mb": baseline_rss_mb,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+# --- Driver side ------------------------------------------------------------------
+
+def run_load_test(args):
+    standin_args = standin.parse_args([
+        "--port", "0",
+        "--latency-ms", str(args.latency_ms),
+        "--events-per-day", str(args.events_per_day),
+    ])
+    server = standin.make_server(standin_args)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    env = {
+        **os.environ,
+        "GOOGLE_API_ROOT": f"{base}/",
+        "OPENAI_API_KEY": "standin",
+        "OPENAI_BASE_URL": f"{base}/v1",
+        "MULTI_TENANT": "True",
+        "CALENDAR_CLIENT_POOL_SIZE": str(args.pool_size),
+        "TASK_CACHE_MAX_ENTRIES": str(args.cache_entries),
+        "TELEMETRY_ENABLED": os.getenv("TELEMETRY_ENABLED", "False"),
+    }
+    command = [
+        sys.executable, __file__, "--worker",
+        "--users", str(args.users),
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--skew", str(args.skew),
+        "--seed", str(args.seed),
+    ]
+    try:
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, cwd=args.workdir)
+        if completed.returncode != 0:
+            error = (completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"])[-1]
+            return {"error": error}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    latencies = sorted(result["latencies_ms"])
+    first = sorted(result["first_latencies_ms"])
+    growth = max(0.0, result["peak_rss_mb"] - result["baseline_rss_mb"])
+    return {
+        "users": args.users,
+        "users_seen": result["users_seen"],
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "pool_size": args.pool_size,
+        "errors": result["errors"],
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "first_request_p95_ms": round(percentile(first, 0.95), 2) if first else None,
+        "throughput_rps": round(args.requests / result["wall_s"], 2),
+        "peak_rss_mb": round(result["peak_rss_mb"], 1),
+        "kb_per_user": round(growth * 1024 / max(1, result["users_seen"]), 1),
+        "pool_events": result["pool_events"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-tenant load test of the task planner API")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skew", type=float, default=2.0, help="higher values concentrate load on fewer users")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pool-size", type=int, default=500, help="CALENDAR_CLIENT_POOL_SIZE of the instance")
+    parser.add_argument("--cache-entries", type=int, default=4096, help="TASK_CACHE_MAX_ENTRIES of the instance")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--events-per-day", type=int, default=3)
+    parser.add_argument("--out", help="machine-readable results file")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a budget is exceeded")
+    parser.add_argument("--p95-budget-ms", type=float, default=150)
+    parser.add_argument("--rss-budget-mb", type=float, default=400)
+    parser.add_argument("--workdir", default=None, help="working directory of the instance")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    args.workdir = args.workdir or str(ROOT / ".bench")
+    Path(args.workdir).mkdir(exist_ok=True)
+
+    print(f"{args.users} users, {args.requests} requests ...", end=" ", flush=True)
+    result = run_load_test(args)
+    if "error" in result:
+        print(f"failed: {result['error']}")
+        return 1
+    print(f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+          f"first request p95 {result['first_request_p95_ms']} ms, {result['throughput_rps']} req/s")
+    print(f"peak RSS {result['peak_rss_mb']} MB, {result['kb_per_user']} KB per user, "
+          f"{result['users_seen']} users seen, pool {result['pool_events']}, {result['errors']} errors")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.out}")
+
+    if args.check:
+        failures = []
+        if result["errors"]:
+            failures.append(f"{result['errors']} failed requests")
+        if result["p95_ms"] > args.p95_budget_ms:
+            failures.append(f"p95 {result['p95_ms']} ms > {args.p95_budget_ms} ms")
+        if result["peak_rss_mb"] > args.rss_budget_mb:
+            failures.append(f"peak RSS {result['peak_rss_mb']} MB > {args.rss_budget_mb} MB")
+        for failure in failures:
+            print(f"budget exceeded: {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
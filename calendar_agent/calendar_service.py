@@ -1,162 +1,266 @@
+import heapq
 import os
-from datetime import datetime, date, timedelta
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta, timezone
 from dotenv import load_dotenv
 
+# Telemetry, rate limiter, token broker client, local store and event conversion are shared with the Backend agents
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Backend'))
+from telemetry import span, inc
+from rate_limit import GoogleRateLimiter, retry_settings_from_env
+from token_client import broker_credentials, reusable
+from local_store import LocalStore
+from calendar_events import COMPLETED_PATCH, event_body, event_fields, from_calendar, parse_time, split_task_id
+
 load_dotenv()
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 CREDENTIALS_FILE = os.getenv('GOOGLE_CALENDAR_CREDENTIALS_FILE', 'credentials.json')
 TOKEN_FILE = os.getenv('GOOGLE_CALENDAR_TOKEN_FILE', 'token.json')
 CALENDAR_ID = os.getenv('CALENDAR_ID', 'primary')
+# Calendars read concurrently and merged (comma-separated). New tasks go to CALENDAR_ID;
+# completion flags go to the calendar a task was read from (encoded in its task ID)
+CALENDAR_IDS = [calendar_id.strip() for calendar_id in os.getenv('CALENDAR_IDS', CALENDAR_ID).split(',') if calendar_id.strip()]
 OAUTH_PORT = int(os.getenv('OAUTH_PORT', '8086'))
+# Alternative Google API root, e.g. the local stand-in (standin/server.py)
+GOOGLE_API_ROOT = os.getenv('GOOGLE_API_ROOT', '')
+# Local store filled by sync.py; read before calling the Calendar API
+store = LocalStore(os.getenv('LOCAL_STORE_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'local_store.sqlite3'))
+# Days ahead (from today) that sync.py keeps in the local store
+SYNC_DAYS = int(os.getenv('SYNC_CALENDAR_DAYS', '31'))
+# Calendar quota is counted per request
+CALENDAR_QUOTA_PER_SECOND = float(os.getenv('CALENDAR_QUOTA_PER_SECOND', '10'))
+CALENDAR_QUOTA_BURST = float(os.getenv('CALENDAR_QUOTA_BURST', '20'))
+
+calendar_limiter = GoogleRateLimiter(
+    'calendar',
+    units_per_second=CALENDAR_QUOTA_PER_SECOND,
+    burst=CALENDAR_QUOTA_BURST,
+    count=inc,
+    **retry_settings_from_env()
+)
+
+# Calendar service, built on first use and reused afterwards
+_service = None
+# Its credentials, for the per-thread connections of concurrent listings
+_credentials = None
+# Set when those came from the token broker: they carry no refresh token, so
+# the service is rebuilt with a fresh broker token before they expire
+_broker_creds = None
+_thread_local = threading.local()
 
 def authenticate_calendar():
+    # Google libraries are imported here rather than at module load,
+    # so starting the agent does not pay for them until a calendar call
+    global _service, _credentials, _broker_creds
+    if _service is not None and (_broker_creds is None or reusable(_broker_creds)):
+        return _service
+    from googleapiclient.discovery import build
+
+    if GOOGLE_API_ROOT:
+        from google.auth.credentials import AnonymousCredentials
+        _credentials = AnonymousCredentials()
+        _service = build('calendar', 'v3', credentials=_credentials,
+                         client_options={'api_endpoint': GOOGLE_API_ROOT.rstrip('/') + '/calendar/v3/'})
+        return _service
+
+    # With the token broker running, the access token comes from there:
+    # no refresh and no token file write on the request path
+    creds = broker_credentials(os.getenv('TOKEN_BROKER_ACCOUNT', 'calendar'))
+    _broker_creds = creds
+    if creds is not None:
+        _credentials = creds
+        _service = build('calendar', 'v3', credentials=creds)
+        return _service
+
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+        with span('file.token_read'):
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+            with span('google.token_refresh'):
+                creds.refresh(Request())
         else:
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=OAUTH_PORT)
-        with open(TOKEN_FILE, 'w') as token:
+        with span('file.token_write'), open(TOKEN_FILE, 'w') as token:
             token.write(creds.to_json())
-    return build('calendar', 'v3', credentials=creds)
+    _credentials = creds
+    _service = build('calendar', 'v3', credentials=creds)
+    return _service
 
-def get_tasks_for_day(target_date):
+def thread_http():
+    """httplib2 is not thread-safe: each worker thread gets its own authorized connection"""
+    http = getattr(_thread_local, 'http', None)
+    # Rebuilt when authenticate_calendar() switched to new (broker) credentials
+    if http is None or http.credentials is not _credentials:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        http = _thread_local.http = AuthorizedHttp(_credentials, http=httplib2.Http())
+    return http
+
+def list_calendar_events(service, calendar_id, time_min, time_max, http=None):
+    """
+    All events of one calendar in a window, in start order, following nextPageToken.
+    Events outside CALENDAR_ID are tagged with their calendar.
+    """
+    events = []
+    page_token = None
+    while True:
+        with span('calendar.events.list', calendar=calendar_id):
+            events_result = calendar_limiter.execute(service.events().list(
+                calendarId=calendar_id,
+                timeMin=time_min,
+                timeMax=time_max,
+                singleEvents=True,
+                orderBy='startTime',
+                maxResults=2500,
+                pageToken=page_token
+            ), **({'http': http} if http is not None else {}))
+        events.extend(
+            from_calendar(event, calendar_id, CALENDAR_ID) for event in events_result.get('items', []) if event.get('start')
+        )
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return events
+
+def list_events(time_min, time_max):
+    """
+    Events of all CALENDAR_IDS in a window, in start order. Calendars are
+    listed concurrently and k-way merged, so latency follows the slowest one.
+    """
     service = authenticate_calendar()
-    time_min = datetime.combine(target_date, datetime.min.time()).isoformat() + 'Z'
-    time_max = datetime.combine(target_date, datetime.max.time()).isoformat() + 'Z'
-    
-    events_result = service.events().list(
-        calendarId=CALENDAR_ID,
-        timeMin=time_min,
-        timeMax=time_max,
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
-    
-    events = events_result.get('items', [])
+    if len(CALENDAR_IDS) == 1:
+        return list_calendar_events(service, CALENDAR_IDS[0], time_min, time_max)
+    with ThreadPoolExecutor(max_workers=len(CALENDAR_IDS)) as pool:
+        listings = list(pool.map(
+            lambda calendar_id: list_calendar_events(service, calendar_id, time_min, time_max, thread_http()),
+            CALENDAR_IDS
+        ))
+    events = []
+    seen = set()
+    for event in heapq.merge(*listings, key=lambda event: event_bounds(event)[0]):
+        # An invitation shown in several calendars is listed once
+        key = (event.get('iCalUID') or event['id'], event_bounds(event)[0])
+        if key not in seen:
+            seen.add(key)
+            events.append(event)
+    return events
+
+def event_to_task(event):
+    """Convert a Google Calendar event into a task dict, or None if it has no title or start"""
+    fields = event_fields(event)
+    if fields is None:
+        return None
+    task_id, title, task_date, task_time, description, is_completed = fields
+    return {
+        'id': task_id,
+        'title': title,
+        'date': task_date,
+        'time': parse_time(task_time) if task_time else None,
+        'description': description,
+        'is_completed': is_completed
+    }
+
+def events_to_tasks(events):
     tasks = []
-    
     for event in events:
-        start = event.get('start', {})
-        if 'dateTime' in start:
-            dt = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
-            task_date = dt.date()
-            task_time = dt.time()
-        else:
-            task_date = datetime.fromisoformat(start['date']).date()
-            task_time = None
-        
-        description = event.get('description', '')
-        is_completed = "[COMPLETED]" in description
-        clean_description = description.replace("[COMPLETED]", "").strip()
-        
-        tasks.append({
-            'id': event['id'],
-            'title': event['summary'],
-            'date': task_date,
-            'time': task_time,
-            'description': clean_description if clean_description else None,
-            'is_completed': is_completed
-        })
-    
+        task = event_to_task(event)
+        if task is not None:
+            tasks.append(task)
     return tasks
 
+def utc_timestamp(value):
+    """POSIX timestamp of an RFC 3339 dateTime or of an all-day date (taken as UTC midnight)"""
+    if len(value) == 10:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def event_bounds(event):
+    """(start, end) timestamps of an event for range queries on the local store"""
+    start = event.get('start', {})
+    end = event.get('end', {}) or start
+    start_ts = utc_timestamp(start.get('dateTime') or start.get('date'))
+    end_value = end.get('dateTime') or end.get('date')
+    return start_ts, utc_timestamp(end_value) if end_value else start_ts
+
+def store_event(event):
+    """Keep the local store in step with an event this agent created or changed"""
+    if event.get('start'):
+        store.upsert('events', event['id'], event, *event_bounds(event))
+
+def stored_tasks(start_date, end_date):
+    """Tasks for the range from the local store, or None if it is missing, stale or too short"""
+    start_ts = datetime.combine(start_date, datetime.min.time(), timezone.utc).timestamp()
+    end_ts = datetime.combine(end_date, datetime.max.time(), timezone.utc).timestamp()
+    with span('local_store.read', kind='events'):
+        events = store.load('events', start_ts, end_ts)
+    if events is None:
+        inc('local_store_misses_total', kind='events')
+        return None
+    inc('local_store_hits_total', kind='events')
+    return events_to_tasks(events)
+
+def sync_events():
+    """
+    Pull the events from yesterday to SYNC_DAYS ahead into the local store.
+    Returns the number of stored events.
+    """
+    start = datetime.combine(date.today() - timedelta(days=1), datetime.min.time(), timezone.utc)
+    end = datetime.combine(date.today() + timedelta(days=SYNC_DAYS + 1), datetime.min.time(), timezone.utc)
+    events = list_events(start.isoformat(), end.isoformat())
+    with span('local_store.write', kind='events'):
+        store.replace('events', [
+            dict(zip(('start_ts', 'end_ts'), event_bounds(event)), id=event['id'], data=event)
+            for event in events
+        ], window=(start.timestamp(), end.timestamp()))
+    return len(events)
+
+def get_tasks_for_day(target_date):
+    tasks = stored_tasks(target_date, target_date)
+    if tasks is not None:
+        return tasks
+    time_min = datetime.combine(target_date, datetime.min.time()).isoformat() + 'Z'
+    time_max = datetime.combine(target_date, datetime.max.time()).isoformat() + 'Z'
+    return events_to_tasks(list_events(time_min, time_max))
+
 def create_task(title, task_date, task_time=None, description=None):
     service = authenticate_calendar()
+    event = event_body(title, task_date, task_time, description)
     
-    event = {
-        'summary': title,
-        'description': description or '',
-    }
-    
-    if task_time:
-        start_datetime = datetime.combine(task_date, task_time)
-        end_datetime = start_datetime + timedelta(hours=1)
-        
-        event['start'] = {
-            'dateTime': start_datetime.isoformat(),
-            'timeZone': 'UTC',
-        }
-        event['end'] = {
-            'dateTime': end_datetime.isoformat(),
-            'timeZone': 'UTC',
-        }
-    else:
-        event['start'] = {'date': task_date.isoformat()}
-        event['end'] = {'date': (task_date + timedelta(days=1)).isoformat()}
-    
-    created_event = service.events().insert(calendarId=CALENDAR_ID, body=event).execute()
+    with span('calendar.events.insert'):
+        created_event = calendar_limiter.execute(service.events().insert(calendarId=CALENDAR_ID, body=event))
+    store_event(created_event)
     return created_event['id']
 
 def get_tasks_for_range(start_date, end_date):
-    service = authenticate_calendar()
+    tasks = stored_tasks(start_date, end_date)
+    if tasks is not None:
+        return tasks
     time_min = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0).isoformat() + 'Z'
     time_max = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).isoformat() + 'Z'
-    
-    events_result = service.events().list(
-        calendarId=CALENDAR_ID,
-        timeMin=time_min,
-        timeMax=time_max,
-        singleEvents=True,
-        orderBy='startTime',
-        maxResults=2500
-    ).execute()
-    
-    events = events_result.get('items', [])
-    tasks = []
-    
-    for event in events:
-        if not event.get('summary'):
-            continue
-            
-        start = event.get('start', {})
-        if 'dateTime' in start:
-            dt_str = start['dateTime']
-            if 'T' in dt_str:
-                dt_str = dt_str.split('T')[0] + 'T' + dt_str.split('T')[1].split('+')[0].split('-')[0].split('Z')[0]
-                dt = datetime.fromisoformat(dt_str)
-                task_date = dt.date()
-                task_time = dt.time()
-            else:
-                task_date = datetime.fromisoformat(dt_str).date()
-                task_time = None
-        elif 'date' in start:
-            task_date = datetime.fromisoformat(start['date']).date()
-            task_time = None
-        else:
-            continue
-        
-        description = event.get('description', '')
-        is_completed = "[COMPLETED]" in description
-        clean_description = description.replace("[COMPLETED]", "").strip()
-        
-        tasks.append({
-            'id': event['id'],
-            'title': event.get('summary', 'Untitled'),
-            'date': task_date,
-            'time': task_time,
-            'description': clean_description if clean_description else None,
-            'is_completed': is_completed
-        })
-    
-    return tasks
+    return events_to_tasks(list_events(time_min, time_max))
 
 def mark_task_done(task_id):
     service = authenticate_calendar()
+    calendar_id, event_id = split_task_id(task_id, CALENDAR_ID)
     
-    event = service.events().get(calendarId=CALENDAR_ID, eventId=task_id).execute()
-    description = event.get('description', '')
-    
-    if "[COMPLETED]" not in description:
-        event['description'] = f"[COMPLETED] {description}"
-    
-    service.events().update(calendarId=CALENDAR_ID, eventId=task_id, body=event).execute()
-    return True
\ No newline at end of file
+    # One round trip: patch only the completion flag, no read-modify-write
+    with span('calendar.events.patch'):
+        patched_event = calendar_limiter.execute(service.events().patch(
+            calendarId=calendar_id,
+            eventId=event_id,
+            body=COMPLETED_PATCH
+        ))
+    store_event(from_calendar(patched_event, calendar_id, CALENDAR_ID))
+    return True
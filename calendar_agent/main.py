@@ -9,6 +9,9 @@ load_dotenv()
 # Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Created on the first chat and reused afterwards
+_openai_service = None
+
 def get_today_tasks():
     """Get today's tasks"""
     return get_tasks_for_day(date.today())
@@ -50,7 +53,10 @@ def chat_with_ai(message):
     if not OPENAI_API_KEY:
         return "OpenAI API key not configured"
     
-    openai_service = OpenAIService(OPENAI_API_KEY)
+    global _openai_service
+    if _openai_service is None:
+        _openai_service = OpenAIService(OPENAI_API_KEY)
+    openai_service = _openai_service
     
     calendar_functions = {
         'get_today_tasks': get_today_tasks,
@@ -1,11 +1,28 @@
 import json
+import os
+import sys
+import time
 from datetime import date, datetime
-from openai import OpenAI
+
+# Telemetry, rate limiter, token broker client and local store are shared with the Backend agents
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Backend'))
+from telemetry import span, inc
+from fast_path import render_tool_results, rules_from_env
+
+# Rules for answering locally instead of making a second model call (FAST_PATH_* variables)
+fast_path_rules = rules_from_env(
+    default_functions=['get_today_tasks', 'get_tasks_range', 'create_task', 'mark_task_done'],
+    write_functions={'create_task', 'mark_task_done'},
+)
 
 class OpenAIService:
     def __init__(self, api_key):
+        # Imported on first use to keep agent start-up fast
+        from openai import OpenAI
         self.client = OpenAI(api_key=api_key)
         self.model = "gpt-4o-mini"
+        # Timings of the last chat() call in milliseconds
+        self.last_timings = {}
     
     def get_function_definitions(self):
         return [
@@ -54,18 +71,22 @@ class OpenAIService:
     
     def chat(self, message, calendar_functions):
         current_date = date.today()
+        self.last_timings = {}
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": f"You are a task planning assistant. Current date: {current_date.strftime('%Y-%m-%d')}"},
-                {"role": "user", "content": message}
-            ],
-            functions=self.get_function_definitions(),
-            function_call="auto",
-            temperature=0.3
-        )
+        started = time.perf_counter()
+        with span('openai.chat.completions', purpose='tool_selection'):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": f"You are a task planning assistant. Current date: {current_date.strftime('%Y-%m-%d')}"},
+                    {"role": "user", "content": message}
+                ],
+                functions=self.get_function_definitions(),
+                function_call="auto",
+                temperature=0.3
+            )
         
+        self.last_timings['tool_selection_ms'] = round((time.perf_counter() - started) * 1000, 1)
         choice = response.choices[0]
         
         if choice.finish_reason == "function_call":
@@ -73,19 +94,31 @@ class OpenAIService:
             function_name = function_call.name
             function_args = json.loads(function_call.arguments)
             
+            started = time.perf_counter()
             result = self.execute_function(function_name, function_args, calendar_functions)
+            self.last_timings['function_ms'] = round((time.perf_counter() - started) * 1000, 1)
             
-            final_response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"Present task information clearly. Current date: {current_date.strftime('%Y-%m-%d')}"},
-                    {"role": "user", "content": message},
-                    {"role": "assistant", "content": None, "function_call": {"name": function_name, "arguments": function_call.arguments}},
-                    {"role": "function", "name": function_name, "content": json.dumps(result)}
-                ],
-                temperature=0.3
-            )
+            # Simple results are formatted locally instead of a second model call
+            rendered = render_tool_results(message, [(function_name, function_args, result)], fast_path_rules)
+            if rendered is not None:
+                self.last_timings['rendered_locally'] = True
+                inc('fast_path_total', function=function_name)
+                return rendered
+            
+            started = time.perf_counter()
+            with span('openai.chat.completions', purpose='presentation'):
+                final_response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": f"Present task information clearly. Current date: {current_date.strftime('%Y-%m-%d')}"},
+                        {"role": "user", "content": message},
+                        {"role": "assistant", "content": None, "function_call": {"name": function_name, "arguments": function_call.arguments}},
+                        {"role": "function", "name": function_name, "content": json.dumps(result)}
+                    ],
+                    temperature=0.3
+                )
             
+            self.last_timings['presentation_ms'] = round((time.perf_counter() - started) * 1000, 1)
             return final_response.choices[0].message.content
         else:
             return choice.message.content
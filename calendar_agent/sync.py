@@ -0,0 +1,52 @@
+"""
+Background sync for the calendar agent
+
+Periodically pulls upcoming events into the local store
+(local_store.sqlite3), which get_tasks_for_day and get_tasks_for_range read
+first. The first query after idle then no longer pays full Calendar latency.
+
+Usage:
+    python sync.py                  # run forever, every SYNC_INTERVAL seconds
+    python sync.py --once           # sync once, e.g. from cron
+"""
+import argparse
+import os
+import sys
+
+from calendar_service import sync_events, store, SYNC_DAYS, calendar_limiter
+
+# The sync scheduler is shared with the mail agent in Backend/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Backend'))
+from sync_scheduler import SyncScheduler
+
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", "300"))
+# Random variation of the interval (fraction) so several services do not poll in lockstep
+SYNC_JITTER = float(os.getenv("SYNC_JITTER", "0.1"))
+# Upper bound for the stretched interval after failed or throttled runs
+SYNC_BACKOFF_MAX = float(os.getenv("SYNC_BACKOFF_MAX", "1800"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Periodically sync upcoming events into the local store")
+    parser.add_argument("--once", action="store_true", help="sync once and exit")
+    parser.add_argument("--interval", type=float, default=SYNC_INTERVAL)
+    parser.add_argument("--jitter", type=float, default=SYNC_JITTER)
+    parser.add_argument("--backoff-max", type=float, default=SYNC_BACKOFF_MAX)
+    args = parser.parse_args(argv)
+
+    def job():
+        count = sync_events()
+        return f"{count} events in the next {SYNC_DAYS} days ({store.path})"
+
+    scheduler = SyncScheduler("events", job, args.interval, args.jitter, args.backoff_max, calendar_limiter)
+    if args.once:
+        return 0 if scheduler.run_once() else 1
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
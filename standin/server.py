@@ -0,0 +1,552 @@
+"""
+Local stand-in for the external APIs used by the AbbeSynapse agents
+
+Serves OpenAI chat completions, Gmail, Google Calendar (incl. HTTP batch)
+and SerpAPI with configurable latency and payload size, so benchmarks run
+offline and reproducibly. In record mode requests are forwarded to the real
+services and the responses saved; replay mode serves them back.
+
+Usage:
+    python standin/server.py --port 8090 --latency-ms 50 --openai-latency-ms 400
+    python standin/server.py --record recordings.json
+    python standin/server.py --replay recordings.json
+
+Point the agents at it:
+    OPENAI_BASE_URL=http://localhost:8090/v1
+    GOOGLE_API_ROOT=http://localhost:8090/
+    SERPAPI_ENDPOINT=http://localhost:8090
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+UPSTREAMS = [
+    ("/v1/", "https://api.openai.com"),
+    ("/gmail/", "https://gmail.googleapis.com"),
+    ("/calendar/", "https://www.googleapis.com"),
+    ("/batch/", "https://www.googleapis.com"),
+    ("/search", "https://serpapi.com"),
+]
+
+EMAIL_ID = re.compile(r'"id":\s*"([^"]+)"')
+
+
+class StandinState:
+    """Configuration, call counters and recordings shared by all handler threads"""
+
+    def __init__(self, args):
+        self.args = args
+        self.calls = Counter()
+        self.replay_misses = 0
+        self.lock = threading.Lock()
+        self.recordings = {}
+        if args.replay:
+            with open(args.replay, encoding="utf-8") as f:
+                self.recordings = json.load(f)
+        self.events = {}
+        # Encoded calendar listings by query, dropped on every event write
+        self.listings = {}
+
+    def count(self, route):
+        with self.lock:
+            self.calls[route] += 1
+
+    def record(self, key, status, content_type, body):
+        with self.lock:
+            self.recordings[key] = {"status": status, "content_type": content_type, "body": body.decode("utf-8")}
+            with open(self.args.record, "w", encoding="utf-8") as f:
+                json.dump(self.recordings, f, ensure_ascii=False, indent=1)
+
+
+def request_key(method, path, body):
+    """Replay key: method, path with query and a hash of the body"""
+    return f"{method} {path} {hashlib.sha256(body or b'').hexdigest()[:16]}"
+
+
+def filler(size, seed=""):
+    """Deterministic text of roughly `size` characters"""
+    words = ["Projekt", "Termin", "Update", "Bericht", "Meeting", "Angebot", "Rechnung", "Team", "Frage", "Info"]
+    rng = random.Random(seed)
+    text = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        text.append(word)
+        length += len(word) + 1
+    return " ".join(text)[:size]
+
+
+# --- OpenAI -----------------------------------------------------------------
+
+def sample_from_schema(schema, name, context, defs, items):
+    """Build a value that satisfies a JSON schema (as used by structured outputs)"""
+    if "$ref" in schema:
+        schema = defs.get(schema["$ref"].split("/")[-1], {})
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return sample_from_schema(options[0], name, context, defs, items) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            prop: sample_from_schema(sub, prop, context, defs, items)
+            for prop, sub in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        if name.endswith("ids"):
+            return EMAIL_ID.findall(context)[:items]
+        return [sample_from_schema(schema.get("items", {}), name, context, defs, items) for _ in range(items)]
+    if kind == "string":
+        ids = EMAIL_ID.findall(context)
+        if name.endswith("id") and ids:
+            return ids[0]
+        return None if name in ("archive_id", "reply_text", "original_id", "to", "subject") else f"{name} text"
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return False
+    return None
+
+
+def chat_completion(state, body):
+    """Decide what the fake model answers: a tool call, a structured output or text"""
+    messages = body.get("messages", [])
+    last = messages[-1] if messages else {}
+    context = "\n".join(str(message.get("content") or "") for message in messages)
+    message = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+
+    tools = body.get("tools") or []
+    functions = body.get("functions") or []
+    if last.get("role") == "user" and tools:
+        tool = tools[0]["function"]
+        message["tool_calls"] = [{
+            "id": f"call_{hashlib.sha1(context.encode()).hexdigest()[:12]}",
+            "type": "function",
+            "function": {"name": tool["name"], "arguments": "{}"}
+        }]
+        finish_reason = "tool_calls"
+    elif last.get("role") == "user" and functions:
+        message["function_call"] = {"name": functions[0]["name"], "arguments": "{}"}
+        finish_reason = "function_call"
+    elif (body.get("response_format") or {}).get("type") == "json_schema":
+        json_schema = body["response_format"]["json_schema"]
+        schema = json_schema.get("schema", {})
+        value = sample_from_schema(schema, json_schema.get("name", ""), context, schema.get("$defs", {}), state.args.items)
+        message["content"] = json.dumps(value, ensure_ascii=False)
+    else:
+        message["content"] = filler(state.args.payload_bytes, context)
+
+    return {
+        "id": "chatcmpl-standin",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "standin"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {"prompt_tokens": len(context) // 4, "completion_tokens": 10, "total_tokens": len(context) // 4 + 10}
+    }
+
+
+def stream_chunks(completion):
+    """Split a completion into chat.completion.chunk events"""
+    choice = completion["choices"][0]
+    message = choice["message"]
+    base = {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"], "model": completion["model"]}
+
+    def chunk(delta, finish_reason=None):
+        return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+    yield chunk({"role": "assistant", "content": ""})
+    if message.get("tool_calls"):
+        for index, call in enumerate(message["tool_calls"]):
+            yield chunk({"tool_calls": [{"index": index, **call}]})
+    content = message.get("content") or ""
+    for start in range(0, len(content), 16):
+        yield chunk({"content": content[start:start + 16]})
+    yield chunk({}, choice["finish_reason"])
+
+
+# --- Gmail -------------------------------------------------------------------
+
+# Gmail's error body for unknown message IDs
+GMAIL_NOT_FOUND = {"error": {"code": 404, "message": "Requested entity was not found.", "status": "NOT_FOUND"}}
+
+
+def gmail_message(state, message_id):
+    """Synthetic message for IDs like msg-000042; None for IDs the stand-in never handed out"""
+    match = re.fullmatch(r".+-(\d+)", message_id)
+    if match is None:
+        return None
+    index = int(match.group(1))
+    sent = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=17 * index)
+    return {
+        "id": message_id,
+        "threadId": f"thread-{index // 3:06d}",
+        "labelIds": ["INBOX"],
+        "snippet": filler(state.args.payload_bytes, message_id),
+        "payload": {
+            "headers": [
+                {"name": "Date", "value": sent.strftime("%a, %d %b %Y %H:%M:%S +0000")},
+                {"name": "Subject", "value": f"Betreff {index // 3}"},
+                {"name": "From", "value": f"Absender {index % 25} <sender{index % 25}@example.com>"},
+                {"name": "To", "value": "me@example.com"},
+            ],
+            "parts": [{"filename": "anhang.pdf"}] if index % 10 == 0 else []
+        }
+    }
+
+
+def gmail_list(state, query):
+    size = state.args.mailbox_size
+    max_results = min(int(query.get("maxResults", ["100"])[0]), 500)
+    offset = int(query.get("pageToken", ["0"])[0])
+    ids = range(offset, min(offset + max_results, size))
+    result = {
+        "messages": [{"id": f"msg-{i:06d}", "threadId": f"thread-{i // 3:06d}"} for i in ids],
+        "resultSizeEstimate": size
+    }
+    if offset + max_results < size:
+        result["nextPageToken"] = str(offset + max_results)
+    return result
+
+
+# --- Calendar ----------------------------------------------------------------
+
+LISTING_CACHE_SIZE = 1024
+
+# Deterministic, so repeated listings reuse the events instead of competing
+# for CPU with the instance under test on the same host
+@lru_cache(maxsize=4096)
+def generated_events(day, events_per_day, payload_bytes):
+    """The generated events of one day"""
+    events = []
+    for n in range(events_per_day):
+        event_id = f"evt-{day:%Y%m%d}-{n}"
+        start = datetime(day.year, day.month, day.day, 8 + n % 10, 0)
+        events.append({
+            "id": event_id,
+            "etag": f'"{event_id}"',
+            "summary": f"Termin {n}",
+            "description": filler(min(payload_bytes, 200), event_id),
+            "start": {"dateTime": start.isoformat() + "+01:00", "timeZone": "Europe/Berlin"},
+            "end": {"dateTime": (start + timedelta(hours=1)).isoformat() + "+01:00", "timeZone": "Europe/Berlin"},
+        })
+    return tuple(events)
+
+
+def calendar_events(state, query):
+    time_min = datetime.fromisoformat(query.get("timeMin", ["2025-01-01T00:00:00Z"])[0].replace("Z", "+00:00"))
+    time_max = datetime.fromisoformat(query.get("timeMax", ["2025-01-31T23:59:59Z"])[0].replace("Z", "+00:00"))
+    events = []
+    day = time_min.date()
+    while day <= time_max.date():
+        for event in generated_events(day, state.args.events_per_day, state.args.payload_bytes):
+            events.append(state.events.get(event["id"]) or event)
+        day += timedelta(days=1)
+
+    max_results = int(query.get("maxResults", ["250"])[0])
+    offset = int(query.get("pageToken", ["0"])[0])
+    result = {"kind": "calendar#events", "items": events[offset:offset + max_results]}
+    if offset + max_results < len(events):
+        result["nextPageToken"] = str(offset + max_results)
+    return result
+
+
+def calendar_listing(state, query):
+    """calendar_events as an encoded JSON body, reused until an event changes"""
+    key = tuple(sorted((name, tuple(values)) for name, values in query.items()))
+    with state.lock:
+        body = state.listings.get(key)
+        if body is None:
+            if len(state.listings) >= LISTING_CACHE_SIZE:
+                state.listings.clear()
+            body = state.listings[key] = json.dumps(calendar_events(state, query), ensure_ascii=False).encode("utf-8")
+    return body
+
+
+def calendar_event(state, method, event_id, body):
+    with state.lock:
+        state.listings.clear()
+    if method == "DELETE":
+        state.events.pop(event_id, None)
+        return None
+    event = state.events.get(event_id) or {
+        "id": event_id,
+        "summary": "Termin",
+        "start": {"dateTime": "2025-01-01T09:00:00+01:00"},
+        "end": {"dateTime": "2025-01-01T10:00:00+01:00"},
+    }
+    if method == "PUT":
+        event = {**body, "id": event_id}
+    elif method == "PATCH":
+        event = {**event, **body}
+    state.events[event_id] = event
+    return event
+
+
+# --- Request handling --------------------------------------------------------
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes: with Nagle's algorithm the body
+    # waits for the client's delayed ACK on kept-alive connections (~40 ms)
+    disable_nagle_algorithm = True
+    state: StandinState = None
+
+    def log_message(self, format, *args):
+        if self.state.args.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PUT(self):
+        self.handle_request("PUT")
+
+    def do_PATCH(self):
+        self.handle_request("PATCH")
+
+    def do_DELETE(self):
+        self.handle_request("DELETE")
+
+    def send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, value, status=200):
+        self.send_body(status, "application/json", json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def handle_request(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        parts = urlsplit(self.path)
+
+        if parts.path.startswith("/_standin/"):
+            return self.handle_control(parts.path)
+
+        key = request_key(method, self.path, raw)
+        if self.state.args.record:
+            return self.forward(method, raw, key)
+        if key in self.state.recordings:
+            self.state.count("replay")
+            recorded = self.state.recordings[key]
+            return self.send_body(recorded["status"], recorded["content_type"], recorded["body"].encode("utf-8"))
+        if self.state.args.replay:
+            self.state.replay_misses += 1
+
+        status, content_type, body = self.dispatch(method, parts.path, parse_qs(parts.query), raw)
+        self.send_body(status, content_type, body)
+
+    def handle_control(self, path):
+        if path == "/_standin/stats":
+            return self.send_json({"calls": dict(self.state.calls), "replay_misses": self.state.replay_misses})
+        if path == "/_standin/reset":
+            self.state.calls.clear()
+            self.state.replay_misses = 0
+            return self.send_json({"reset": True})
+        return self.send_json({"error": "unknown control path"}, 404)
+
+    def delay(self, route):
+        latency = self.state.args.openai_latency_ms if route.startswith("openai") else self.state.args.latency_ms
+        if latency:
+            jitter = latency * self.state.args.jitter
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)) / 1000)
+
+    def dispatch(self, method, path, query, raw):
+        """Synthetic response: (status, content type, body bytes)"""
+        body = json.loads(raw) if raw and raw[:1] in (b"{", b"[") else {}
+
+        if path.endswith("/chat/completions"):
+            self.state.count("openai.chat.completions")
+            self.delay("openai")
+            completion = chat_completion(self.state, body)
+            if body.get("stream"):
+                events = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in stream_chunks(completion))
+                return 200, "text/event-stream", (events + "data: [DONE]\n\n").encode("utf-8")
+            return 200, "application/json", json.dumps(completion).encode("utf-8")
+
+        if path.startswith("/batch/"):
+            self.state.count("google.batch")
+            self.delay("google")
+            return self.batch(raw)
+
+        status, value = self.google(method, path, query, body)
+        if status is None:
+            self.state.count("unknown")
+            return 404, "application/json", b'{"error": "not found"}'
+        if value is None or isinstance(value, bytes):
+            return status, "application/json", value or b""
+        return status, "application/json", json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    def google(self, method, path, query, body, count=True):
+        """Gmail, Calendar and SerpAPI routes: (status, JSON value or encoded body) or (None, None)"""
+        def hit(route):
+            if count:
+                self.state.count(route)
+                self.delay(route)
+
+        match = re.fullmatch(r"/gmail/v1/users/[^/]+/messages", path)
+        if match and method == "GET":
+            hit("gmail.messages.list")
+            return 200, gmail_list(self.state, query)
+        match = re.fullmatch(r"/gmail/v1/users/[^/]+/messages/send", path)
+        if match:
+            hit("gmail.messages.send")
+            return 200, {"id": "sent-000001", "threadId": body.get("threadId", "")}
+        match = re.fullmatch(r"/gmail/v1/users/[^/]+/messages/([^/]+)/modify", path)
+        if match:
+            hit("gmail.messages.modify")
+            return 200, {"id": match.group(1), "labelIds": []}
+        match = re.fullmatch(r"/gmail/v1/users/[^/]+/messages/([^/]+)", path)
+        if match:
+            hit("gmail.messages.get")
+            message = gmail_message(self.state, match.group(1))
+            return (200, message) if message is not None else (404, GMAIL_NOT_FOUND)
+
+        match = re.fullmatch(r"/calendar/v3/calendars/([^/]+)/events", path)
+        if match and method == "GET":
+            hit("calendar.events.list")
+            return 200, calendar_listing(self.state, query)
+        if match and method == "POST":
+            hit("calendar.events.insert")
+            event_id = f"new-{hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()[:10]}"
+            return 200, calendar_event(self.state, "PUT", event_id, body)
+        match = re.fullmatch(r"/calendar/v3/calendars/([^/]+)/events/([^/]+)", path)
+        if match:
+            hit(f"calendar.events.{ {'GET': 'get', 'PUT': 'update', 'PATCH': 'patch', 'DELETE': 'delete'}.get(method, 'other') }")
+            return (204 if method == "DELETE" else 200), calendar_event(self.state, method, match.group(2), body)
+        if re.fullmatch(r"/calendar/v3/freeBusy", path):
+            hit("calendar.freebusy")
+            return 200, {"kind": "calendar#freeBusy", "calendars": {c["id"]: {"busy": []} for c in body.get("items", [])}}
+
+        if path == "/search" or path == "/search.json":
+            hit("serpapi.search")
+            results = [
+                {
+                    "position": i + 1,
+                    "title": f"Ergebnis {i + 1} für {query.get('q', [''])[0]}",
+                    "link": f"https://example.com/{i + 1}",
+                    "snippet": filler(min(self.state.args.payload_bytes, 300), f"{query.get('q')}{i}"),
+                    "source": "example.com"
+                }
+                for i in range(self.state.args.serp_results)
+            ]
+            return 200, {"search_metadata": {"status": "Success"}, "organic_results": results}
+
+        return None, None
+
+    def batch(self, raw):
+        """Answer a multipart/mixed Google batch request part by part"""
+        boundary = self.headers.get_content_type() and self.headers.get_param("boundary")
+        response_boundary = "batch_standin"
+        output = []
+        for part in raw.decode("utf-8").split(f"--{boundary}"):
+            if "HTTP/1.1" not in part:
+                continue
+            content_id = re.search(r"Content-ID:\s*<([^>]+)>", part, re.IGNORECASE)
+            request_line = re.search(r"^(GET|POST|PUT|PATCH|DELETE) (\S+) HTTP/1.1", part, re.MULTILINE)
+            inner_body = part.split("\r\n\r\n", 2)[-1].strip() if part.count("\r\n\r\n") >= 2 else ""
+            self.state.count("google.batch.item")
+            if request_line is None:
+                status, value = 400, {"error": {"code": 400, "message": "Malformed batch part", "status": "INVALID_ARGUMENT"}}
+            else:
+                parts = urlsplit(request_line.group(2))
+                status, value = self.google(
+                    request_line.group(1), parts.path, parse_qs(parts.query),
+                    json.loads(inner_body) if inner_body.startswith("{") else {}, count=False
+                )
+                if status is None:
+                    status, value = 404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}}
+            if isinstance(value, bytes):
+                payload = value.decode("utf-8")
+            else:
+                payload = json.dumps(value) if value is not None else ""
+            output.append(
+                f"--{response_boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.group(1) if content_id else ''}>\r\n\r\n"
+                f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload.encode('utf-8'))}\r\n\r\n{payload}\r\n"
+            )
+        output.append(f"--{response_boundary}--\r\n")
+        return 200, f"multipart/mixed; boundary={response_boundary}", "".join(output).encode("utf-8")
+
+    def forward(self, method, raw, key):
+        """Record mode: forward to the real service and save the response"""
+        upstream = next((base for prefix, base in UPSTREAMS if self.path.startswith(prefix)), None)
+        if upstream is None:
+            return self.send_json({"error": "no upstream for path"}, 404)
+        headers = {
+            name: value for name, value in self.headers.items()
+            if name.lower() not in ("host", "content-length", "accept-encoding", "connection")
+        }
+        request = urllib.request.Request(upstream + self.path, data=raw or None, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                status, content_type, body = response.status, response.headers.get("Content-Type", "application/json"), response.read()
+        except urllib.error.HTTPError as error:
+            status, content_type, body = error.code, error.headers.get("Content-Type", "application/json"), error.read()
+        self.state.count("record")
+        self.state.record(key, status, content_type, body)
+        self.send_body(status, content_type, body)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for OpenAI, Gmail, Calendar and SerpAPI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0, help="latency of Google and SerpAPI calls")
+    parser.add_argument("--openai-latency-ms", type=float, default=0, help="latency of chat completions")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency jitter as a fraction")
+    parser.add_argument("--payload-bytes", type=int, default=200, help="size of snippets and answers")
+    parser.add_argument("--items", type=int, default=10, help="array length in structured outputs")
+    parser.add_argument("--mailbox-size", type=int, default=50)
+    parser.add_argument("--events-per-day", type=int, default=3)
+    parser.add_argument("--serp-results", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="FILE", help="forward to the real services and save responses")
+    mode.add_argument("--replay", metavar="FILE", help="serve saved responses, synthetic ones for misses")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def make_server(args):
+    random.seed(args.seed)
+    handler = type("Handler", (StandinHandler,), {"state": StandinState(args)})
+    return ThreadingHTTPServer((args.host, args.port), handler)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = make_server(args)
+    print(f"Stand-in listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,91 @@
 """
 OAuth authentication management with Google
 """
-import os
-import json
 from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from fastapi.responses import RedirectResponse
-from google.auth.transport.requests import Request as GoogleRequest
+from google.auth.credentials import AnonymousCredentials
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
+from starlette.concurrency import run_in_threadpool
 from starlette.status import HTTP_401_UNAUTHORIZED
 
-from app.config import SCOPES, CREDENTIALS_FILE, TOKEN_FILE, REDIRECT_URI, BASE_DIR
+from app.config import (
+    SCOPES, CREDENTIALS_FILE, TOKEN_FILE, USER_TOKEN_DIR, REDIRECT_URI, BASE_DIR, GOOGLE_API_ROOT,
+    MULTI_TENANT, SESSION_COOKIE_NAME, SESSION_COOKIE_MAX_AGE, CREDENTIAL_CACHE_SIZE, OAUTH_STATE_TTL
+)
 from app.models import AuthStatus
+from app.tenants import DEFAULT_USER, CredentialStore, LoginStates, new_session_token, user_id_for
+from app.token_client import broker_credentials
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-def get_credentials() -> Optional[Credentials]:
+credential_store = CredentialStore(
+    directory=BASE_DIR / USER_TOKEN_DIR,
+    default_path=BASE_DIR / TOKEN_FILE,
+    max_cached=CREDENTIAL_CACHE_SIZE
+)
+login_states = LoginStates(ttl=OAUTH_STATE_TTL)
+
+# The local stand-in does not check tokens
+_anonymous_credentials = AnonymousCredentials()
+
+
+def session_token(request: Request) -> Optional[str]:
     """
-    Get Google credentials or None if not authenticated
+    Session token of the request: Authorization: Bearer header or session cookie
     """
-    token_path = BASE_DIR / TOKEN_FILE
-    
-    creds = None
-    if token_path.exists():
-        try:
-            creds = Credentials.from_authorized_user_info(
-                json.loads(token_path.read_text()), SCOPES
-            )
-        except Exception:
-            return None
-    
-    # If credentials are expired but have refresh token
-    if creds and creds.expired and creds.refresh_token:
-        try:
-            creds.refresh(GoogleRequest())
-            # Save updated credentials
-            token_path.write_text(creds.to_json())
-        except Exception:
-            return None
-    
-    return creds if creds and creds.valid else None
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        return token.strip()
+    return request.cookies.get(SESSION_COOKIE_NAME) or None
+
+
+async def get_user_id(request: Request) -> str:
+    """
+    FastAPI dependency: ID of the signed-in user, or DEFAULT_USER
+    (the single-user token file) for requests without a session token
+    """
+    token = session_token(request)
+    return user_id_for(token) if token else DEFAULT_USER
+
+
+def load_credentials(user_id: str) -> Optional[Credentials]:
+    """
+    Load the user's Google credentials, refreshing them if needed (blocking)
+    """
+    if user_id == DEFAULT_USER:
+        # A running token broker keeps the token fresh; no refresh or file access here
+        creds = broker_credentials()
+        if creds is not None:
+            return creds
+
+    return credential_store.get(user_id)
 
 
-def require_auth(creds: Optional[Credentials] = Depends(get_credentials)):
+async def get_credentials(user_id: str = Depends(get_user_id)) -> Optional[Credentials]:
+    """
+    Get the user's Google credentials or None if not authenticated.
+    Credentials already in memory are returned right away; reading a token
+    file, refreshing or asking the token broker runs in a worker thread.
+    """
+    if user_id == DEFAULT_USER and MULTI_TENANT:
+        return None
+
+    if GOOGLE_API_ROOT:
+        return _anonymous_credentials
+
+    if user_id != DEFAULT_USER:
+        creds = credential_store.cached(user_id)
+        if creds is not None:
+            return creds
+
+    return await run_in_threadpool(load_credentials, user_id)
+
+
+async def require_auth(creds: Optional[Credentials] = Depends(get_credentials)):
     """
     FastAPI dependency to verify authentication
     """
@@ -60,7 +99,7 @@ def require_auth(creds: Optional[Credentials] = Depends(get_credentials)):
 
 
 @router.get("/authorize")
-async def authorize():
+async def authorize(user_id: str = Depends(get_user_id)):
     """
     Initiate OAuth authorization flow with Google
     """
@@ -86,21 +125,23 @@ async def authorize():
         prompt='consent'  # Force refresh_token request
     )
     
-    # Temporary state storage
-    os.environ["OAUTH_STATE"] = state
+    # Signed-in users re-authorize their own account; in multi-tenant mode,
+    # a login without session token creates a new user in the callback
+    pending_user = None if user_id == DEFAULT_USER and MULTI_TENANT else user_id
+    login_states.add(state, pending_user, getattr(flow, "code_verifier", None))
     
     # Redirect to Google authorization URL
     return RedirectResponse(authorization_url)
 
 
 @router.get("/callback")
-async def callback(code: str, state: str, request: Request):
+async def callback(code: str, state: str, response: Response):
     """
     OAuth callback after Google authorization
     """
-    stored_state = os.environ.get("OAUTH_STATE")
+    login = login_states.pop(state)
     
-    if not stored_state or state != stored_state:
+    if login is None:
         raise HTTPException(status_code=400, detail="Invalid OAuth state")
     
     credentials_path = BASE_DIR / CREDENTIALS_FILE
@@ -112,26 +153,51 @@ async def callback(code: str, state: str, request: Request):
         redirect_uri=REDIRECT_URI,
         state=state
     )
+    if login.code_verifier:
+        flow.code_verifier = login.code_verifier
     
     # Exchange code for token
     flow.fetch_token(code=code)
     credentials = flow.credentials
     
+    token = None
+    user_id = login.user_id
+    if user_id is None:
+        token = new_session_token()
+        user_id = user_id_for(token)
+    
     # Save token
-    token_path = BASE_DIR / TOKEN_FILE
-    token_path.parent.mkdir(exist_ok=True)
-    token_path.write_text(credentials.to_json())
+    credential_store.put(user_id, credentials)
     
-    return {"message": "Authentication successful! You can close this window."}
+    if token is None:
+        return {"message": "Authentication successful! You can close this window."}
+    
+    response.set_cookie(
+        SESSION_COOKIE_NAME, token, max_age=SESSION_COOKIE_MAX_AGE, httponly=True, samesite="lax"
+    )
+    return {
+        "message": "Authentication successful! You can close this window.",
+        "session_token": token
+    }
+
+
+@router.post("/logout")
+async def logout(response: Response, user_id: str = Depends(get_user_id)):
+    """
+    Delete the stored credentials of the signed-in user
+    """
+    if user_id == DEFAULT_USER:
+        raise HTTPException(status_code=400, detail="No session token given")
+    credential_store.delete(user_id)
+    response.delete_cookie(SESSION_COOKIE_NAME)
+    return {"message": "Signed out"}
 
 
 @router.get("/status", response_model=AuthStatus)
-async def auth_status():
+async def auth_status(creds: Optional[Credentials] = Depends(get_credentials)):
     """
     Check authentication status
     """
-    creds = get_credentials()
-    
     if not creds:
         return AuthStatus(
             authenticated=False,
@@ -139,8 +205,10 @@ async def auth_status():
             message="Not authenticated. Use /auth/authorize to connect."
         )
     
-    # Calculate expiration date
-    expires_at = datetime.now() + timedelta(seconds=creds.expiry.timestamp() - datetime.now().timestamp())
+    # Calculate expiration date (tokens of the local stand-in do not expire)
+    expires_at = None
+    if creds.expiry:
+        expires_at = datetime.now() + timedelta(seconds=creds.expiry.timestamp() - datetime.now().timestamp())
     
     return AuthStatus(
         authenticated=True,
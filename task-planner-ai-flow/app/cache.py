@@ -0,0 +1,92 @@
+"""
+In-memory response cache for task read endpoints
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from app.config import TASK_CACHE_TTL, TASK_CACHE_MAX_ENTRIES
+
+
+class CacheEntry:
+    """Serialized response body with its strong ETag"""
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses.
+    Entries expire after `ttl` seconds so changes made outside this service
+    (e.g. in the Google Calendar UI) are picked up; writes through this
+    service clear the cache immediately via invalidate().
+    Keys start with the owner (user) of the entry, so one user's write only
+    clears that user's entries.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self._owner_versions: Dict[Hashable, int] = {}
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, body: bytes) -> CacheEntry:
+        # Strong ETag: identical bytes always produce the same tag
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        entry = CacheEntry(body, etag, time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def version_of(self, owner: Hashable) -> Tuple[int, int]:
+        """Part of the key that changes whenever the owner's entries are invalidated"""
+        return self.version, self._owner_versions.get(owner, 0)
+
+    def invalidate(self, owner: Optional[Hashable] = None) -> None:
+        """Drop the owner's entries (or all entries) after a calendar has been modified"""
+        if owner is None:
+            self.version += 1
+            self._entries.clear()
+            return
+        self._owner_versions[owner] = self._owner_versions.get(owner, 0) + 1
+        for key in [key for key in self._entries if key[0] == owner]:
+            del self._entries[key]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against an ETag (weak comparison, RFC 9110)
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+# Shared cache for /tasks/today and /tasks/range
+task_cache = ResponseCache(ttl=TASK_CACHE_TTL, max_entries=TASK_CACHE_MAX_ENTRIES)
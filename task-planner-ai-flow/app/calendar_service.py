@@ -1,83 +1,257 @@
 """
 Google Calendar API interaction service
 """
-from datetime import datetime, date, time, timedelta
-from typing import List, Optional, Dict, Any
+import asyncio
+import contextvars
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import datetime, date, timedelta, timezone
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Callable
 
+import httplib2
 from fastapi import Depends, HTTPException
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.http import BatchHttpRequest
 from googleapiclient.errors import HttpError
 
-from app.auth import require_auth
-from app.models import Task, TaskCreate
-from app.config import CALENDAR_ID
+from app.auth import require_auth, get_user_id
+from app.models import Task, TaskCreate, BatchOperation, BatchItemResult, BatchResult, FreeBusy, TimeSlot
+from app.events import (
+    COMPLETED_PATCH, events_to_tasks, event_to_record, event_from_calendar, split_task_id, task_to_event
+)
+from app.cache import task_cache
+from app.telemetry import span
+from app.rate_limit import GoogleRateLimiter, calendar_limiter, calendar_rate_limiter
+from app.recurrence import recurrence_expander, parse_rfc3339, event_key
+from app.freebusy import (
+    FREEBUSY_MAX_CALENDARS, merge_intervals, free_slots, busy_from_freebusy, busy_from_events
+)
+from app.tenants import DEFAULT_USER, ClientPool
+from app.config import (
+    CALENDAR_ID, CALENDAR_IDS, EVENTS_PAGE_SIZE, BATCH_SIZE, GOOGLE_API_ROOT,
+    LOCAL_RECURRENCE_EXPANSION, GOOGLE_MAX_CONCURRENCY, CALENDAR_CLIENT_POOL_SIZE, CALENDAR_CLIENT_IDLE_TTL
+)
+
+# Shared by all requests: queries several calendars at once
+calendar_executor = ThreadPoolExecutor(max_workers=GOOGLE_MAX_CONCURRENCY, thread_name_prefix="calendar")
+
+
+class PrefetchedIterator:
+    """
+    Runs an iterator on its own thread and hands its items over through a
+    bounded queue. The producer starts at once, runs at most `depth` items
+    ahead of the consumer and stops at its next item after close().
+    Exceptions are re-raised on the consumer side.
+    """
+    _END = object()
+    
+    def __init__(self, iterator: Iterator[Any], depth: int):
+        self._items: queue.Queue = queue.Queue(maxsize=depth)
+        self._stopped = threading.Event()
+        self._done = False
+        # Copy the context so spans of the producer belong to the request's trace
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._run, iterator), daemon=True).start()
+    
+    def _offer(self, item: Tuple[Any, Optional[BaseException]]) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def _run(self, iterator: Iterator[Any]) -> None:
+        try:
+            for item in iterator:
+                if not self._offer((item, None)):
+                    return
+            self._offer((self._END, None))
+        except Exception as error:
+            self._offer((self._END, error))
+    
+    def __iter__(self) -> "PrefetchedIterator":
+        return self
+    
+    def __next__(self) -> Any:
+        if self._done:
+            raise StopIteration
+        item, error = self._items.get()
+        if item is self._END:
+            self._done = True
+            if error is not None:
+                raise error
+            raise StopIteration
+        return item
+    
+    def close(self) -> None:
+        self._done = True
+        self._stopped.set()
+
+
+# httplib2 is not thread-safe: each worker thread keeps one connection pool,
+# shared by all users, and credentials are attached per request
+_thread_http = threading.local()
+
+
+def shared_http() -> httplib2.Http:
+    """The calling thread's connections to the Google API"""
+    http = getattr(_thread_http, 'http', None)
+    if http is None:
+        http = _thread_http.http = httplib2.Http()
+    return http
+
+
+@lru_cache(maxsize=None)
+def calendar_api():
+    """
+    Calendar API resource, built once per process and shared by all users.
+    It holds no credentials: every call runs on an AuthorizedHttp of the user.
+    """
+    if GOOGLE_API_ROOT:
+        return build(
+            'calendar', 'v3', http=httplib2.Http(),
+            client_options={'api_endpoint': GOOGLE_API_ROOT.rstrip('/') + '/calendar/v3/'}
+        )
+    return build('calendar', 'v3', http=httplib2.Http())
+
+
+@lru_cache(maxsize=None)
+def calendar_resource(name: str):
+    """
+    Collection of the Calendar API, e.g. "events". Each calendar_api().events()
+    call builds its methods from the discovery document again, so the
+    collections are built once as well.
+    """
+    return getattr(calendar_api(), name)()
 
 
 class CalendarService:
     """Service to interact with Google Calendar API"""
     
-    def __init__(self, credentials: Credentials):
+    def __init__(self, credentials: Credentials, user_id: str = DEFAULT_USER,
+                 limiter: GoogleRateLimiter = calendar_limiter):
         """Initialize the service with Google credentials"""
-        self.service = build('calendar', 'v3', credentials=credentials)
+        self.service = calendar_api()
+        self.user_id = user_id
+        self.limiter = limiter
         self.calendar_id = CALENDAR_ID
+        self.calendar_ids = CALENDAR_IDS
+        self.credentials = credentials
+    
+    def use_credentials(self, credentials: Credentials) -> None:
+        """Switch to new credentials, e.g. a new token from the broker"""
+        self.credentials = credentials
+    
+    def _http(self) -> AuthorizedHttp:
+        """
+        The user's credentials on the calling thread's shared connections.
+        Wrapping is cheap, so no connection is bound to a user.
+        """
+        return AuthorizedHttp(self.credentials, http=shared_http())
+    
+    def _execute(self, request, **kwargs) -> Any:
+        """
+        Execute a Google API request on the calling thread's connection,
+        paced and retried by the calendar rate limiter
+        """
+        with span(getattr(request, 'methodId', None) or 'calendar.request'):
+            return self.limiter.execute(request, http=self._http(), **kwargs)
+    
+    async def _execute_async(self, request) -> Any:
+        """Execute a Google API request in a worker thread without blocking the event loop"""
+        return await asyncio.to_thread(self._execute, request)
     
     async def get_tasks_for_day(self, day: date) -> List[Task]:
         """
         Get tasks/events for a specific day
         """
-        # Define time limits for the day
-        time_min = datetime(day.year, day.month, day.day, 0, 0, 0).isoformat() + 'Z'
-        time_max = datetime(day.year, day.month, day.day, 23, 59, 59).isoformat() + 'Z'
+        return await self.get_tasks_for_range(day, day)
+    
+    def iter_events(self, time_min: str, time_max: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the events of a time window in start order, across all
+        configured calendars. Each calendar is listed on its own thread and
+        k-way merged while its pages arrive, so latency follows the slowest
+        calendar and at most about two pages per calendar are held in memory.
+        Events are tagged with their calendar, so writes go back to it.
+        """
+        def listing(calendar_id: str) -> Iterator[Dict[str, Any]]:
+            for event in self.iter_calendar_events(calendar_id, time_min, time_max):
+                if event.get('start'):
+                    yield event_from_calendar(event, calendar_id)
         
+        if len(self.calendar_ids) == 1:
+            yield from listing(self.calendar_ids[0])
+            return
+        
+        listings = [PrefetchedIterator(listing(calendar_id), EVENTS_PAGE_SIZE) for calendar_id in self.calendar_ids]
         try:
-            # Call to Google Calendar API
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
+            seen = set()
+            for event in heapq.merge(*listings, key=event_key):
+                # An invitation shown in several calendars is returned once
+                key = (event.get('iCalUID') or event['id'], event_key(event))
+                if key not in seen:
+                    seen.add(key)
+                    yield event
+        finally:
+            # Stops the listings of a client that went away mid-stream
+            for prefetched in listings:
+                prefetched.close()
+    
+    def iter_calendar_events(self, calendar_id: str, time_min: str, time_max: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the events of one calendar in start order.
+        With LOCAL_RECURRENCE_EXPANSION, recurring series are fetched once as
+        masters and expanded locally instead of being listed instance by instance.
+        """
+        if LOCAL_RECURRENCE_EXPANSION:
+            events = self.iter_event_pages(calendar_id, time_min, time_max, single_events=False)
+            yield from recurrence_expander.expand(events, parse_rfc3339(time_min), parse_rfc3339(time_max))
+            return
+        yield from self.iter_event_pages(calendar_id, time_min, time_max)
+    
+    def iter_event_pages(self, calendar_id: str, time_min: str, time_max: str,
+                         single_events: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the listed events of a time window, one page at a time.
+        Follows nextPageToken so large ranges are never truncated.
+        """
+        page_token = None
+        while True:
+            # orderBy=startTime is only allowed for expanded instances
+            order = {'orderBy': 'startTime'} if single_events else {}
+            events_result = self._execute(calendar_resource('events').list(
+                calendarId=calendar_id,
                 timeMin=time_min,
                 timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime',
-                maxResults=2500
-            ).execute(num_retries=0)
-            
-            events = events_result.get('items', [])
+                singleEvents=single_events,
+                maxResults=EVENTS_PAGE_SIZE,
+                pageToken=page_token,
+                **order
+            ), num_retries=0)
             
-            # Convert to Task models
-            tasks = []
-            for event in events:
-                if not event.get('summary'):
-                    continue
-                    
-                # Extract date and time
-                start = event.get('start', {})
-                if 'dateTime' in start:
-                    # Format with time
-                    dt = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
-                    task_date = dt.date()
-                    task_time = dt.time()
-                else:
-                    # All-day format
-                    task_date = datetime.fromisoformat(start['date']).date()
-                    task_time = None
-                
-                # Check if task is completed (via description)
-                description = event.get('description', '')
-                is_completed = "[COMPLETED]" in description
-                
-                # Clean description
-                clean_description = description.replace("[COMPLETED]", "").strip()
-                
-                tasks.append(Task(
-                    id=event['id'],
-                    title=event['summary'],
-                    date=task_date,
-                    time=task_time.strftime('%H:%M:%S') if task_time else None,
-                    description=clean_description if clean_description else None,
-                    is_completed=is_completed
-                ))
+            yield from events_result.get('items', [])
             
-            return tasks
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                break
+    
+    def iter_tasks_for_range(self, start_date: date, end_date: date) -> Iterator[Task]:
+        """
+        Lazily yield tasks/events for a date range, page by page
+        """
+        time_min = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0).isoformat() + 'Z'
+        time_max = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).isoformat() + 'Z'
+        
+        try:
+            yield from events_to_tasks(self.iter_events(time_min, time_max))
             
         except HttpError as error:
             raise HTTPException(status_code=500, detail=f"Google Calendar Error: {error}")
@@ -86,102 +260,86 @@ class CalendarService:
         """
         Get tasks/events for a date range
         """
-        time_min = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0).isoformat() + 'Z'
-        time_max = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).isoformat() + 'Z'
+        return await asyncio.to_thread(list, self.iter_tasks_for_range(start_date, end_date))
+    
+    def query_free_busy(self, start_date: date, end_date: date) -> FreeBusy:
+        """
+        Merged free/busy view of all configured calendars. Uses freeBusy.query,
+        which covers up to 50 calendars per call and returns only busy intervals;
+        calendars it cannot read (e.g. no free/busy access) fall back to listing events.
+        """
+        time_min = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc)
+        time_max = datetime(end_date.year, end_date.month, end_date.day, tzinfo=timezone.utc) + timedelta(days=1)
+        
+        def query(calendar_ids: List[str]) -> Dict[str, Any]:
+            return self._execute(calendar_resource('freebusy').query(body={
+                'timeMin': time_min.isoformat(),
+                'timeMax': time_max.isoformat(),
+                'items': [{'id': calendar_id} for calendar_id in calendar_ids]
+            }))
         
+        chunks = [
+            self.calendar_ids[offset:offset + FREEBUSY_MAX_CALENDARS]
+            for offset in range(0, len(self.calendar_ids), FREEBUSY_MAX_CALENDARS)
+        ]
+        intervals = []
+        errors = {}
         try:
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime',
-                maxResults=2500
-            ).execute(num_retries=0)
+            for result in calendar_executor.map(query, chunks):
+                busy, failed = busy_from_freebusy(result)
+                intervals.extend(busy)
+                errors.update(failed)
             
-            events = events_result.get('items', [])
-            
-            tasks = []
-            for event in events:
-                # Skip events without title
-                if not event.get('summary'):
-                    continue
-                    
-                start = event.get('start', {})
-                if 'dateTime' in start:
-                    # Handle datetime with timezone
-                    dt_str = start['dateTime']
-                    if 'T' in dt_str:
-                        # Remove timezone info for parsing
-                        dt_str = dt_str.split('T')[0] + 'T' + dt_str.split('T')[1].split('+')[0].split('-')[0].split('Z')[0]
-                        dt = datetime.fromisoformat(dt_str)
-                        task_date = dt.date()
-                        task_time = dt.time()
-                    else:
-                        task_date = datetime.fromisoformat(dt_str).date()
-                        task_time = None
-                elif 'date' in start:
-                    # All-day event
-                    task_date = datetime.fromisoformat(start['date']).date()
-                    task_time = None
-                else:
-                    continue
-                
-                description = event.get('description', '')
-                is_completed = "[COMPLETED]" in description
-                clean_description = description.replace("[COMPLETED]", "").strip()
-                
-                tasks.append(Task(
-                    id=event['id'],
-                    title=event.get('summary', 'Untitled'),
-                    date=task_date,
-                    time=task_time.strftime('%H:%M:%S') if task_time else None,
-                    description=clean_description if clean_description else None,
-                    is_completed=is_completed
-                ))
-            
-            return tasks
+            def listing(calendar_id: str):
+                try:
+                    return busy_from_events(self.iter_calendar_events(calendar_id, time_min.isoformat(), time_max.isoformat()))
+                except HttpError:
+                    return None
             
+            failed_ids = list(errors)
+            for calendar_id, busy in zip(failed_ids, calendar_executor.map(listing, failed_ids)):
+                if busy is not None:
+                    intervals.extend(busy)
+                    del errors[calendar_id]
+        
         except HttpError as error:
             raise HTTPException(status_code=500, detail=f"Google Calendar Error: {error}")
+        
+        busy = merge_intervals(intervals)
+        return FreeBusy(
+            time_min=time_min,
+            time_max=time_max,
+            calendars=self.calendar_ids,
+            busy=[TimeSlot(start=start, end=end) for start, end in busy],
+            free=[TimeSlot(start=start, end=end) for start, end in free_slots(busy, time_min, time_max)],
+            errors=errors
+        )
+    
+    async def get_free_busy(self, start_date: date, end_date: date) -> FreeBusy:
+        """
+        Merged free/busy view for a date range
+        """
+        return await asyncio.to_thread(self.query_free_busy, start_date, end_date)
+    
+    def _locate(self, task_id: str) -> Tuple[str, str]:
+        """(calendar ID, event ID) of a task"""
+        try:
+            return split_task_id(task_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid task ID: {task_id}")
     
     async def create_task(self, task: TaskCreate) -> Task:
         """
         Create a new task in Google Calendar
         """
-        event = {
-            'summary': task.title,
-            'description': task.description or '',
-        }
-        
-        if task.time:
-            if isinstance(task.time, str):
-                time_parts = task.time.split(':')
-                hour, minute = int(time_parts[0]), int(time_parts[1])
-                second = int(time_parts[2]) if len(time_parts) > 2 else 0
-            else:
-                hour, minute, second = task.time.hour, task.time.minute, task.time.second
-            
-            start_datetime = datetime(task.date.year, task.date.month, task.date.day, hour, minute, second)
-            end_datetime = start_datetime + timedelta(hours=1)
-            
-            event['start'] = {
-                'dateTime': start_datetime.isoformat(),
-                'timeZone': 'UTC'
-            }
-            event['end'] = {
-                'dateTime': end_datetime.isoformat(),
-                'timeZone': 'UTC'
-            }
-        else:
-            event['start'] = {'date': task.date.isoformat()}
-            event['end'] = {'date': task.date.isoformat()}
+        event = task_to_event(task)
         
         try:
-            created_event = self.service.events().insert(
+            created_event = await self._execute_async(calendar_resource('events').insert(
                 calendarId=self.calendar_id,
                 body=event
-            ).execute()
+            ))
+            task_cache.invalidate(self.user_id)
             
             return Task(
                 id=created_event['id'],
@@ -199,41 +357,19 @@ class CalendarService:
         """
         Update an existing task
         """
+        calendar_id, event_id = self._locate(task_id)
         try:
-            event = {
-                'summary': task.title,
-                'description': task.description or '',
-            }
-            
-            if task.time:
-                time_str = str(task.time)
-                time_parts = time_str.split(':')
-                hour, minute = int(time_parts[0]), int(time_parts[1])
-                second = int(time_parts[2]) if len(time_parts) > 2 else 0
-                
-                start_datetime = datetime(task.date.year, task.date.month, task.date.day, hour, minute, second)
-                end_datetime = start_datetime + timedelta(hours=1)
-                
-                event['start'] = {
-                    'dateTime': start_datetime.isoformat(),
-                    'timeZone': 'UTC'
-                }
-                event['end'] = {
-                    'dateTime': end_datetime.isoformat(),
-                    'timeZone': 'UTC'
-                }
-            else:
-                event['start'] = {'date': task.date.isoformat()}
-                event['end'] = {'date': task.date.isoformat()}
+            event = task_to_event(task)
             
-            updated_event = self.service.events().update(
-                calendarId=self.calendar_id,
-                eventId=task_id,
+            await self._execute_async(calendar_resource('events').update(
+                calendarId=calendar_id,
+                eventId=event_id,
                 body=event
-            ).execute()
+            ))
+            task_cache.invalidate(self.user_id)
             
             return Task(
-                id=updated_event['id'],
+                id=task_id,
                 title=task.title,
                 date=task.date,
                 time=task.time,
@@ -248,11 +384,13 @@ class CalendarService:
         """
         Delete a task
         """
+        calendar_id, event_id = self._locate(task_id)
         try:
-            self.service.events().delete(
-                calendarId=self.calendar_id,
-                eventId=task_id
-            ).execute()
+            await self._execute_async(calendar_resource('events').delete(
+                calendarId=calendar_id,
+                eventId=event_id
+            ))
+            task_cache.invalidate(self.user_id)
             
             return {"message": "Task deleted successfully"}
             
@@ -263,49 +401,122 @@ class CalendarService:
         """
         Mark a task as done
         """
+        calendar_id, event_id = self._locate(task_id)
         try:
-            event = self.service.events().get(
-                calendarId=self.calendar_id,
-                eventId=task_id
-            ).execute()
+            # One round trip: patch only the completion flag, no read-modify-write
+            updated_event = await self._execute_async(calendar_resource('events').patch(
+                calendarId=calendar_id,
+                eventId=event_id,
+                body=COMPLETED_PATCH
+            ))
+            task_cache.invalidate(self.user_id)
             
-            description = event.get('description', '')
-            if "[COMPLETED]" not in description:
-                event['description'] = f"[COMPLETED] {description}"
+            record = event_to_record(event_from_calendar(updated_event, calendar_id))
+            if record is None:
+                raise HTTPException(status_code=500, detail="Task update error: event has no title or start")
+            return record.to_task()
             
-            updated_event = self.service.events().update(
-                calendarId=self.calendar_id,
-                eventId=task_id,
-                body=event
-            ).execute()
-            
-            start = updated_event.get('start', {})
-            if 'dateTime' in start:
-                dt = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
-                task_date = dt.date()
-                task_time = dt.time()
+        except HttpError as error:
+            raise HTTPException(status_code=500, detail=f"Task update error: {error}")
+    
+    def _execute_batch(self, requests: List[Tuple[str, Any]], callback: Callable, idempotent: bool = True) -> None:
+        """
+        Send requests through Google's HTTP batch interface,
+        at most BATCH_SIZE calls per HTTP round trip.
+        Batches with inserts must pass idempotent=False: they are then not
+        retried after a 5xx, which may come after the events were created.
+        """
+        for offset in range(0, len(requests), BATCH_SIZE):
+            if GOOGLE_API_ROOT:
+                # The batch URI comes from the discovery document, not from api_endpoint
+                batch = BatchHttpRequest(callback=callback, batch_uri=GOOGLE_API_ROOT.rstrip('/') + '/batch/calendar/v3')
             else:
-                task_date = datetime.fromisoformat(start['date']).date()
-                task_time = None
-            
-            description = updated_event.get('description', '')
-            clean_description = description.replace("[COMPLETED]", "").strip()
-            
-            return Task(
-                id=updated_event['id'],
-                title=updated_event['summary'],
-                date=task_date,
-                time=task_time,
-                description=clean_description if clean_description else None,
-                is_completed=True
+                batch = self.service.new_batch_http_request(callback=callback)
+            for request_id, request in requests[offset:offset + BATCH_SIZE]:
+                batch.add(request, request_id=request_id)
+            size = len(requests[offset:offset + BATCH_SIZE])
+            with span('calendar.batch', size=size):
+                # Each call in a batch counts against the quota separately
+                self.limiter.call(
+                    lambda: batch.execute(http=self._http()), 'calendar.batch', cost=size, idempotent=idempotent
+                )
+    
+    async def batch_tasks(self, operations: List[BatchOperation]) -> BatchResult:
+        """
+        Run create/update/delete/done operations in as few round trips as possible.
+        Each operation gets its own result; one failure does not abort the others.
+        """
+        results: List[Optional[BatchItemResult]] = [None] * len(operations)
+        # Calendar each operation writes to: new tasks go to CALENDAR_ID,
+        # changes to the calendar the task was read from
+        calendar_ids: List[str] = [self.calendar_id] * len(operations)
+        
+        def on_write(request_id, response, exception):
+            index = int(request_id)
+            if exception is not None:
+                results[index] = BatchItemResult(
+                    index=index, op=operations[index].op, success=False, error=str(exception)
+                )
+                return
+            record = event_to_record(event_from_calendar(response, calendar_ids[index])) if response else None
+            results[index] = BatchItemResult(
+                index=index,
+                op=operations[index].op,
+                success=True,
+                task=record.to_task() if record else None
             )
+        
+        events = calendar_resource('events')
+        try:
+            writes = []
+            for index, op in enumerate(operations):
+                if op.op == "create":
+                    writes.append((str(index), events.insert(calendarId=self.calendar_id, body=task_to_event(op.task))))
+                    continue
+                try:
+                    calendar_id, event_id = split_task_id(op.task_id)
+                except ValueError:
+                    results[index] = BatchItemResult(
+                        index=index, op=op.op, success=False, error=f"Invalid task ID: {op.task_id}"
+                    )
+                    continue
+                calendar_ids[index] = calendar_id
+                if op.op == "update":
+                    request = events.update(calendarId=calendar_id, eventId=event_id, body=task_to_event(op.task))
+                elif op.op == "delete":
+                    request = events.delete(calendarId=calendar_id, eventId=event_id)
+                else:
+                    request = events.patch(calendarId=calendar_id, eventId=event_id, body=COMPLETED_PATCH)
+                writes.append((str(index), request))
+            
+            creates = any(op.op == "create" for op in operations)
+            await asyncio.to_thread(self._execute_batch, writes, on_write, not creates)
             
         except HttpError as error:
-            raise HTTPException(status_code=500, detail=f"Task update error: {error}")
+            raise HTTPException(status_code=500, detail=f"Batch error: {error}")
+        finally:
+            # Some operations may have been applied even if the batch failed
+            task_cache.invalidate(self.user_id)
+        
+        succeeded = sum(1 for result in results if result.success)
+        return BatchResult(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+def create_calendar_service(user_id: str, credentials: Credentials) -> CalendarService:
+    limiter = calendar_limiter if user_id == DEFAULT_USER else calendar_rate_limiter()
+    return CalendarService(credentials, user_id, limiter)
+
+
+calendar_pool = ClientPool(
+    "calendar", create_calendar_service, max_clients=CALENDAR_CLIENT_POOL_SIZE, idle_ttl=CALENDAR_CLIENT_IDLE_TTL
+)
 
 
-def get_calendar_service(credentials: Credentials = Depends(require_auth)) -> CalendarService:
+async def get_calendar_service(
+    user_id: str = Depends(get_user_id),
+    credentials: Credentials = Depends(require_auth)
+) -> CalendarService:
     """
-    FastAPI dependency to get Calendar service
+    FastAPI dependency to get the user's pooled Calendar service
     """
-    return CalendarService(credentials)
\ No newline at end of file
+    return calendar_pool.get(user_id, credentials)
\ No newline at end of file
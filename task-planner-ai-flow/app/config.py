@@ -12,6 +12,8 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 CREDENTIALS_FILE = os.getenv("GOOGLE_CALENDAR_CREDENTIALS_FILE", "credentials/credentials.json")
 TOKEN_FILE = os.getenv("GOOGLE_CALENDAR_TOKEN_FILE", "credentials/token.json")
+# Token files of users signed in with a session token, one file per user
+USER_TOKEN_DIR = os.getenv("USER_TOKEN_DIR", "credentials/users")
 
 # FastAPI Configuration
 FASTAPI_HOST = os.getenv("FASTAPI_HOST", "0.0.0.0")
@@ -20,6 +22,39 @@ DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 
 # Google Calendar API
 CALENDAR_ID = os.getenv("CALENDAR_ID", "primary")
+# Calendars read concurrently and merged into one stream (comma-separated). New tasks go to
+# CALENDAR_ID; changes go to the calendar a task was read from (encoded in its task ID)
+CALENDAR_IDS = [
+    calendar_id.strip()
+    for calendar_id in os.getenv("CALENDAR_IDS", CALENDAR_ID).split(",")
+    if calendar_id.strip()
+]
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "250"))
+# Expand recurring events locally (singleEvents=False) instead of listing every instance
+LOCAL_RECURRENCE_EXPANSION = os.getenv("LOCAL_RECURRENCE_EXPANSION", "False").lower() in ("true", "1", "t")
+# Parsed recurring series kept in memory
+RECURRENCE_CACHE_SIZE = int(os.getenv("RECURRENCE_CACHE_SIZE", "1024"))
+# Maximum number of calls sent in one Google HTTP batch request
+BATCH_SIZE = int(os.getenv("GOOGLE_BATCH_SIZE", "50"))
+# Alternative root URL for Google APIs, e.g. the local stand-in (standin/server.py).
+# When set, requests go there with anonymous credentials.
+GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT", "")
+# Local token broker (token_broker/broker.py); the token file is used when it is not running
+TOKEN_BROKER_SOCKET = os.getenv("TOKEN_BROKER_SOCKET", "/tmp/abbesynapse-token-broker.sock")
+TOKEN_BROKER_ACCOUNT = os.getenv("TOKEN_BROKER_ACCOUNT", "planner")
+# Client-side rate limiting and retries for Google API calls
+CALENDAR_QUOTA_PER_SECOND = float(os.getenv("CALENDAR_QUOTA_PER_SECOND", "10"))
+CALENDAR_QUOTA_BURST = float(os.getenv("CALENDAR_QUOTA_BURST", "20"))
+GOOGLE_MAX_CONCURRENCY = int(os.getenv("GOOGLE_MAX_CONCURRENCY", "8"))
+GOOGLE_MAX_RETRIES = int(os.getenv("GOOGLE_MAX_RETRIES", "5"))
+GOOGLE_BACKOFF_BASE = float(os.getenv("GOOGLE_BACKOFF_BASE", "0.5"))
+GOOGLE_BACKOFF_MAX = float(os.getenv("GOOGLE_BACKOFF_MAX", "32"))
+# Rate limiter and token broker client shared with the Backend agents
+SHARED_MODULES_DIR = BASE_DIR.parent / "Backend"
+
+# Response cache for /tasks/today and /tasks/range
+TASK_CACHE_TTL = float(os.getenv("TASK_CACHE_TTL", "60"))
+TASK_CACHE_MAX_ENTRIES = int(os.getenv("TASK_CACHE_MAX_ENTRIES", "256"))
 SCOPES = [
     "https://www.googleapis.com/auth/calendar",
     "https://www.googleapis.com/auth/gmail.readonly",
@@ -29,6 +64,78 @@ SCOPES = [
 
 # OAuth Redirection
 REDIRECT_URI = os.getenv("REDIRECT_URI", "http://localhost:8000/auth/callback")
+# Pending logins (state parameter of /auth/authorize) expire after this many seconds
+OAUTH_STATE_TTL = float(os.getenv("OAUTH_STATE_TTL", "600"))
+
+# Multi-tenant mode: every user signs in via /auth/authorize and sends the returned
+# session token (cookie or Authorization: Bearer). Without it, requests without a
+# token use the single-user token file (TOKEN_FILE) as before.
+MULTI_TENANT = os.getenv("MULTI_TENANT", "False").lower() in ("true", "1", "t")
+SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "planner_session")
+SESSION_COOKIE_MAX_AGE = int(os.getenv("SESSION_COOKIE_MAX_AGE", str(90 * 24 * 3600)))
+# Loaded user credentials kept in memory; others are read from USER_TOKEN_DIR on demand
+CREDENTIAL_CACHE_SIZE = int(os.getenv("CREDENTIAL_CACHE_SIZE", "10000"))
+# Per-user Calendar clients kept between requests, and how long an idle one is kept
+CALENDAR_CLIENT_POOL_SIZE = int(os.getenv("CALENDAR_CLIENT_POOL_SIZE", "1000"))
+CALENDAR_CLIENT_IDLE_TTL = float(os.getenv("CALENDAR_CLIENT_IDLE_TTL", "900"))
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Alternative OpenAI-compatible endpoint, e.g. http://localhost:8090/v1 for the stand-in
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+# Shared OpenAI HTTP client (connection pool, timeouts, retries)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "True").lower() in ("true", "1", "t")
+# Maximum number of model rounds per /chat request (tool calls + final answer)
+CHAT_MAX_STEPS = int(os.getenv("CHAT_MAX_STEPS", "4"))
+
+# Conversation sessions for /chat
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "2000"))
+# Verbatim turns kept; beyond this (or the token budget) the older half is summarized
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "20"))
+SESSION_SUMMARY_MAX_CHARS = int(os.getenv("SESSION_SUMMARY_MAX_CHARS", "2000"))
+
+# Intent cache: reuse tool calls chosen for similar earlier messages
+INTENT_CACHE_ENABLED = os.getenv("INTENT_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "512"))
+INTENT_CACHE_THRESHOLD = float(os.getenv("INTENT_CACHE_THRESHOLD", "0.85"))
+INTENT_CACHE_FUNCTIONS = [
+    name.strip()
+    for name in os.getenv("INTENT_CACHE_FUNCTIONS", "get_today_tasks,get_tasks_range").split(",")
+    if name.strip()
+]
+
+# Telemetry: log every span as a JSON line (metrics on /metrics are always collected)
+TELEMETRY_LOG_SPANS = os.getenv("TELEMETRY_LOG_SPANS", "False").lower() in ("true", "1", "t")
+
+# Local rendering of simple tool results (skips the presentation model call)
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "True").lower() in ("true", "1", "t")
+FAST_PATH_FUNCTIONS = [
+    name.strip()
+    for name in os.getenv(
+        "FAST_PATH_FUNCTIONS", "get_today_tasks,get_tasks_range,create_task,mark_task_done,batch_tasks"
+    ).split(",")
+    if name.strip()
+]
+FAST_PATH_MAX_TASKS = int(os.getenv("FAST_PATH_MAX_TASKS", "25"))
+# Messages matching this pattern need the model to reason over the results
+FAST_PATH_SKIP_PATTERN = os.getenv(
+    "FAST_PATH_SKIP_PATTERN",
+    r"\b(free|frei|busy|conflict\w*|konflikt\w*|overlap\w*|summar\w*|zusammenfass\w*|recommend\w*|empfehl\w*|why|warum|should|sollte)\b"
+)
+# Tools that change the calendar; a step with one of them can end the turn
+FAST_PATH_WRITE_FUNCTIONS = {"create_task", "mark_task_done", "batch_tasks"}
+# Messages asking for a change: a read-only step only prepares the write, so the model continues
+FAST_PATH_ACTION_PATTERN = os.getenv(
+    "FAST_PATH_ACTION_PATTERN",
+    r"\b(mark\w*|markier\w*|done|erledigt|add|hinzufüg\w*|create|erstell\w*|anleg\w*|trag\w*|"
+    r"delete|lösch\w*|remove|entfern\w*|cancel\w*|absag\w*|move|verschieb\w*|reschedule|update|änder\w*|"
+    r"rename|umbenenn\w*|plan\w*|schedule)\b"
+)
@@ -0,0 +1,92 @@
+"""
+Conversion between Google Calendar events and tasks
+
+The event parsing and event bodies are Backend/calendar_events.py, shared
+with calendar_agent; this module turns them into the planner's models.
+"""
+import sys
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.config import CALENDAR_ID, SHARED_MODULES_DIR
+from app.models import Task, TaskCreate
+
+sys.path.append(str(SHARED_MODULES_DIR))
+import calendar_events
+from calendar_events import event_body, event_fields
+
+# Request body for events().patch that marks an event as completed
+COMPLETED_PATCH = calendar_events.COMPLETED_PATCH
+
+
+class TaskRecord:
+    """
+    Compact internal task representation.
+    Built from trusted Google data, so no validation is performed.
+    """
+    __slots__ = ("id", "title", "date", "time", "description", "is_completed")
+
+    def __init__(self, id: str, title: str, date: date, time: Optional[str],
+                 description: Optional[str], is_completed: bool):
+        self.id = id
+        self.title = title
+        self.date = date
+        self.time = time
+        self.description = description
+        self.is_completed = is_completed
+
+    def to_task(self) -> Task:
+        """
+        Build the API model. Validating the already typed fields in pydantic's
+        core is about twice as fast as model_construct's Python loop.
+        """
+        return Task(
+            id=self.id,
+            title=self.title,
+            date=self.date,
+            time=self.time,
+            description=self.description,
+            is_completed=self.is_completed
+        )
+
+
+def event_to_record(event: Dict[str, Any]) -> Optional[TaskRecord]:
+    """
+    Convert a Google Calendar event into a TaskRecord.
+    Returns None for events without title or start.
+    """
+    fields = event_fields(event)
+    return TaskRecord(*fields) if fields is not None else None
+
+
+def events_to_tasks(events: Iterable[Dict[str, Any]]) -> Iterator[Task]:
+    """
+    Lazily convert events into Task models, skipping unusable events
+    """
+    for event in events:
+        record = event_to_record(event)
+        if record is not None:
+            yield record.to_task()
+
+
+def event_from_calendar(event: Dict[str, Any], calendar_id: str) -> Dict[str, Any]:
+    """
+    Tag an event with the calendar it was read from, so the task ID
+    routes later writes there (events of CALENDAR_ID stay untagged)
+    """
+    return calendar_events.from_calendar(event, calendar_id, CALENDAR_ID)
+
+
+def split_task_id(task_id: str) -> Tuple[str, str]:
+    """
+    (calendar ID, event ID) a task ID refers to.
+    Raises ValueError for a malformed task ID.
+    """
+    return calendar_events.split_task_id(task_id, CALENDAR_ID)
+
+
+def task_to_event(task: TaskCreate) -> Dict[str, Any]:
+    """
+    Build the Google Calendar event body for a task
+    """
+    return event_body(task.title, task.date, task.time, task.description)
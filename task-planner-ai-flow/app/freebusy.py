@@ -0,0 +1,72 @@
+"""
+Free/busy computation over several calendars
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.recurrence import parse_event_time, parse_rfc3339
+
+Interval = Tuple[datetime, datetime]
+
+# Calendars per freeBusy.query call (Google's calendarExpansionMax)
+FREEBUSY_MAX_CALENDARS = 50
+
+
+def as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime; all-day (naive) values count as UTC midnight"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and coalesce overlapping or touching intervals"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(busy: List[Interval], time_min: datetime, time_max: datetime) -> List[Interval]:
+    """Gaps between merged busy intervals within [time_min, time_max)"""
+    free: List[Interval] = []
+    cursor = time_min
+    for start, end in busy:
+        if start > cursor:
+            free.append((cursor, min(start, time_max)))
+        cursor = max(cursor, end)
+        if cursor >= time_max:
+            break
+    if cursor < time_max:
+        free.append((cursor, time_max))
+    return [(start, end) for start, end in free if start < end]
+
+
+def busy_from_freebusy(result: Dict[str, Any]) -> Tuple[List[Interval], Dict[str, str]]:
+    """Busy intervals and per-calendar errors of a freeBusy.query response"""
+    intervals: List[Interval] = []
+    errors: Dict[str, str] = {}
+    for calendar_id, calendar in result.get('calendars', {}).items():
+        if calendar.get('errors'):
+            errors[calendar_id] = ", ".join(error.get('reason', 'unknown') for error in calendar['errors'])
+            continue
+        intervals.extend(
+            (parse_rfc3339(slot['start']), parse_rfc3339(slot['end'])) for slot in calendar.get('busy', [])
+        )
+    return intervals, errors
+
+
+def busy_from_events(events: Iterable[Dict[str, Any]]) -> List[Interval]:
+    """Busy intervals of listed events, skipping events marked as free (transparent)"""
+    intervals: List[Interval] = []
+    for event in events:
+        if event.get('transparency') == 'transparent' or not event.get('start'):
+            continue
+        start = as_utc(parse_event_time(event['start'])[0])
+        end = as_utc(parse_event_time(event.get('end') or event['start'])[0])
+        intervals.append((start, max(start, end)))
+    return intervals
@@ -0,0 +1,187 @@
+"""
+Intent cache for the chat assistant: reuses the tool calls chosen for
+similar earlier messages so the tool-selection model call can be skipped
+"""
+import json
+import re
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from app.config import (
+    INTENT_CACHE_ENABLED, INTENT_CACHE_SIZE, INTENT_CACHE_THRESHOLD, INTENT_CACHE_FUNCTIONS
+)
+
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+APOSTROPHES = re.compile(r"['’]")
+NON_WORD = re.compile(r"[^\w\s]+")
+WHITESPACE = re.compile(r"\s+")
+
+# Words that change which dates a message refers to; they must match exactly
+DATE_WORDS = frozenset({
+    "today", "tonight", "tomorrow", "yesterday", "next", "this", "last", "week", "weeks", "weekend",
+    "month", "months", "day", "days", "all", "upcoming",
+    "heute", "morgen", "übermorgen", "gestern", "nächste", "nächsten", "nächster", "diese", "dieser",
+    "diesen", "letzte", "woche", "wochen", "wochenende", "monat", "monate", "tag", "tage", "alle",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "montag", "dienstag", "mittwoch", "donnerstag", "freitag", "samstag", "sonntag",
+})
+
+# Words whose resolved dates depend on today's weekday ("next Friday", "this week")
+WEEKDAY_WORDS = frozenset({
+    "week", "weeks", "weekend", "month", "months", "woche", "wochen", "wochenende", "monat", "monate",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "montag", "dienstag", "mittwoch", "donnerstag", "freitag", "samstag", "sonntag",
+})
+
+
+def normalize(message: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = APOSTROPHES.sub("", message.lower())
+    return WHITESPACE.sub(" ", NON_WORD.sub(" ", text)).strip()
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def to_template(arguments: Dict[str, Any], today: date) -> Dict[str, Any]:
+    """Replace absolute dates by offsets from today"""
+    return {
+        key: {"$days": (date.fromisoformat(value) - today).days}
+        if isinstance(value, str) and ISO_DATE.match(value) else value
+        for key, value in arguments.items()
+    }
+
+
+def from_template(template: Dict[str, Any], today: date) -> Dict[str, Any]:
+    """Resolve offsets from a template against today"""
+    return {
+        key: (today + timedelta(days=value["$days"])).isoformat()
+        if isinstance(value, dict) and "$days" in value else value
+        for key, value in template.items()
+    }
+
+
+class IntentEntry:
+    """Tool calls chosen for a normalized message"""
+    __slots__ = ("grams", "date_terms", "weekday", "calls")
+
+    def __init__(self, grams: FrozenSet[str], date_terms: FrozenSet[str], weekday: Optional[int],
+                 calls: List[Dict[str, Any]]):
+        self.grams = grams
+        self.date_terms = date_terms
+        self.weekday = weekday
+        self.calls = calls
+
+
+class IntentCache:
+    """
+    LRU cache from user messages to (function name, argument template) lists.
+    Lookups first try the exact normalized message, then the most similar
+    cached message by trigram Jaccard similarity above `threshold`.
+    """
+
+    def __init__(self, max_entries: int, threshold: float, functions: List[str], enabled: bool = True):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.functions = set(functions)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, IntentEntry]" = OrderedDict()
+
+    def _describe(self, message: str, today: date):
+        normalized = normalize(message)
+        words = set(normalized.split())
+        date_terms = frozenset(words & DATE_WORDS)
+        weekday = today.weekday() if words & WEEKDAY_WORDS else None
+        return normalized, date_terms, weekday
+
+    @staticmethod
+    def _cacheable_message(message: str) -> bool:
+        # Digits mean explicit dates, times or task IDs that must not be reused
+        return not any(char.isdigit() for char in message)
+
+    def lookup(self, message: str, today: Optional[date] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return tool calls (in chat-completions format) for a cached intent, or None
+        """
+        if not self.enabled or not self._cacheable_message(message):
+            return None
+        today = today or date.today()
+        normalized, date_terms, weekday = self._describe(message, today)
+
+        entry = self._entries.get(normalized)
+        key = normalized
+        if entry is None or entry.date_terms != date_terms or entry.weekday != weekday:
+            entry, key = None, None
+            grams = trigrams(normalized)
+            best_score = self.threshold
+            for candidate_key, candidate in self._entries.items():
+                if candidate.date_terms != date_terms or candidate.weekday != weekday:
+                    continue
+                union = len(grams | candidate.grams)
+                score = len(grams & candidate.grams) / union if union else 0.0
+                if score >= best_score:
+                    entry, key, best_score = candidate, candidate_key, score
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return [
+            {
+                "id": f"cached-{index}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(from_template(template, today))}
+            }
+            for index, (name, template) in enumerate(entry.calls)
+        ]
+
+    def store(self, message: str, calls: List[Dict[str, Any]], today: Optional[date] = None) -> None:
+        """
+        Remember the tool calls the model chose for a message, if they are cacheable
+        """
+        if not self.enabled or not calls or not self._cacheable_message(message):
+            return
+        if any(call["function"]["name"] not in self.functions for call in calls):
+            return
+        today = today or date.today()
+        try:
+            templates = [
+                (call["function"]["name"], to_template(json.loads(call["function"]["arguments"] or "{}"), today))
+                for call in calls
+            ]
+        except ValueError:
+            return
+
+        normalized, date_terms, weekday = self._describe(message, today)
+        self._entries[normalized] = IntentEntry(trigrams(normalized), date_terms, weekday, templates)
+        self._entries.move_to_end(normalized)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+intent_cache = IntentCache(
+    max_entries=INTENT_CACHE_SIZE,
+    threshold=INTENT_CACHE_THRESHOLD,
+    functions=INTENT_CACHE_FUNCTIONS,
+    enabled=INTENT_CACHE_ENABLED
+)
@@ -1,18 +1,37 @@
 """
 Main FastAPI application for Task-Planner Agent
 """
+import json
+import time
+from contextlib import asynccontextmanager
 from datetime import date, timedelta
-from typing import Optional
-from fastapi import FastAPI, Depends, HTTPException
+from typing import Optional, Iterator, Any, AsyncIterator
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 
-from app.models import Task, TaskCreate, TaskList
+from app.models import Task, TaskCreate, TaskList, BatchRequest, BatchResult, FreeBusy
 from app.auth import router as auth_router, require_auth
 from app.calendar_service import get_calendar_service, CalendarService
-from app.openai_service import OpenAIService
+from app.cache import task_cache, etag_matches
+from app.openai_service import OpenAIService, create_openai_client, get_openai_service
+from app.intent_cache import intent_cache
+from app.sessions import session_store
+from app.telemetry import registry, trace_id_var, new_id, HTTP_REQUESTS, HTTP_DURATION
 from app.config import DEBUG, OPENAI_API_KEY
 from pydantic import BaseModel
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Share one OpenAI client (and its connection pool) for the application lifetime
+    """
+    app.state.openai_client = create_openai_client(OPENAI_API_KEY) if OPENAI_API_KEY else None
+    yield
+    if app.state.openai_client is not None:
+        await app.state.openai_client.close()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Task-Planner Agent API",
@@ -20,7 +39,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    debug=DEBUG
+    debug=DEBUG,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -36,6 +56,29 @@ app.add_middleware(
 app.include_router(auth_router)
 
 
+@app.middleware("http")
+async def telemetry_middleware(request: Request, call_next):
+    """
+    Continue the caller's trace (X-Trace-Id header) and record request metrics
+    """
+    trace_id = request.headers.get("x-trace-id") or new_id()
+    token = trace_id_var.set(trace_id)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Trace-Id"] = trace_id
+        return response
+    finally:
+        trace_id_var.reset(token)
+        # Route templates keep the label set small (/tasks/{task_id}, not every ID)
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUESTS.inc(method=request.method, path=path, status=status)
+        HTTP_DURATION.observe(time.perf_counter() - started, method=request.method, path=path)
+
+
 @app.get("/health")
 async def health_check():
     """
@@ -44,34 +87,104 @@ async def health_check():
     return {"status": "ok", "message": "Service operational"}
 
 
+@app.get("/metrics", tags=["Monitoring"])
+async def metrics():
+    """
+    Prometheus metrics: request latency, external call spans, errors
+    """
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+async def cached_task_list(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    calendar_service: CalendarService
+) -> Response:
+    """
+    Serve a TaskList from the response cache, answering 304 when the
+    client's If-None-Match still matches the cached ETag
+    """
+    user_id = calendar_service.user_id
+    key = (user_id, tuple(calendar_service.calendar_ids), start_date, end_date, task_cache.version_of(user_id))
+    entry = task_cache.get(key)
+    if entry is None:
+        tasks = await calendar_service.get_tasks_for_range(start_date, end_date)
+        body = TaskList(tasks=tasks, count=len(tasks)).model_dump_json().encode()
+        entry = task_cache.put(key, body)
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
 @app.get("/tasks/today", response_model=TaskList, tags=["Tasks"])
 async def get_today_tasks(
+    request: Request,
     calendar_service: CalendarService = Depends(get_calendar_service)
 ):
     """
     Get today's tasks
     """
     today = date.today()
-    tasks = await calendar_service.get_tasks_for_day(today)
-    return TaskList(tasks=tasks, count=len(tasks))
+    return await cached_task_list(request, today, today, calendar_service)
+
+
+def ndjson_tasks(tasks: Iterator[Task]) -> Iterator[str]:
+    """
+    Serialize tasks as newline-delimited JSON, one task per line.
+    Errors raised mid-stream are reported as a final {"error": ...} line.
+    """
+    try:
+        for task in tasks:
+            yield task.model_dump_json() + "\n"
+    except HTTPException as error:
+        yield json.dumps({"error": error.detail}) + "\n"
 
 
 @app.get("/tasks/range", response_model=TaskList, tags=["Tasks"])
 async def get_tasks_by_range(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    stream: bool = False,
     calendar_service: CalendarService = Depends(get_calendar_service)
 ):
     """
-    Get tasks for a date range
+    Get tasks for a date range.
+    With stream=true, tasks are sent as NDJSON while pages are still being fetched.
     """
     if start_date is None:
         start_date = date.today()
     if end_date is None:
         end_date = start_date + timedelta(days=30)
     
-    tasks = await calendar_service.get_tasks_for_range(start_date, end_date)
-    return TaskList(tasks=tasks, count=len(tasks))
+    if stream:
+        return StreamingResponse(
+            ndjson_tasks(calendar_service.iter_tasks_for_range(start_date, end_date)),
+            media_type="application/x-ndjson"
+        )
+    
+    return await cached_task_list(request, start_date, end_date, calendar_service)
+
+
+@app.get("/freebusy", response_model=FreeBusy, tags=["Tasks"])
+async def get_free_busy(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    calendar_service: CalendarService = Depends(get_calendar_service)
+):
+    """
+    Merged busy and free intervals (UTC) of all configured calendars
+    """
+    if start_date is None:
+        start_date = date.today()
+    if end_date is None:
+        end_date = start_date + timedelta(days=7)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return await calendar_service.get_free_busy(start_date, end_date)
 
 
 @app.post("/tasks", response_model=Task, tags=["Tasks"])
@@ -85,6 +198,17 @@ async def create_task(
     return await calendar_service.create_task(task)
 
 
+@app.post("/tasks/batch", response_model=BatchResult, tags=["Tasks"])
+async def batch_tasks(
+    request: BatchRequest,
+    calendar_service: CalendarService = Depends(get_calendar_service)
+):
+    """
+    Run several create/update/delete/done operations in one request
+    """
+    return await calendar_service.batch_tasks(request.operations)
+
+
 @app.put("/tasks/{task_id}", response_model=Task, tags=["Tasks"])
 async def update_task(
     task_id: str,
@@ -121,22 +245,63 @@ async def mark_task_done(
 
 class ChatRequest(BaseModel):
     message: str
+    # Continue an earlier conversation; a new session is started when omitted
+    session_id: Optional[str] = None
 
 
 @app.post("/chat", tags=["AI Assistant"])
 async def chat_with_ai(
     request: ChatRequest,
-    calendar_service: CalendarService = Depends(get_calendar_service)
+    calendar_service: CalendarService = Depends(get_calendar_service),
+    openai_service: OpenAIService = Depends(get_openai_service)
 ):
     """
     Chat with AI assistant for task management
     """
-    if not OPENAI_API_KEY:
-        raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+    session = session_store.get_or_create(request.session_id, owner=calendar_service.user_id)
+    response = await openai_service.chat(request.message, calendar_service, session)
+    return {"response": response, "session_id": session.id, "steps": openai_service.last_steps}
+
+
+@app.get("/chat/intent-cache", tags=["AI Assistant"])
+async def intent_cache_stats():
+    """
+    Hit-rate metrics of the chat intent cache
+    """
+    return intent_cache.stats()
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream", tags=["AI Assistant"])
+async def chat_with_ai_stream(
+    request: ChatRequest,
+    calendar_service: CalendarService = Depends(get_calendar_service),
+    openai_service: OpenAIService = Depends(get_openai_service)
+):
+    """
+    Chat with AI assistant, streaming progress as Server-Sent Events:
+    session, tool_call, tool_result, token (final answer text), done and error
+    """
+    session = session_store.get_or_create(request.session_id, owner=calendar_service.user_id)
+    
+    async def events() -> AsyncIterator[str]:
+        yield sse_event("session", {"session_id": session.id})
+        try:
+            async for event, data in openai_service.chat_events(request.message, calendar_service, session):
+                yield sse_event(event, data)
+        except Exception as e:
+            detail = f"OpenAI Error: {str(e)}" if DEBUG else "I'm having trouble processing your request right now."
+            yield sse_event("error", {"detail": detail})
     
-    openai_service = OpenAIService(OPENAI_API_KEY)
-    response = await openai_service.chat(request.message, calendar_service)
-    return {"response": response}
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 if __name__ == "__main__":
@@ -2,8 +2,8 @@
 Pydantic models for data validation
 """
 from datetime import date, time, datetime
-from typing import Optional, List, Union
-from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Union, Literal, Dict
+from pydantic import BaseModel, ConfigDict, model_validator
 
 
 class TaskCreate(BaseModel):
@@ -43,8 +43,61 @@ class TaskList(BaseModel):
     count: int
 
 
+class BatchOperation(BaseModel):
+    """Single operation of a batch request"""
+    op: Literal["create", "update", "delete", "done"]
+    task_id: Optional[str] = None
+    task: Optional[TaskCreate] = None
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if self.op in ("update", "delete", "done") and not self.task_id:
+            raise ValueError(f"'{self.op}' requires task_id")
+        if self.op in ("create", "update") and self.task is None:
+            raise ValueError(f"'{self.op}' requires task")
+        return self
+
+
+class BatchRequest(BaseModel):
+    """List of task operations executed together"""
+    operations: List[BatchOperation]
+
+
+class BatchItemResult(BaseModel):
+    """Result of one batch operation"""
+    index: int
+    op: str
+    success: bool
+    task: Optional[Task] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    """Per-operation results of a batch request"""
+    results: List[BatchItemResult] = []
+    succeeded: int
+    failed: int
+
+
 class AuthStatus(BaseModel):
     """Authentication status"""
     authenticated: bool
     expires_at: Optional[datetime] = None
     message: str
+
+
+class TimeSlot(BaseModel):
+    """Time interval in UTC"""
+    start: datetime
+    end: datetime
+
+
+class FreeBusy(BaseModel):
+    """Merged free/busy view over all configured calendars"""
+    time_min: datetime
+    time_max: datetime
+    calendars: List[str]
+    busy: List[TimeSlot] = []
+    free: List[TimeSlot] = []
+    # Calendars that could not be read, with the reason
+    errors: Dict[str, str] = {}
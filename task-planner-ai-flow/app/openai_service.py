@@ -1,17 +1,81 @@
 """
 OpenAI integration for Task-Planner Agent
 """
+import asyncio
 import json
-from typing import Dict, Any
-from openai import OpenAI
-from fastapi import HTTPException
+import time
+from typing import Dict, Any, List, AsyncIterator, Tuple, Optional
+import httpx
+from openai import AsyncOpenAI
+from fastapi import HTTPException, Request
+
+from app.renderer import render_tool_results, presentation_latency
+from app.intent_cache import intent_cache
+from app.sessions import ConversationSession
+from app.telemetry import observe_span
+from app.config import (
+    DEBUG, CHAT_MAX_STEPS, OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT,
+    OPENAI_MAX_RETRIES, OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE,
+    OPENAI_KEEPALIVE_EXPIRY, OPENAI_HTTP2, OPENAI_BASE_URL
+)
+
+
+def create_openai_client(api_key: str) -> AsyncOpenAI:
+    """
+    Create the application-wide OpenAI client with a pooled keep-alive HTTP connection
+    """
+    http_client = httpx.AsyncClient(
+        http2=OPENAI_HTTP2,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    )
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=OPENAI_BASE_URL,
+        http_client=http_client,
+        max_retries=OPENAI_MAX_RETRIES
+    )
+
+
+SYSTEM_PROMPT = (
+    "You are a helpful task planning assistant. "
+    "IMPORTANT: Use get_today_tasks ONLY for 'today' requests. For ANY other time period "
+    "(tomorrow, next week, this week, all tasks, upcoming, date ranges), use get_tasks_range. "
+    "When user asks for 'all tasks' or broad requests, use get_tasks_range without dates to get next 30 days. "
+    "Call several tools at once when the request needs more than one. "
+    "Present the task information in a clear, organized way."
+)
+
+
+def summarize_result(result: Dict[str, Any]) -> str:
+    """
+    One-line summary of a tool result for progress events
+    """
+    if "error" in result:
+        return f"Error: {result['error']}"
+    if "tasks" in result:
+        return f"{len(result['tasks'])} task(s) found"
+    if "busy" in result:
+        return f"{len(result['busy'])} busy slot(s), {len(result['free'])} free slot(s)"
+    if "succeeded" in result:
+        return f"{result['succeeded']} operation(s) succeeded, {result['failed']} failed"
+    return result.get("message", "Done")
 
-from app.config import DEBUG
 
 class OpenAIService:
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
         self.model = "gpt-4o-mini"
+        self.max_steps = CHAT_MAX_STEPS
+        # Timings of the most recent chat() call, one entry per model round
+        self.last_steps: List[Dict[str, Any]] = []
+        
+    def get_tool_definitions(self):
+        return [{"type": "function", "function": definition} for definition in self.get_function_definitions()]
         
     def get_function_definitions(self):
         return [
@@ -31,6 +95,17 @@ class OpenAIService:
                     }
                 }
             },
+            {
+                "name": "get_free_busy",
+                "description": "Get busy and free time slots across all calendars. Use this for questions about availability, free time or finding a slot for a meeting.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "start_date": {"type": "string", "description": "Start date YYYY-MM-DD. If not specified, defaults to today."},
+                        "end_date": {"type": "string", "description": "End date YYYY-MM-DD. If not specified, defaults to start_date + 7 days."}
+                    }
+                }
+            },
             {
                 "name": "create_task",
                 "description": "Create a new task",
@@ -55,51 +130,41 @@ class OpenAIService:
                     },
                     "required": ["task_id"]
                 }
+            },
+            {
+                "name": "batch_tasks",
+                "description": "Run several task operations at once, e.g. mark multiple tasks as done, create a week of tasks, or delete several tasks. Prefer this over repeated single calls.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "operations": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "op": {"type": "string", "enum": ["create", "update", "delete", "done"]},
+                                    "task_id": {"type": "string", "description": "Task ID (required for update, delete, done)"},
+                                    "title": {"type": "string", "description": "Task title (required for create, update)"},
+                                    "date": {"type": "string", "description": "Task date YYYY-MM-DD (required for create, update)"},
+                                    "time": {"type": "string", "description": "Task time HH:MM:SS"},
+                                    "description": {"type": "string", "description": "Task description"}
+                                },
+                                "required": ["op"]
+                            }
+                        }
+                    },
+                    "required": ["operations"]
+                }
             }
         ]
     
-    async def chat(self, message: str, calendar_service) -> str:
-        from datetime import date, datetime
-        current_date = date.today()
-        current_datetime = datetime.now()
-        
+    async def chat(self, message: str, calendar_service, session: Optional[ConversationSession] = None) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are a helpful task planning assistant. Current date: {current_date.strftime('%Y-%m-%d')} ({current_date.strftime('%A, %B %d, %Y')}). Current time: {current_datetime.strftime('%H:%M:%S')}. IMPORTANT: Use get_today_tasks ONLY for 'today' requests. For ANY other time period (tomorrow, next week, this week, all tasks, upcoming, date ranges), use get_tasks_range. When user asks for 'all tasks' or broad requests, use get_tasks_range without dates to get next 30 days."},
-                    {"role": "user", "content": message}
-                ],
-                functions=self.get_function_definitions(),
-                function_call="auto",
-                temperature=0.3
-            )
-            
-            choice = response.choices[0]
-            
-            if choice.finish_reason == "function_call":
-                function_call = choice.message.function_call
-                function_name = function_call.name
-                function_args = json.loads(function_call.arguments)
-                
-                # Execute the function
-                result = await self.execute_function(function_name, function_args, calendar_service)
-                
-                # Get final response from OpenAI
-                final_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": f"You are a helpful task planning assistant. Current date: {current_date.strftime('%Y-%m-%d')} ({current_date.strftime('%A, %B %d, %Y')}). Present the task information in a clear, organized way."},
-                        {"role": "user", "content": message},
-                        {"role": "assistant", "content": None, "function_call": {"name": function_name, "arguments": function_call.arguments}},
-                        {"role": "function", "name": function_name, "content": json.dumps(result)}
-                    ],
-                    temperature=0.3
-                )
-                
-                return final_response.choices[0].message.content
-            else:
-                return choice.message.content
+            tokens = []
+            async for event, data in self.chat_events(message, calendar_service, session):
+                if event == "token":
+                    tokens.append(data["text"])
+            return "".join(tokens)
                 
         except Exception as e:
             if DEBUG:
@@ -107,6 +172,165 @@ class OpenAIService:
             else:
                 return "I'm having trouble processing your request right now."
     
+    async def chat_events(
+        self, message: str, calendar_service, session: Optional[ConversationSession] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run the tool-calling loop and yield (event, data) pairs as things happen:
+        "tool_call" when the model picks a tool, "tool_result" with a short summary,
+        "token" for each piece of the final answer and "done" with per-step timings.
+        With a session, earlier turns are sent along and this turn is recorded.
+        """
+        from datetime import date, datetime
+        current_date = date.today()
+        current_datetime = datetime.now()
+        
+        history = session.history_messages() if session is not None else []
+        # Static instructions and tools first, then history: a stable prefix for
+        # provider-side prompt caching. Only the date context changes per request.
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            *history,
+            {"role": "system", "content": f"Current date: {current_date.strftime('%Y-%m-%d')} ({current_date.strftime('%A, %B %d, %Y')}). Current time: {current_datetime.strftime('%H:%M:%S')}."},
+            {"role": "user", "content": message}
+        ]
+        tools = self.get_tool_definitions()
+        self.last_steps = []
+        answer = []
+        
+        # Messages seen before reuse the tool calls chosen back then; follow-ups
+        # in a conversation depend on context and always go to the model
+        cached_calls = intent_cache.lookup(message) if not history else None
+        
+        for step in range(1, self.max_steps + 1):
+            cache_hit = step == 1 and cached_calls is not None
+            if cache_hit:
+                calls, content, model_ms = cached_calls, [], 0.0
+            else:
+                # Tools are withheld on the last step so the model has to answer
+                options = {"tools": tools, "tool_choice": "auto"} if step < self.max_steps else {}
+                started = time.perf_counter()
+                try:
+                    stream = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0.3,
+                        stream=True,
+                        **options
+                    )
+                except Exception:
+                    observe_span("openai.chat.completions", time.perf_counter() - started, error=True, step=step)
+                    raise
+                
+                content = []
+                tool_calls: Dict[int, Dict[str, Any]] = {}
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content.append(delta.content)
+                        answer.append(delta.content)
+                        yield "token", {"text": delta.content}
+                    # Tool calls arrive in fragments and are assembled by index
+                    for fragment in delta.tool_calls or []:
+                        call = tool_calls.setdefault(fragment.index, {
+                            "id": "", "type": "function", "function": {"name": "", "arguments": ""}
+                        })
+                        if fragment.id:
+                            call["id"] = fragment.id
+                        if fragment.function:
+                            call["function"]["name"] += fragment.function.name or ""
+                            call["function"]["arguments"] += fragment.function.arguments or ""
+                model_ms = (time.perf_counter() - started) * 1000
+                # Recorded by hand: a span context cannot stay open across the yields above
+                observe_span("openai.chat.completions", model_ms / 1000, step=step)
+                
+                if not tool_calls:
+                    if step > 1:
+                        # Answer presenting earlier tool results: what the local renderer saves
+                        presentation_latency.observe(model_ms)
+                    self.last_steps.append({"step": step, "model_ms": round(model_ms, 1), "tools": []})
+                    await self.remember_turn(session, message, "".join(answer))
+                    yield "done", {"steps": self.last_steps}
+                    return
+                
+                calls = [tool_calls[index] for index in sorted(tool_calls)]
+                if step == 1 and not history:
+                    intent_cache.store(message, calls)
+            
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content) or None,
+                "tool_calls": calls
+            })
+            for call in calls:
+                yield "tool_call", {"name": call["function"]["name"], "arguments": call["function"]["arguments"]}
+            
+            # Independent tool calls from one response run concurrently
+            started = time.perf_counter()
+            timed_results = await asyncio.gather(*(
+                self.run_tool_call(call["function"]["name"], call["function"]["arguments"], calendar_service)
+                for call in calls
+            ))
+            tools_ms = (time.perf_counter() - started) * 1000
+            
+            for call, (_, result, _) in zip(calls, timed_results):
+                messages.append({"role": "tool", "tool_call_id": call["id"], "content": json.dumps(result)})
+                yield "tool_result", {"name": call["function"]["name"], "summary": summarize_result(result)}
+            
+            step_timings = {
+                "step": step,
+                "intent_cache_hit": cache_hit,
+                "model_ms": round(model_ms, 1),
+                "tools_ms": round(tools_ms, 1),
+                "tools": [
+                    {"name": call["function"]["name"], "ms": round(elapsed_ms, 1)}
+                    for call, (_, _, elapsed_ms) in zip(calls, timed_results)
+                ]
+            }
+            
+            # Simple results are rendered locally instead of asking the model to present them
+            rendered = render_tool_results(message, [
+                (call["function"]["name"], args, result)
+                for call, (args, result, _) in zip(calls, timed_results)
+            ])
+            if rendered is not None:
+                step_timings["rendered_locally"] = True
+                step_timings["saved_ms"] = presentation_latency.record_saved()
+                self.last_steps.append(step_timings)
+                yield "token", {"text": rendered}
+                answer.append(rendered)
+                await self.remember_turn(session, message, "".join(answer))
+                yield "done", {"steps": self.last_steps}
+                return
+            
+            self.last_steps.append(step_timings)
+    
+    async def remember_turn(self, session: Optional[ConversationSession], message: str, answer: str) -> None:
+        """
+        Record a finished turn and roll older turns into the summary when over budget
+        """
+        if session is None:
+            return
+        session.add_turn(message, answer)
+        if session.needs_rollup():
+            await session.roll_up(self.client, self.model)
+    
+    async def run_tool_call(self, function_name: str, arguments: str, calendar_service):
+        """
+        Execute one tool call from the model, returning (args, result, elapsed milliseconds)
+        """
+        started = time.perf_counter()
+        try:
+            args = json.loads(arguments or "{}")
+        except json.JSONDecodeError:
+            args = {}
+            result = {"error": f"Invalid arguments for {function_name}"}
+        else:
+            result = await self.execute_function(function_name, args, calendar_service)
+        return args, result, (time.perf_counter() - started) * 1000
+    
     async def execute_function(self, function_name: str, args: Dict[str, Any], calendar_service) -> Dict[str, Any]:
         try:
             if function_name == "get_today_tasks":
@@ -115,12 +339,23 @@ class OpenAIService:
                 return {"tasks": [{"id": t.id, "title": t.title, "time": t.time, "description": t.description} for t in tasks]}
             
             elif function_name == "get_tasks_range":
-                from datetime import date
+                from datetime import date, timedelta
                 start_date = date.fromisoformat(args.get("start_date")) if args.get("start_date") else date.today()
-                end_date = date.fromisoformat(args.get("end_date")) if args.get("end_date") else None
+                end_date = date.fromisoformat(args.get("end_date")) if args.get("end_date") else start_date + timedelta(days=30)
                 tasks = await calendar_service.get_tasks_for_range(start_date, end_date)
                 return {"tasks": [{"id": t.id, "title": t.title, "date": str(t.date), "time": t.time} for t in tasks]}
             
+            elif function_name == "get_free_busy":
+                from datetime import date, timedelta
+                start_date = date.fromisoformat(args.get("start_date")) if args.get("start_date") else date.today()
+                end_date = date.fromisoformat(args.get("end_date")) if args.get("end_date") else start_date + timedelta(days=7)
+                free_busy = await calendar_service.get_free_busy(start_date, end_date)
+                return {
+                    "busy": [{"start": slot.start.isoformat(), "end": slot.end.isoformat()} for slot in free_busy.busy],
+                    "free": [{"start": slot.start.isoformat(), "end": slot.end.isoformat()} for slot in free_busy.free],
+                    "errors": free_busy.errors
+                }
+            
             elif function_name == "create_task":
                 from app.models import TaskCreate
                 from datetime import date
@@ -131,14 +366,47 @@ class OpenAIService:
                     description=args.get("description")
                 )
                 task = await calendar_service.create_task(task_data)
-                return {"success": True, "task_id": task.id, "message": f"Task '{task.title}' created successfully"}
+                return {"success": True, "task_id": task.id, "title": task.title, "message": f"Task '{task.title}' created successfully"}
             
             elif function_name == "mark_task_done":
                 task = await calendar_service.mark_task_done(args["task_id"])
-                return {"success": True, "message": f"Task '{task.title}' marked as done"}
+                return {"success": True, "title": task.title, "message": f"Task '{task.title}' marked as done"}
+            
+            elif function_name == "batch_tasks":
+                from app.models import BatchOperation, TaskCreate
+                from datetime import date
+                operations = []
+                for item in args.get("operations", []):
+                    task_data = None
+                    if item.get("title") and item.get("date"):
+                        task_data = TaskCreate(
+                            title=item["title"],
+                            date=date.fromisoformat(item["date"]),
+                            time=item.get("time"),
+                            description=item.get("description")
+                        )
+                    operations.append(BatchOperation(op=item["op"], task_id=item.get("task_id"), task=task_data))
+                batch = await calendar_service.batch_tasks(operations)
+                return {
+                    "succeeded": batch.succeeded,
+                    "failed": batch.failed,
+                    "results": [
+                        {"op": r.op, "success": r.success, "title": r.task.title if r.task else None, "error": r.error}
+                        for r in batch.results
+                    ]
+                }
             
             else:
                 return {"error": f"Unknown function: {function_name}"}
                 
         except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+def get_openai_service(request: Request) -> OpenAIService:
+    """
+    FastAPI dependency to get an OpenAI service backed by the shared client
+    """
+    client = getattr(request.app.state, "openai_client", None)
+    if client is None:
+        raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+    return OpenAIService(client)
@@ -0,0 +1,49 @@
+"""
+Client-side rate limiting and retries for Google API calls
+
+The limiter (quota-cost token bucket, jittered exponential backoff and an AIMD
+concurrency limit) is Backend/rate_limit.py, shared with the agents. This
+module configures it from app.config and counts retries and throttling in
+the planner's metrics registry.
+"""
+import sys
+from typing import Any
+
+from app.config import (
+    CALENDAR_QUOTA_PER_SECOND, CALENDAR_QUOTA_BURST, GOOGLE_MAX_CONCURRENCY,
+    GOOGLE_MAX_RETRIES, GOOGLE_BACKOFF_BASE, GOOGLE_BACKOFF_MAX, SHARED_MODULES_DIR
+)
+from app.telemetry import registry
+
+sys.path.append(str(SHARED_MODULES_DIR))
+from rate_limit import GoogleRateLimiter
+
+COUNTERS = {
+    "google_retries_total": registry.counter("google_retries_total", "Retried Google API calls", ("api", "method")),
+    "google_throttled_total": registry.counter(
+        "google_throttled_total", "Google API calls rejected by rate limits", ("api", "method")
+    ),
+}
+
+
+def count(name: str, **labels: Any) -> None:
+    COUNTERS[name].inc(**labels)
+
+
+def calendar_rate_limiter() -> GoogleRateLimiter:
+    """Calendar API limiter with the configured quota and retry settings"""
+    return GoogleRateLimiter(
+        "calendar",
+        units_per_second=CALENDAR_QUOTA_PER_SECOND,
+        burst=CALENDAR_QUOTA_BURST,
+        max_concurrency=GOOGLE_MAX_CONCURRENCY,
+        max_retries=GOOGLE_MAX_RETRIES,
+        backoff_base=GOOGLE_BACKOFF_BASE,
+        backoff_max=GOOGLE_BACKOFF_MAX,
+        count=count
+    )
+
+
+# Shared by the single-user setup; Google counts quota per user, so each
+# signed-in user of a multi-tenant instance gets a limiter of their own
+calendar_limiter = calendar_rate_limiter()
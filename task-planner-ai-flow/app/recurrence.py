@@ -0,0 +1,160 @@
+"""
+Local expansion of recurring events
+
+With LOCAL_RECURRENCE_EXPANSION enabled, events are listed with
+singleEvents=False: every recurring series arrives once as its master event
+(plus its modified or cancelled instances) instead of one item per
+occurrence. RRULE/RDATE/EXDATE lines are parsed once per master version and
+occurrences are generated lazily for the requested window only.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrulestr
+
+from app.config import RECURRENCE_CACHE_SIZE
+
+
+def parse_event_time(value: Dict[str, Any]) -> Tuple[datetime, bool]:
+    """
+    (datetime, all_day) of an event start/end/originalStartTime.
+    Timed values are aware and in the event's time zone, so occurrences keep
+    their wall-clock time across DST changes; all-day values are naive.
+    """
+    if value.get('dateTime'):
+        parsed = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        if value.get('timeZone'):
+            try:
+                parsed = parsed.astimezone(ZoneInfo(value['timeZone']))
+            except (ZoneInfoNotFoundError, ValueError):
+                pass
+        return parsed, False
+    return datetime.fromisoformat(value['date'][:10]), True
+
+
+def parse_rfc3339(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def time_key(value: datetime) -> float:
+    """Sort key of a start time; all-day dates count as UTC midnight"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def event_key(event: Dict[str, Any]) -> float:
+    return time_key(parse_event_time(event['start'])[0])
+
+
+class RecurringSeries:
+    """Parsed recurrence of one master event with a lazy occurrence generator"""
+
+    def __init__(self, master: Dict[str, Any]):
+        self.master = master
+        self.start, self.all_day = parse_event_time(master['start'])
+        end = parse_event_time(master.get('end') or master['start'])[0]
+        self.duration = end - self.start
+        self.time_zone = master['start'].get('timeZone')
+        # cache=True keeps generated occurrences, so repeated windows are not recomputed
+        self.rules = rrulestr("\n".join(master.get('recurrence', [])), dtstart=self.start, forceset=True, cache=True)
+
+    def _window(self, value: datetime) -> datetime:
+        # All-day series compare as naive UTC dates
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if self.all_day else value
+
+    def occurrences(self, time_min: datetime, time_max: datetime) -> Iterator[datetime]:
+        """Start times of the occurrences overlapping [time_min, time_max), in order"""
+        window_end = self._window(time_max)
+        for start in self.rules.xafter(self._window(time_min) - self.duration, inc=False):
+            if start >= window_end:
+                return
+            yield start
+
+    def instance(self, start: datetime) -> Dict[str, Any]:
+        """Instance event as Google would return it with singleEvents=True"""
+        end = start + self.duration
+        if self.all_day:
+            suffix = start.strftime('%Y%m%d')
+            start_value = {'date': start.date().isoformat()}
+            end_value = {'date': end.date().isoformat()}
+        else:
+            suffix = start.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            start_value = {'dateTime': start.isoformat()}
+            end_value = {'dateTime': end.isoformat()}
+            if self.time_zone:
+                start_value['timeZone'] = end_value['timeZone'] = self.time_zone
+        event = {key: value for key, value in self.master.items() if key != 'recurrence'}
+        event.update({
+            'id': f"{self.master['id']}_{suffix}",
+            'recurringEventId': self.master['id'],
+            'originalStartTime': start_value,
+            'start': start_value,
+            'end': end_value,
+        })
+        return event
+
+
+class RecurrenceExpander:
+    """
+    Expands masters, exceptions and single events of one listing into the
+    instance stream singleEvents=True would produce, ordered by start.
+    Parsed series are cached per master version (id + etag), LRU-bounded.
+    """
+
+    def __init__(self, max_series: int):
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[str, str], RecurringSeries]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def series(self, master: Dict[str, Any]) -> RecurringSeries:
+        key = (master['id'], master.get('etag') or master.get('updated', ''))
+        with self._lock:
+            series = self._series.get(key)
+            if series is not None:
+                self._series.move_to_end(key)
+                return series
+        series = RecurringSeries(master)
+        with self._lock:
+            self._series[key] = series
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        return series
+
+    def _instances(self, series: RecurringSeries, overridden: set,
+                   time_min: datetime, time_max: datetime) -> Iterator[Dict[str, Any]]:
+        for start in series.occurrences(time_min, time_max):
+            # Modified and cancelled instances come from their own exception events
+            if (series.master['id'], time_key(start)) not in overridden:
+                yield series.instance(start)
+
+    def expand(self, events: Iterable[Dict[str, Any]], time_min: datetime,
+               time_max: datetime) -> Iterator[Dict[str, Any]]:
+        singles: List[Dict[str, Any]] = []
+        masters: List[Dict[str, Any]] = []
+        overridden = set()
+        for event in events:
+            if event.get('recurrence'):
+                if event.get('status') != 'cancelled':
+                    masters.append(event)
+                continue
+            if event.get('recurringEventId') and event.get('originalStartTime'):
+                overridden.add((event['recurringEventId'], time_key(parse_event_time(event['originalStartTime'])[0])))
+            if event.get('status') != 'cancelled' and event.get('start'):
+                singles.append(event)
+
+        singles.sort(key=event_key)
+        streams: List[Iterator[Dict[str, Any]]] = [iter(singles)]
+        for master in masters:
+            streams.append(self._instances(self.series(master), overridden, time_min, time_max))
+        # Each stream is ordered by start, so a k-way merge keeps the result ordered
+        return heapq.merge(*streams, key=event_key)
+
+
+recurrence_expander = RecurrenceExpander(RECURRENCE_CACHE_SIZE)
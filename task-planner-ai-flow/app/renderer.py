@@ -0,0 +1,63 @@
+"""
+Local rendering of simple tool results, used instead of a second model call
+
+The templates and rules are Backend/fast_path.py, shared with calendar_agent;
+this module configures them from app.config and estimates the time saved.
+"""
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import (
+    FAST_PATH_ENABLED, FAST_PATH_FUNCTIONS, FAST_PATH_MAX_TASKS, FAST_PATH_SKIP_PATTERN,
+    FAST_PATH_WRITE_FUNCTIONS, FAST_PATH_ACTION_PATTERN, SHARED_MODULES_DIR
+)
+
+sys.path.append(str(SHARED_MODULES_DIR))
+import fast_path
+
+rules = fast_path.FastPathRules(
+    enabled=FAST_PATH_ENABLED,
+    functions=FAST_PATH_FUNCTIONS,
+    write_functions=FAST_PATH_WRITE_FUNCTIONS,
+    max_tasks=FAST_PATH_MAX_TASKS,
+    skip_pattern=FAST_PATH_SKIP_PATTERN,
+    action_pattern=FAST_PATH_ACTION_PATTERN,
+)
+
+
+def render_tool_results(message: str, results: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]) -> Optional[str]:
+    """
+    Render (function name, arguments, result) triples as a final answer,
+    or return None when the model should present them instead
+    """
+    return fast_path.render_tool_results(message, results, rules)
+
+
+class LatencyTracker:
+    """
+    Moving average of presentation-call latency, used to estimate
+    how much time the local renderer saves per request
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.average_ms: Optional[float] = None
+        self.saved_ms_total = 0.0
+        self.fast_path_count = 0
+
+    def observe(self, elapsed_ms: float) -> None:
+        if self.average_ms is None:
+            self.average_ms = elapsed_ms
+        else:
+            self.average_ms += self.alpha * (elapsed_ms - self.average_ms)
+
+    def record_saved(self) -> Optional[float]:
+        """Count one skipped presentation call and return the estimated saving"""
+        self.fast_path_count += 1
+        if self.average_ms is None:
+            return None
+        self.saved_ms_total += self.average_ms
+        return round(self.average_ms, 1)
+
+
+presentation_latency = LatencyTracker()
@@ -0,0 +1,125 @@
+"""
+Server-side conversation sessions for the chat assistant
+"""
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.telemetry import span
+from app.config import (
+    SESSION_MAX_COUNT, SESSION_IDLE_TTL, SESSION_TOKEN_BUDGET, SESSION_MAX_TURNS, SESSION_SUMMARY_MAX_CHARS
+)
+
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a user and a task planning assistant in a few sentences. "
+    "Keep task titles, dates, times, task IDs and open requests. Reply with the summary only."
+)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1 if text else 0
+
+
+class ConversationSession:
+    """
+    Rolling conversation state: a summary of older turns plus the most recent
+    turns verbatim, kept within a token budget and SESSION_MAX_TURNS.
+    Turns are never dropped, only rolled into the summary.
+    """
+
+    def __init__(self, session_id: str, owner: Optional[str] = None):
+        self.id = session_id
+        self.owner = owner
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.last_used = time.monotonic()
+
+    def history_messages(self) -> List[Dict[str, Any]]:
+        """Summary and recent turns as chat messages, oldest first"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+        for user_message, assistant_message in self.turns:
+            messages.append({"role": "user", "content": user_message})
+            messages.append({"role": "assistant", "content": assistant_message})
+        return messages
+
+    def token_count(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(user_message) + estimate_tokens(assistant_message)
+            for user_message, assistant_message in self.turns
+        )
+
+    def add_turn(self, user_message: str, assistant_message: str) -> None:
+        self.turns.append((user_message, assistant_message))
+        self.last_used = time.monotonic()
+
+    def needs_rollup(self) -> bool:
+        return len(self.turns) > 1 and (
+            len(self.turns) > SESSION_MAX_TURNS or self.token_count() > SESSION_TOKEN_BUDGET
+        )
+
+    async def roll_up(self, client, model: str) -> None:
+        """
+        Replace the older half of the turns by a model-written summary.
+        Falls back to a truncated transcript if the model call fails.
+        """
+        old_turns = self.turns[:len(self.turns) // 2]
+        del self.turns[:len(old_turns)]
+        transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in old_turns)
+        if self.summary:
+            transcript = f"Earlier summary: {self.summary}\n{transcript}"
+
+        try:
+            with span("openai.chat.completions", purpose="summary"):
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_PROMPT},
+                        {"role": "user", "content": transcript}
+                    ],
+                    temperature=0
+                )
+            summary = response.choices[0].message.content or ""
+        except Exception:
+            summary = transcript
+
+        self.summary = summary[-SESSION_SUMMARY_MAX_CHARS:]
+
+
+class SessionStore:
+    """LRU-bounded store of conversation sessions with idle expiry"""
+
+    def __init__(self, max_sessions: int, idle_ttl: float):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+    def get_or_create(self, session_id: Optional[str], owner: Optional[str] = None) -> ConversationSession:
+        self._expire()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is not None and session.owner != owner:
+            # Another user's conversation: start a new one under a fresh ID
+            session, session_id = None, None
+        if session is None:
+            session = ConversationSession(session_id or uuid.uuid4().hex, owner)
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session.id)
+        session.last_used = time.monotonic()
+        return session
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        # Sessions are ordered by last use, so expired ones are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used > cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+
+session_store = SessionStore(max_sessions=SESSION_MAX_COUNT, idle_ttl=SESSION_IDLE_TTL)
@@ -0,0 +1,188 @@
+"""
+Tracing and metrics: spans around external calls plus counters and
+histograms, exported in Prometheus text format on /metrics
+"""
+import contextvars
+import functools
+import inspect
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import TELEMETRY_LOG_SPANS
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Trace of the current request (set by the HTTP middleware, or from X-Trace-Id)
+trace_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+span_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_id", default=None)
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: bucket counts (last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                cumulative += counts[-1]
+                labels = format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {total[0]}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """All metrics of the process, rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.collect()) + "\n"
+
+
+registry = Registry()
+
+SPAN_DURATION = registry.histogram(
+    "span_duration_seconds", "Duration of traced operations (external calls, file I/O)", ("span",)
+)
+SPAN_ERRORS = registry.counter("span_errors_total", "Traced operations that raised an error", ("span",))
+HTTP_REQUESTS = registry.counter("http_requests_total", "HTTP requests handled", ("method", "path", "status"))
+HTTP_DURATION = registry.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "path"))
+
+
+def observe_span(name: str, seconds: float, error: bool = False, parent_id: Optional[str] = None,
+                 span_id: Optional[str] = None, **attributes: Any) -> None:
+    """
+    Record a finished operation. Used by span() and directly where a
+    context manager does not fit (e.g. around yields in a generator).
+    """
+    SPAN_DURATION.observe(seconds, span=name)
+    if error:
+        SPAN_ERRORS.inc(span=name)
+    if TELEMETRY_LOG_SPANS:
+        # Straight to stderr: uvicorn configures no handler that would show an app logger's INFO records
+        print(json.dumps({
+            "trace_id": trace_id_var.get(),
+            "span_id": span_id or new_id(),
+            "parent_id": parent_id if parent_id is not None else span_id_var.get(),
+            "span": name,
+            "duration_ms": round(seconds * 1000, 2),
+            "status": "error" if error else "ok",
+            **attributes
+        }, default=str), file=sys.stderr, flush=True)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Time a block as one span of the current trace"""
+    parent_id = span_id_var.get()
+    span_id = new_id()
+    token = span_id_var.set(span_id)
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        span_id_var.reset(token)
+        observe_span(name, time.perf_counter() - started, error, parent_id, span_id, **attributes)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of span() for sync and async functions"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,258 @@
+"""
+Per-user credentials, pending OAuth logins and pooled API clients
+
+Users are identified by an opaque session token handed out at the end of the
+OAuth flow and sent back as cookie or Authorization: Bearer header. Only the
+SHA-256 digest of the token is used as user ID, so token files are named
+after the digest and never contain the session token itself.
+"""
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+from google.auth.transport.requests import Request as GoogleRequest
+from google.oauth2.credentials import Credentials
+
+from app.config import SCOPES
+from app.telemetry import registry, span
+
+# User of the single-user token file (TOKEN_FILE) and of requests without a session token
+DEFAULT_USER = "default"
+
+CLIENT_POOL_EVENTS = registry.counter(
+    "client_pool_events_total", "Per-user API client lookups and evictions", ("pool", "event")
+)
+
+T = TypeVar("T")
+
+
+def new_session_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def user_id_for(session_token: str) -> str:
+    return hashlib.sha256(session_token.encode("utf-8")).hexdigest()
+
+
+class CredentialStore:
+    """
+    Token files keyed by user, with an LRU of loaded credentials.
+    A file is only read again when its modification time changes (e.g. after
+    the token broker refreshed it). Refreshes are serialized per user through
+    striped locks: concurrent requests of one user refresh once, and users
+    never wait for each other's refresh.
+    """
+
+    def __init__(self, directory: Path, default_path: Path, max_cached: int, stripes: int = 64):
+        self.directory = directory
+        self.default_path = default_path
+        self.max_cached = max_cached
+        self._cached: "OrderedDict[str, Tuple[Credentials, int]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def path(self, user_id: str) -> Path:
+        if user_id == DEFAULT_USER:
+            return self.default_path
+        return self.directory / f"{user_id}.json"
+
+    def _lock(self, user_id: str) -> threading.Lock:
+        return self._locks[hash(user_id) % len(self._locks)]
+
+    def _remember(self, user_id: str, creds: Credentials, mtime: int) -> None:
+        with self._cache_lock:
+            self._cached[user_id] = (creds, mtime)
+            self._cached.move_to_end(user_id)
+            while len(self._cached) > self.max_cached:
+                self._cached.popitem(last=False)
+
+    def _forget(self, user_id: str) -> None:
+        with self._cache_lock:
+            self._cached.pop(user_id, None)
+
+    def _load(self, user_id: str) -> Optional[Credentials]:
+        path = self.path(user_id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            self._forget(user_id)
+            return None
+        with self._cache_lock:
+            cached = self._cached.get(user_id)
+            if cached is not None and cached[1] == mtime:
+                self._cached.move_to_end(user_id)
+                return cached[0]
+        try:
+            with span("file.token_read"):
+                token_info = json.loads(path.read_text())
+            creds = Credentials.from_authorized_user_info(token_info, SCOPES)
+        except Exception:
+            return None
+        self._remember(user_id, creds, mtime)
+        return creds
+
+    def _write(self, user_id: str, creds: Credentials) -> None:
+        path = self.path(user_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        with span("file.token_write"):
+            # Tokens are secrets: owner-only, and never visible half-written
+            descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w") as f:
+                f.write(creds.to_json())
+            os.replace(temporary, path)
+        self._remember(user_id, creds, path.stat().st_mtime_ns)
+
+    def cached(self, user_id: str) -> Optional[Credentials]:
+        """
+        Valid credentials already loaded from an unchanged token file, or None
+        when get() has to read or refresh them. Only stats the file, so it can
+        run on the event loop.
+        """
+        try:
+            mtime = self.path(user_id).stat().st_mtime_ns
+        except OSError:
+            return None
+        with self._cache_lock:
+            cached = self._cached.get(user_id)
+            if cached is None or cached[1] != mtime:
+                return None
+            self._cached.move_to_end(user_id)
+        return cached[0] if cached[0].valid else None
+
+    def get(self, user_id: str) -> Optional[Credentials]:
+        """Valid credentials of a user, refreshed if expired; None if not signed in"""
+        with self._lock(user_id):
+            creds = self._load(user_id)
+            if creds and creds.expired and creds.refresh_token:
+                try:
+                    with span("google.token_refresh"):
+                        creds.refresh(GoogleRequest())
+                    self._write(user_id, creds)
+                except Exception:
+                    return None
+            return creds if creds and creds.valid else None
+
+    def put(self, user_id: str, creds: Credentials) -> None:
+        with self._lock(user_id):
+            self._write(user_id, creds)
+
+    def delete(self, user_id: str) -> None:
+        with self._lock(user_id):
+            self._forget(user_id)
+            self.path(user_id).unlink(missing_ok=True)
+
+
+class PendingLogin:
+    """An /auth/authorize call waiting for its callback"""
+    __slots__ = ("user_id", "code_verifier", "expires_at")
+
+    def __init__(self, user_id: Optional[str], code_verifier: Optional[str], expires_at: float):
+        self.user_id = user_id
+        self.code_verifier = code_verifier
+        self.expires_at = expires_at
+
+
+class LoginStates:
+    """
+    Pending OAuth logins by state parameter. Each state can be used once and
+    expires after `ttl` seconds, so concurrent logins never overwrite each other.
+    """
+
+    def __init__(self, ttl: float, max_pending: int = 10000):
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, PendingLogin]" = OrderedDict()
+
+    def add(self, state: str, user_id: Optional[str], code_verifier: Optional[str]) -> None:
+        self._expire()
+        self._pending[state] = PendingLogin(user_id, code_verifier, time.monotonic() + self.ttl)
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+
+    def pop(self, state: str) -> Optional[PendingLogin]:
+        self._expire()
+        return self._pending.pop(state, None)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        # All logins share one TTL, so the oldest (first) ones expire first
+        while self._pending:
+            login = next(iter(self._pending.values()))
+            if login.expires_at > now:
+                break
+            self._pending.popitem(last=False)
+
+
+class PooledClient(Generic[T]):
+    __slots__ = ("client", "last_used")
+
+    def __init__(self, client: T, last_used: float):
+        self.client = client
+        self.last_used = last_used
+
+
+class ClientPool(Generic[T]):
+    """
+    LRU-bounded pool of per-user API clients with idle eviction.
+    A client (and its per-user state such as the rate limiter) is built once
+    per user instead of once per request; connections are not part of it and
+    are shared by all users. Clients idle for `idle_ttl` seconds, or least
+    recently used beyond `max_clients`, are dropped. Clients must provide
+    use_credentials(credentials), called when a user's credentials changed.
+    """
+
+    def __init__(self, name: str, factory: Callable[[str, Credentials], T], max_clients: int, idle_ttl: float):
+        self.name = name
+        self.factory = factory
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self._clients: "OrderedDict[str, PooledClient[T]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, credentials: Credentials) -> T:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._clients.get(user_id)
+            if entry is not None:
+                self._clients.move_to_end(user_id)
+                entry.last_used = now
+        if entry is not None:
+            CLIENT_POOL_EVENTS.inc(pool=self.name, event="hit")
+            entry.client.use_credentials(credentials)
+            return entry.client
+
+        CLIENT_POOL_EVENTS.inc(pool=self.name, event="miss")
+        client = self.factory(user_id, credentials)
+        with self._lock:
+            # Another request of the same user may have been faster
+            entry = self._clients.setdefault(user_id, PooledClient(client, now))
+            self._clients.move_to_end(user_id)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                CLIENT_POOL_EVENTS.inc(pool=self.name, event="evicted")
+        return entry.client
+
+    def discard(self, user_id: str) -> None:
+        with self._lock:
+            self._clients.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.idle_ttl
+        # Clients are ordered by last use, so idle ones are at the front
+        while self._clients:
+            entry = next(iter(self._clients.values()))
+            if entry.last_used > cutoff:
+                break
+            self._clients.popitem(last=False)
+            CLIENT_POOL_EVENTS.inc(pool=self.name, event="expired")
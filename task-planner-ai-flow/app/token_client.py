@@ -0,0 +1,23 @@
+"""
+Client for the local token broker (token_broker/broker.py)
+
+The client is Backend/token_client.py, shared with the agents; the planner
+passes in its configured socket and account.
+"""
+import sys
+from typing import Optional
+
+from google.oauth2.credentials import Credentials
+
+from app.config import TOKEN_BROKER_SOCKET, TOKEN_BROKER_ACCOUNT, SHARED_MODULES_DIR
+
+sys.path.append(str(SHARED_MODULES_DIR))
+import token_client as shared_token_client
+
+
+def broker_credentials() -> Optional[Credentials]:
+    """
+    Access-token-only credentials from the broker. They carry no refresh
+    token: refreshing is the broker's job, never the request path's.
+    """
+    return shared_token_client.broker_credentials(TOKEN_BROKER_ACCOUNT, socket_path=TOKEN_BROKER_SOCKET)
@@ -0,0 +1,88 @@
+"""
+Benchmark: convert Google Calendar events into tasks (legacy loop vs app.events)
+
+Run from the task-planner-ai-flow folder:
+    python -m benchmarks.bench_event_conversion [num_events]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from app.events import events_to_tasks
+from app.models import Task
+
+
+def make_events(count: int):
+    """Synthetic events.list items, mixing timed, all-day and completed events"""
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    events = []
+    for i in range(count):
+        start = base + timedelta(minutes=30 * i)
+        event = {
+            'id': f"evt{i:06d}",
+            'summary': f"Task {i}",
+            'description': "[COMPLETED] Weekly sync" if i % 5 == 0 else "Weekly sync",
+        }
+        if i % 7 == 0:
+            event['start'] = {'date': start.date().isoformat()}
+        else:
+            event['start'] = {'dateTime': start.isoformat() + '+01:00', 'timeZone': 'Europe/Berlin'}
+        events.append(event)
+    return events
+
+
+def legacy_convert(events):
+    """Former CalendarService.get_tasks_for_range loop, kept for comparison"""
+    tasks = []
+    for event in events:
+        if not event.get('summary'):
+            continue
+
+        start = event.get('start', {})
+        if 'dateTime' in start:
+            dt_str = start['dateTime']
+            dt_str = dt_str.split('T')[0] + 'T' + dt_str.split('T')[1].split('+')[0].split('-')[0].split('Z')[0]
+            dt = datetime.fromisoformat(dt_str)
+            task_date = dt.date()
+            task_time = dt.time()
+        elif 'date' in start:
+            task_date = datetime.fromisoformat(start['date']).date()
+            task_time = None
+        else:
+            continue
+
+        description = event.get('description', '')
+        is_completed = "[COMPLETED]" in description
+        clean_description = description.replace("[COMPLETED]", "").strip()
+
+        tasks.append(Task(
+            id=event['id'],
+            title=event.get('summary', 'Untitled'),
+            date=task_date,
+            time=task_time.strftime('%H:%M:%S') if task_time else None,
+            description=clean_description if clean_description else None,
+            is_completed=is_completed
+        ))
+    return tasks
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    events = make_events(count)
+
+    legacy = legacy_convert(events)
+    current = list(events_to_tasks(events))
+    assert [t.model_dump() for t in legacy] == [t.model_dump() for t in current]
+
+    repeat = 5
+    legacy_time = min(timeit.repeat(lambda: legacy_convert(events), number=1, repeat=repeat))
+    current_time = min(timeit.repeat(lambda: list(events_to_tasks(events)), number=1, repeat=repeat))
+
+    print(f"events:  {count}")
+    print(f"legacy:  {legacy_time * 1000:8.2f} ms")
+    print(f"current: {current_time * 1000:8.2f} ms")
+    print(f"speedup: {legacy_time / current_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Local token broker for the Google-using agents
+
+A long-running process that owns the OAuth token files, refreshes access
+tokens before they expire and hands them to short-lived agent processes over
+a Unix socket. Agents then never refresh or write token files on the request
+path, and concurrent processes no longer race on token.json.
+
+Usage (from the repository root):
+    python token_broker/broker.py \\
+        --account gmail=Backend/mail_agent/token.json \\
+        --account calendar=calendar_agent/token.json \\
+        --account planner=task-planner-ai-flow/credentials/token.json
+
+Protocol: one JSON line per request, one JSON line per reply.
+    {"account": "gmail"}  ->  {"token": "...", "expiry": "2025-01-01T10:00:00", "scopes": [...]}
+    {"stats": true}       ->  {"served": ..., "refreshes": ..., "accounts": {...}}
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+DEFAULT_SOCKET = os.getenv("TOKEN_BROKER_SOCKET", "/tmp/abbesynapse-token-broker.sock")
+
+
+class TokenStore:
+    """Credentials per account, refreshed ahead of expiry and written back atomically"""
+
+    def __init__(self, accounts, refresh_margin):
+        self.paths = accounts
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.credentials = {}
+        self.mtimes = {}
+        self.locks = {name: threading.Lock() for name in accounts}
+        self.served = 0
+        self.refreshes = 0
+        self.errors = {}
+
+    def _expiring(self, creds):
+        # google-auth keeps expiry as naive UTC
+        return creds.expiry is None or creds.expiry - self.refresh_margin <= datetime.utcnow()
+
+    def _refresh(self, name):
+        creds = self.credentials.get(name)
+        # Reload when the file was rewritten elsewhere, e.g. after a new OAuth consent
+        mtime = os.path.getmtime(self.paths[name])
+        if creds is None or mtime != self.mtimes.get(name):
+            creds = self.credentials[name] = Credentials.from_authorized_user_file(self.paths[name])
+            self.mtimes[name] = mtime
+        if not creds.valid or self._expiring(creds):
+            creds.refresh(Request())
+            self.refreshes += 1
+            # Write to a temporary file first so readers never see a partial token file
+            temporary = f"{self.paths[name]}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(creds.to_json())
+            os.replace(temporary, self.paths[name])
+            self.mtimes[name] = os.path.getmtime(self.paths[name])
+        return creds
+
+    def get(self, name):
+        if name not in self.paths:
+            return {"error": f"unknown account: {name}"}
+        with self.locks[name]:
+            try:
+                creds = self._refresh(name)
+            except Exception as error:
+                self.errors[name] = str(error)
+                return {"error": f"refresh failed: {error}"}
+        self.served += 1
+        return {
+            "token": creds.token,
+            "expiry": creds.expiry.isoformat() if creds.expiry else None,
+            "scopes": list(creds.scopes or []),
+        }
+
+    def refresh_all(self):
+        """Proactive refresh: called periodically so requests find a fresh token"""
+        for name in self.paths:
+            with self.locks[name]:
+                try:
+                    self._refresh(name)
+                    self.errors.pop(name, None)
+                except Exception as error:
+                    self.errors[name] = str(error)
+
+    def stats(self):
+        return {
+            "served": self.served,
+            "refreshes": self.refreshes,
+            "accounts": {
+                name: {
+                    "expiry": creds.expiry.isoformat() if creds.expiry else None,
+                    "error": self.errors.get(name),
+                }
+                for name, creds in self.credentials.items()
+            },
+        }
+
+
+class BrokerHandler(socketserver.StreamRequestHandler):
+    store = None
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                reply = {"error": "invalid request"}
+            else:
+                reply = self.store.stats() if request.get("stats") else self.store.get(request.get("account", ""))
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+def parse_accounts(values):
+    accounts = {}
+    for value in values:
+        name, _, path = value.partition("=")
+        if not name or not path:
+            raise SystemExit(f"--account expects NAME=TOKEN_FILE, got {value!r}")
+        accounts[name] = os.path.abspath(path)
+    return accounts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Google OAuth token broker")
+    parser.add_argument("--account", action="append", required=True, metavar="NAME=TOKEN_FILE")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--refresh-margin", type=float, default=300,
+                        help="refresh tokens this many seconds before they expire")
+    parser.add_argument("--check-interval", type=float, default=30)
+    args = parser.parse_args(argv)
+
+    store = TokenStore(parse_accounts(args.account), args.refresh_margin)
+    store.refresh_all()
+    for name, error in store.errors.items():
+        print(f"{name}: {error}", file=sys.stderr)
+
+    def refresh_loop():
+        while True:
+            time.sleep(args.check_interval)
+            store.refresh_all()
+
+    threading.Thread(target=refresh_loop, daemon=True).start()
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    handler = type("Handler", (BrokerHandler,), {"store": store})
+    with socketserver.ThreadingUnixStreamServer(args.socket, handler) as server:
+        # Access tokens are secrets: only the current user may connect
+        os.chmod(args.socket, 0o600)
+        print(f"Token broker listening on {args.socket} ({', '.join(store.paths)})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()